@@ -0,0 +1,133 @@
+"""Benchmark: near-duplicate detection (`duplicates.DuplicateDetector`)
+
+Builds synthetic events (words follow Zipf distribution) where every 10th
+event is a relisting of an earlier one (one word of the name and up to two
+words of the description are changed). It reports signature time, detection rate at
+growing sizes (should be ~constant, as detection is linear), recall of planted
+duplicates, false clusters and memory per event.
+
+Usage:
+    python benchmarks/bench_duplicates.py [--events 1000000]
+"""
+
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from eventbrite_scrapper import data_models as dm  # noqa: E402
+from eventbrite_scrapper.duplicates import DuplicateDetector  # noqa: E402
+from eventbrite_scrapper.duplicates import event_minhash  # noqa: E402
+from eventbrite_scrapper.duplicates import event_shingles  # noqa: E402
+
+
+def make_events(n_events: int, vocabulary: int = 50000, seed: int = 1):
+    """It yields (event, id of the original event or None)"""
+    rnd = random.Random(seed)
+    words = [f"w{i}" for i in range(vocabulary)]
+    cum_weights = list(itertools.accumulate(1 / (i + 1) for i in range(vocabulary)))
+
+    def text(n: int):
+        return rnd.choices(words, cum_weights=cum_weights, k=n)
+
+    originals = []
+    for n in range(n_events):
+        original = None
+        if n % 10 == 9 and originals:
+            original = rnd.choice(originals)
+            name = original.name.split()
+            name[rnd.randrange(len(name))] = rnd.choice(words)
+            description = original.short_description.split()
+            for _ in range(rnd.randrange(3)):
+                description[rnd.randrange(len(description))] = rnd.choice(words)
+            name, description = " ".join(name), " ".join(description)
+            venue = original.primary_venue
+        else:
+            name, description = " ".join(text(6)), " ".join(text(30))
+            venue = dm.Venue(
+                name=" ".join(text(3)),
+                address=dm.Address(city=rnd.choice(words[:100])),
+            )
+        event = dm.Event(
+            id=str(100000000000 + n),
+            hash=None,
+            name=name,
+            url="",
+            short_description=description,
+            primary_venue=venue,
+        )
+        if original is None:
+            originals.append(event)
+        yield event, (str(original.id) if original is not None else None)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=1000000)
+    args = parser.parse_args()
+
+    events, planted = [], {}
+    for event, original_id in make_events(args.events):
+        events.append(event)
+        if original_id is not None:
+            planted[event.id] = original_id
+
+    start = time.perf_counter()
+    for event in events:
+        event.minhash = event_minhash(event)
+    elapsed = time.perf_counter() - start
+    print(f"signatures: {elapsed / len(events) * 1e6:.1f} us/event")
+
+    detector = DuplicateDetector()
+    checkpoints = {len(events) // 4, len(events) // 2, len(events)}
+    start = time.perf_counter()
+    for n, event in enumerate(events, 1):
+        detector.add(event)
+        if n in checkpoints:
+            rate = n / (time.perf_counter() - start)
+            print(f"{n:>9} events: {rate:>8.0f} events/s")
+
+    start = time.perf_counter()
+    clusters = detector.clusters()
+    print(f"clusters: {len(clusters)} in {time.perf_counter() - start:.2f} s")
+
+    roots = {}
+    for i, ids in enumerate(clusters):
+        for id in ids:
+            roots[id] = i
+    # recall by exact Jaccard similarity of shingles
+    by_id = {event.id: event for event in events}
+    buckets = {}
+    for id, original in planted.items():
+        shingles1 = event_shingles(by_id[id])
+        shingles2 = event_shingles(by_id[original])
+        jaccard = len(shingles1 & shingles2) / len(shingles1 | shingles2)
+        bucket = buckets.setdefault(min(int(jaccard * 10), 9) / 10, [0, 0])
+        bucket[0] += 1
+        bucket[1] += roots.get(id, -1) == roots.get(original)
+    for jaccard, (n, found) in sorted(buckets.items()):
+        print(
+            f"recall, Jaccard {jaccard:.1f}-{jaccard + 0.1:.1f}: {found / n:.3f} ({n})"
+        )
+    # every cluster should contain one original and its relistings
+    false_clusters = 0
+    for ids in clusters:
+        originals = {planted.get(id, id) for id in ids}
+        false_clusters += len(originals) > 1
+    print(f"clusters with unrelated events: {false_clusters}")
+
+    tracemalloc.start()
+    detector = DuplicateDetector()
+    detector.add_many(events[:100000])
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"memory: {size / min(len(events), 100000):.0f} B/event")
+
+
+if __name__ == "__main__":
+    main()
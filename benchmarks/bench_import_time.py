@@ -0,0 +1,77 @@
+"""Benchmark: cold import time of common entry points
+
+Runs every entry point in a fresh interpreter with `python -X importtime` and
+reports median cumulative import time of the package modules, wall time of the
+process and heavy dependencies that were actually loaded.
+
+Usage:
+    python benchmarks/bench_import_time.py [--runs 5]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_POINTS = {
+    "package": "import eventbrite_scrapper",
+    "data_models": "from eventbrite_scrapper import data_models",
+    "URL": "from eventbrite_scrapper.main import URL",
+    "client": "from eventbrite_scrapper import Eventbrite; Eventbrite()",
+    "client+parse": (
+        "from eventbrite_scrapper import Eventbrite, parsing; Eventbrite(); "
+        "parsing.to_html_tree('<html></html>')"
+    ),
+}
+HEAVY_MODULES = ("requests", "lxml.etree", "pytz")
+
+REPORT_LOADED = (
+    "import sys; print(','.join(m for m in {modules!r} if m in sys.modules))"
+)
+
+
+def run(code: str):
+    """It returns (import time of the package in us, wall time in s, loaded)"""
+    code = f"{code}; {REPORT_LOADED.format(modules=HEAVY_MODULES)}"
+    start = time.perf_counter()
+    p = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    wall = time.perf_counter() - start
+
+    # top level entries (no indentation) of the package and its imports
+    us = 0
+    for line in p.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            if name.strip().startswith("eventbrite_scrapper"):
+                us += int(cumulative)
+    return us, wall, p.stdout.strip().splitlines()[-1] if p.stdout.strip() else ""
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'entry point':<14} {'import ms':>10} {'process ms':>11}  loaded")
+    for name, code in ENTRY_POINTS.items():
+        results = [run(code) for _ in range(args.runs)]
+        import_ms = statistics.median(r[0] for r in results) / 1000
+        wall_ms = statistics.median(r[1] for r in results) * 1000
+        loaded = results[-1][2] or "-"
+        print(f"{name:<14} {import_ms:>10.1f} {wall_ms:>11.1f}  {loaded}")
+
+
+if __name__ == "__main__":
+    main()
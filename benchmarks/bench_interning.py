@@ -0,0 +1,85 @@
+"""Benchmark: serialization of recurring events with and without `Interner`
+
+Builds a dataset of recurring events (every venue hosts `--per-venue` events
+with the same tags), serializes it with and without interner and reports
+serialization time (the best of `--repeat` interleaved runs, as single runs are
+noisy) and memory retained by the events (tracemalloc).
+
+Usage:
+    python benchmarks/bench_interning.py [--events 20000] [--per-venue 50]
+        [--repeat 5]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from eventbrite_scrapper.interning import Interner  # noqa: E402
+from eventbrite_scrapper.serialization import (  # noqa: E402
+    serialize_event_search_result,
+)
+from eventbrite_scrapper.tests.fixtures import make_search_result  # noqa: E402
+
+
+def build_results(n_events: int, per_venue: int):
+    return [make_search_result(n, venue_n=n // per_venue) for n in range(n_events)]
+
+
+def measure_time(results, interner=None) -> float:
+    start = time.perf_counter()
+    for r in results:
+        serialize_event_search_result(r, interner)
+    return time.perf_counter() - start
+
+
+def measure_memory(results, interner=None) -> int:
+    """It returns memory retained by events (raw payloads are not counted)"""
+    gc.collect()
+    tracemalloc.start()
+    events = [serialize_event_search_result(r, interner) for r in results]
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del events
+    return retained
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--per-venue", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = build_results(args.events, args.per_venue)
+    n = len(results)
+
+    # warm up (timezones, imports)
+    measure_time(results[:100])
+
+    t_plain = t_interned = float("inf")
+    for _ in range(args.repeat):
+        t_plain = min(t_plain, measure_time(results))
+        interner = Interner()
+        t_interned = min(t_interned, measure_time(results, interner))
+    m_plain = measure_memory(results)
+    m_interned = measure_memory(results, Interner())
+
+    print(f"events: {n}, events per venue: {args.per_venue}")
+    print(
+        f"plain:    {t_plain / n * 1e6:6.1f} us/event  " f"{m_plain / n:7.0f} B/event"
+    )
+    print(
+        f"interned: {t_interned / n * 1e6:6.1f} us/event  "
+        f"{m_interned / n:7.0f} B/event  "
+        f"(time x{t_plain / t_interned:.2f}, memory x{m_plain / m_interned:.2f})"
+    )
+    print(f"interner: {interner.stats()}")
+
+
+if __name__ == "__main__":
+    main()
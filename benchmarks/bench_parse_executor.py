@@ -0,0 +1,94 @@
+"""Benchmark: inline parsing vs `parse_executor` process pool
+
+Measures parsing throughput of synthetic search pages when parsing runs in the
+fetching threads vs in a process pool, and the pickling overhead of sending raw
+pages to workers and serialized events back.
+
+Usage:
+    python benchmarks/bench_parse_executor.py [--pages 200] [--threads 8]
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from eventbrite_scrapper import parsing  # noqa: E402
+from eventbrite_scrapper.tests.fixtures import (  # noqa: E402
+    make_search_result,
+    make_search_page_html,
+)
+
+
+def build_pages(n_pages: int, page_size: int = 20):
+    pages = []
+    for p in range(n_pages):
+        results = [make_search_result(p * page_size + i) for i in range(page_size)]
+        pages.append(make_search_page_html(results).encode("utf-8"))
+    return pages
+
+
+def run_threads(pages, n_threads: int, executor=None) -> float:
+    def work(content):
+        if executor is None:
+            return parsing.parse_search_page(content)
+        return executor.submit(parsing.parse_search_page, content).result()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(n_threads) as pool:
+        for _ in pool.map(work, pages):
+            pass
+    return time.perf_counter() - start
+
+
+def measure_pickling(pages):
+    parsed = [parsing.parse_search_page(p) for p in pages]
+
+    start = time.perf_counter()
+    raw_bytes = sum(len(pickle.dumps(p)) for p in pages)
+    t_raw = time.perf_counter() - start
+
+    start = time.perf_counter()
+    dumped = [pickle.dumps(p) for p in parsed]
+    for d in dumped:
+        pickle.loads(d)
+    t_events = time.perf_counter() - start
+
+    return raw_bytes, t_raw, sum(len(d) for d in dumped), t_events
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    pages = build_pages(args.pages)
+    n_pages = len(pages)
+
+    t_inline = run_threads(pages, args.threads)
+    print(f"inline ({args.threads} threads): {n_pages / t_inline:8.1f} pages/s")
+
+    with ProcessPoolExecutor(args.processes) as executor:
+        run_threads(pages[: args.processes], args.processes, executor)  # warm up
+        t_pool = run_threads(pages, args.threads, executor)
+    print(
+        f"process pool ({args.processes} procs): {n_pages / t_pool:8.1f} pages/s"
+        f"  (x{t_inline / t_pool:.2f})"
+    )
+
+    raw_bytes, t_raw, events_bytes, t_events = measure_pickling(pages)
+    print(
+        f"pickling: raw pages {raw_bytes / n_pages / 1024:.1f} KiB/page "
+        f"{t_raw / n_pages * 1e6:.1f} us/page; "
+        f"events {events_bytes / n_pages / 1024:.1f} KiB/page "
+        f"{t_events / n_pages * 1e6:.1f} us/page (dumps+loads)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Benchmark: `TextIndex` build and query time
+
+Indexes synthetic events (words follow Zipf distribution) page by page and
+reports indexing rate, query latency of keyword, phrase and tag queries and
+save/load time.
+
+Usage:
+    python benchmarks/bench_text_index.py [--events 1000000] [--queries 100]
+"""
+
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from eventbrite_scrapper import data_models as dm  # noqa: E402
+from eventbrite_scrapper.text_index import TextIndex  # noqa: E402
+
+TAGS = [dm.EventTag(f"EventbriteCategory/{100 + i}", f"Tag {i}") for i in range(20)]
+
+
+def make_pages(n_events: int, vocabulary: int, page_size: int = 50, seed: int = 1):
+    rnd = random.Random(seed)
+    words = [f"w{i}" for i in range(vocabulary)]
+    cum_weights = list(itertools.accumulate(1 / (i + 1) for i in range(vocabulary)))
+
+    def text(n: int) -> str:
+        return " ".join(rnd.choices(words, cum_weights=cum_weights, k=n))
+
+    page = []
+    for n in range(n_events):
+        page.append(
+            dm.Event(
+                id=str(100000000000 + n),
+                hash=None,
+                name=text(6),
+                url="",
+                short_description=text(20),
+                long_description=f"<p>{text(60)}</p>",
+                tags_categories=(rnd.choice(TAGS),),
+            )
+        )
+        if len(page) == page_size:
+            yield page
+            page = []
+    if page:
+        yield page
+
+
+def measure_queries(index: TextIndex, queries, **kwargs):
+    latencies = []
+    for q in queries:
+        start = time.perf_counter()
+        index.search(q, **kwargs)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return (
+        statistics.median(latencies) * 1000,
+        latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=1000000)
+    parser.add_argument("--vocabulary", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=100)
+    args = parser.parse_args()
+
+    index = TextIndex()
+    elapsed = 0
+    for page in make_pages(args.events, args.vocabulary):
+        start = time.perf_counter()
+        index.add(page)
+        elapsed += time.perf_counter() - start
+    print(f"indexed {len(index)} events: {len(index) / elapsed:.0f} events/s")
+
+    rnd = random.Random(2)
+    rare = [f"w{rnd.randrange(1000, args.vocabulary)}" for _ in range(args.queries)]
+    common = [f"w{rnd.randrange(0, 100)} w{rnd.randrange(1000, args.vocabulary)}"]
+    common *= args.queries
+    phrases = [f'"w0 w{rnd.randrange(1, 10)}"' for _ in range(args.queries)]
+    for name, queries, kwargs in (
+        ("rare keyword", rare, {}),
+        ("common + rare keywords", common, {}),
+        ("phrase", phrases[:10], {}),
+        ("rare keyword + tag", rare, {"tags": ["Tag 3"]}),
+    ):
+        p50, p95 = measure_queries(index, queries, **kwargs)
+        print(f"{name:<24} p50 {p50:8.2f} ms  p95 {p95:8.2f} ms")
+
+    with tempfile.TemporaryDirectory() as dpath:
+        fpath = os.path.join(dpath, "index")
+        start = time.perf_counter()
+        index.save(fpath)
+        t_save = time.perf_counter() - start
+        start = time.perf_counter()
+        TextIndex.load(fpath)
+        t_load = time.perf_counter() - start
+        size = os.path.getsize(fpath)
+    print(f"save {t_save:.2f} s, load {t_load:.2f} s, {size / 2**20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
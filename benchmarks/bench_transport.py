@@ -0,0 +1,180 @@
+"""Benchmark: `RequestsTransport` (HTTP/1.1) vs `HTTP2Transport` (HTTP/2)
+
+Starts a local stand-in server (hypercorn, HTTP/1.1 and HTTP/2 with prior
+knowledge) that answers every request with a search-page sized body after
+`--latency` ms, and fetches `--requests` pages through both transports at
+different concurrency levels. Reports throughput, latency percentiles and the
+number of connections opened by the client.
+
+NOTE: the server is plain TCP, so TLS handshakes of new connections (the
+main cost of HTTP/1.1 concurrency against eventbrite.com) are not included.
+
+Requires:
+    pip install httpx[http2] hypercorn
+
+Usage:
+    python benchmarks/bench_transport.py [--requests 500] [--latency 50]
+        [--concurrency 1,8,32,64]
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import httpx
+    import hypercorn.asyncio
+    import hypercorn.config
+except ImportError as e:
+    print(f"skipped: {e} (pip install httpx[http2] hypercorn)")
+    sys.exit(0)
+
+import requests  # noqa: E402
+
+from eventbrite_scrapper.transport import (  # noqa: E402
+    HTTP2Transport,
+    RequestsTransport,
+)
+
+PAGE = b"<html>" + b"x" * 200 * 1024 + b"</html>"
+HEADERS = {"Accept": "text/html", "Connection": "keep-alive"}
+
+
+class StandInServer(threading.Thread):
+    def __init__(self, latency: float):
+        super().__init__(daemon=True)
+        self.latency = latency
+        # (host, port) of clients = connections
+        self.connections = set()
+        self.started = threading.Event()
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            self.port = s.getsockname()[1]
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/e/1"
+
+    async def app(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        self.connections.add(tuple(scope["client"]))
+        await asyncio.sleep(self.latency)
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"text/html")],
+            }
+        )
+        await send({"type": "http.response.body", "body": PAGE})
+
+    def run(self):
+        config = hypercorn.config.Config()
+        config.bind = [f"127.0.0.1:{self.port}"]
+        config.loglevel = "WARNING"
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.stop_event = asyncio.Event()
+        self.loop.call_soon(self.started.set)
+        self.loop.run_until_complete(
+            hypercorn.asyncio.serve(
+                self.app, config, shutdown_trigger=self.stop_event.wait
+            )
+        )
+
+    def wait_ready(self, timeout: float = 10):
+        self.started.wait(timeout)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                socket.create_connection(("127.0.0.1", self.port), 0.1).close()
+                return
+            except OSError:
+                time.sleep(0.05)
+        raise RuntimeError("stand-in server is not started")
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.stop_event.set)
+        self.join(5)
+
+
+def make_transport(kind: str, concurrency: int):
+    if kind == "http/1.1":
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=concurrency)
+        session.mount("http://", adapter)
+        return RequestsTransport(session)
+    # NOTE: plain TCP stand-in server requires HTTP/2 prior knowledge
+    client = httpx.Client(
+        http1=False, http2=True, limits=httpx.Limits(max_connections=4)
+    )
+    return HTTP2Transport(client)
+
+
+def run(server: StandInServer, kind: str, n_requests: int, concurrency: int):
+    transport = make_transport(kind, concurrency)
+    server.connections.clear()
+
+    def fetch(_):
+        start = time.perf_counter()
+        content = transport.get(server.url, headers=HEADERS)
+        assert len(content) == len(PAGE)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        latencies = sorted(pool.map(fetch, range(n_requests)))
+    elapsed = time.perf_counter() - start
+    transport.close()
+
+    return {
+        "rps": n_requests / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p95": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "connections": len(server.connections),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=50, help="ms")
+    parser.add_argument("--concurrency", default="1,8,32,64")
+    args = parser.parse_args()
+
+    server = StandInServer(args.latency / 1000)
+    server.start()
+    server.wait_ready()
+    try:
+        print(
+            f"{'transport':<9} {'concurrency':>11} {'req/s':>8} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'connections':>11}"
+        )
+        for concurrency in (int(c) for c in args.concurrency.split(",")):
+            for kind in ("http/1.1", "http/2"):
+                r = run(server, kind, args.requests, concurrency)
+                print(
+                    f"{kind:<9} {concurrency:>11} {r['rps']:>8.1f} "
+                    f"{r['p50']:>8.1f} {r['p95']:>8.1f} {r['connections']:>11}"
+                )
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
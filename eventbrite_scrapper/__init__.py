@@ -1 +1,11 @@
-from .main import Eventbrite  # noqa: F401
+__all__ = ["Eventbrite"]
+
+
+def __getattr__(name: str):
+    # `main` imports heavy dependencies (requests, ...), so it is imported only
+    # when client is used (`data_models` etc. could be imported without it)
+    if name == "Eventbrite":
+        from .main import Eventbrite
+
+        return Eventbrite
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,439 @@
+"""Compact binary archive of events with random access by id
+
+File layout (little-endian):
+
+    header   b"EBAR" + version (u32)
+    body     records and strings in order of writing:
+               record - fixed layout: numeric columns (datetimes as int64
+                        microseconds, coordinates as float64, flags) followed
+                        by u64 offsets of strings
+               string - u32 length + utf-8 bytes (short strings are written
+                        once and shared by records)
+    index    (id string offset u64, record offset u64) sorted by event id
+    trailer  index offset (u64), number of index entries (u64), b"EBAR"
+
+The archive is append-only: reopening it for writing keeps everything written
+before (including the old index and trailer), new records, the new index and
+trailer are appended after them (the latest record of the same id wins). If the
+writer is not closed (e.g. the process crashed), the reader uses the last valid
+trailer, so only events written since the last `close` are lost. Raw payloads
+(`raw_search_data`, `raw_profile_data`) are not archived.
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import datetime
+import logging
+import math
+import mmap
+import os
+import struct
+
+from . import data_models as dm
+from . import profiling
+
+log = logging.getLogger(__name__)
+
+MAGIC = b"EBAR"
+VERSION = 3
+HEADER = struct.Struct("<4sI")
+TRAILER = struct.Struct("<QQ4s")
+INDEX_ENTRY = struct.Struct("<QQ")
+STRING_LEN = struct.Struct("<I")
+
+# NULL values of numeric columns and string references
+NULL_INT = -(2**63)
+NULL_REF = 2**64 - 1
+
+# strings shorter than that are deduplicated by writer
+SHARED_STRING_MAX_LEN = 256
+
+TAG_SEP = "\x1f"
+TAGS_SEP = "\x1e"
+
+DATETIME_COLUMNS = ("start_datetime", "end_datetime", "published_datetime")
+FLOAT_COLUMNS = ("primary_venue.address.latitude", "primary_venue.address.longitude")
+BOOL_COLUMNS = ("is_online_event", "is_cancelled", "hide_start_date", "hide_end_date")
+STRING_COLUMNS = (
+    "id",
+    "hash",
+    "name",
+    "url",
+    "long_description",
+    "short_description",
+    "timezone",
+    "parent_event_url",
+    "series_id",
+    "tickets_url",
+    "tickets_by",
+    "checkout_flow",
+    "language",
+    "primary_venue.id",
+    "primary_venue.name",
+    "primary_venue.description",
+    "primary_venue.url",
+    "primary_venue.twitter_handler",
+    "primary_venue.facebook_handler",
+    "primary_venue.organization_website",
+    "primary_venue.address.city",
+    "primary_venue.address.country",
+    "primary_venue.address.region",
+    "primary_venue.address.postal_code",
+    "primary_venue.address.address_1",
+    "primary_venue.address.address_2",
+    "primary_venue.address.localized_area_display",
+    "primary_venue.address.localized_address_display",
+    "primary_venue.address.full_address",
+    "image.id",
+    "image.url",
+    "image.original_url",
+    "organizer.id",
+    "organizer.name",
+    "organizer.description",
+    "organizer.url",
+    "organizer.twitter_handler",
+    "organizer.facebook_handler",
+    "organizer.organization_website",
+    "fingerprint",
+)
+TAG_COLUMNS = ("tags_categories", "tags_formats", "tags_by_organizer")
+
+RECORD = struct.Struct(
+    "<"
+    + "q" * len(DATETIME_COLUMNS)
+    + "d" * len(FLOAT_COLUMNS)
+    + "B"  # flags: 2 bits per bool column (0 - None, 1 - False, 2 - True)
+    + "Q" * (len(STRING_COLUMNS) + len(TAG_COLUMNS))
+)
+COLUMNS = DATETIME_COLUMNS + FLOAT_COLUMNS + ("flags",) + STRING_COLUMNS + TAG_COLUMNS
+# column -> (position in record, offset in record, struct format)
+COLUMN_LAYOUT: Dict[str, Tuple[int, int, str]] = {}
+_offset = 0
+for _i, (_name, _fmt) in enumerate(zip(COLUMNS, RECORD.format[1:])):
+    COLUMN_LAYOUT[_name] = (_i, _offset, _fmt)
+    _offset += struct.calcsize(_fmt)
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def get_path(obj: Any, path: str) -> Any:
+    """It returns value of dotted attribute path (None if any part is missing)"""
+    for name in path.split("."):
+        # NOTE: `Venue.address` defaults to `Address` class, not instance
+        if obj is None or isinstance(obj, type):
+            return None
+        obj = getattr(obj, name, None)
+    return None if isinstance(obj, type) else obj
+
+
+def encode_datetime(value: Optional[datetime.datetime]) -> int:
+    if value is None:
+        return NULL_INT
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    delta = value - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 10**6 + delta.microseconds
+
+
+def decode_datetime(value: int) -> Optional[datetime.datetime]:
+    if value == NULL_INT:
+        return None
+    return EPOCH + datetime.timedelta(microseconds=value)
+
+
+def encode_float(value: Any) -> float:
+    return float(value) if isinstance(value, (int, float)) else math.nan
+
+
+def decode_float(value: float) -> Optional[float]:
+    return None if math.isnan(value) else value
+
+
+def encode_tags(tags: Optional[Tuple[dm.EventTag]]) -> Optional[str]:
+    if tags is None:
+        return None
+    return TAGS_SEP.join(f"{t.id}{TAG_SEP}{t.text}" for t in tags)
+
+
+def decode_tags(value: Optional[str]) -> Optional[Tuple[dm.EventTag]]:
+    if value is None:
+        return None
+    if not value:
+        return ()
+    return tuple(dm.EventTag(*t.split(TAG_SEP, 1)) for t in value.split(TAGS_SEP))
+
+
+class ArchiveWriter:
+    """
+    It appends events to the archive (use as context manager, the index is
+    written on `close`)
+
+    Args:
+      fpath (str): path to the archive. Created if not exists
+    """
+
+    def __init__(self, fpath: str):
+        self.fpath = fpath
+        # event id -> (id string offset, record offset)
+        self.index: Dict[str, Tuple[int, int]] = {}
+        self.strings: Dict[str, int] = {}
+
+        if os.path.exists(fpath) and os.path.getsize(fpath):
+            with ArchiveReader(fpath) as reader:
+                for event_id, id_offset, record_offset in reader.index_entries():
+                    self.index[event_id] = (id_offset, record_offset)
+            # NOTE: previous index and trailer are kept until the new ones are
+            # written, so the archive stays readable if the writer is not closed
+            self.f = open(fpath, "r+b")
+            self.f.seek(0, os.SEEK_END)
+        else:
+            self.f = open(fpath, "w+b")
+            self.f.write(HEADER.pack(MAGIC, VERSION))
+            # empty index, so the new archive is readable before `close`
+            self.f.write(TRAILER.pack(HEADER.size, 0, MAGIC))
+
+    def __enter__(self) -> "ArchiveWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write_string(self, value: Optional[str]) -> int:
+        if value is None:
+            return NULL_REF
+        if len(value) < SHARED_STRING_MAX_LEN and value in self.strings:
+            return self.strings[value]
+
+        data = value.encode("utf-8")
+        offset = self.f.tell()
+        self.f.write(STRING_LEN.pack(len(data)))
+        self.f.write(data)
+        if len(value) < SHARED_STRING_MAX_LEN:
+            self.strings[value] = offset
+        return offset
+
+    def append(self, event: dm.Event):
+        """It appends event (replaces previous record of the same id in index)"""
+        with profiling.stage(profiling.EXPORT):
+            self.write_event(event)
+
+    def write_event(self, event: dm.Event):
+        if event.id is None:
+            raise ValueError(f"Event without id: {event}")
+
+        # strings are written before the record that refers to them
+        refs = [self.write_string(get_path(event, c)) for c in STRING_COLUMNS]
+        refs += [self.write_string(encode_tags(getattr(event, c))) for c in TAG_COLUMNS]
+
+        flags = 0
+        for i, c in enumerate(BOOL_COLUMNS):
+            value = getattr(event, c)
+            if value is not None:
+                flags |= (2 if value else 1) << (i * 2)
+
+        values = (
+            [encode_datetime(getattr(event, c)) for c in DATETIME_COLUMNS]
+            + [encode_float(get_path(event, c)) for c in FLOAT_COLUMNS]
+            + [flags]
+            + refs
+        )
+        offset = self.f.tell()
+        self.f.write(RECORD.pack(*values))
+        self.index[str(event.id)] = (refs[0], offset)
+
+    def extend(self, events):
+        for event in events:
+            self.append(event)
+
+    def close(self):
+        if self.f.closed:
+            return
+        index_offset = self.f.tell()
+        for event_id in sorted(self.index):
+            self.f.write(INDEX_ENTRY.pack(*self.index[event_id]))
+        self.f.write(TRAILER.pack(index_offset, len(self.index), MAGIC))
+        self.f.close()
+
+
+def find_trailer(mm: mmap.mmap) -> Optional[Tuple[int, int, int]]:
+    """
+    It returns (index offset, number of index entries, end offset) of the last
+    valid trailer of the archive (None if there is no trailer)
+    """
+    end = len(mm)
+    while end >= HEADER.size + TRAILER.size:
+        if mm[end - len(MAGIC) : end] == MAGIC:
+            index_offset, n_events, _ = TRAILER.unpack_from(mm, end - TRAILER.size)
+            # index is right before the trailer
+            index_end = index_offset + n_events * INDEX_ENTRY.size
+            if HEADER.size <= index_offset and index_end == end - TRAILER.size:
+                return index_offset, n_events, end
+        # strings may contain magic, so candidates are checked from the end
+        end = mm.rfind(MAGIC, HEADER.size, end - 1)
+        if end < 0:
+            return None
+        end += len(MAGIC)
+    return None
+
+
+class ArchiveReader:
+    """
+    It reads the archive using memory mapping: only requested events (or
+    columns) are decoded
+
+    Args:
+      fpath (str): path to the archive
+    """
+
+    def __init__(self, fpath: str):
+        self.fpath = fpath
+        self.f = open(fpath, "rb")
+        self.mm = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not an event archive: {fpath}")
+        if version != VERSION:
+            raise ValueError(f"Unsupported archive version: {version}")
+        trailer = find_trailer(self.mm)
+        if trailer is None:
+            raise ValueError(f"Archive is not closed properly: {fpath}")
+        self.index_offset, self.n_events, end = trailer
+        if end != len(self.mm):
+            log.warning(
+                f"Archive {fpath} was not closed properly: "
+                f"{len(self.mm) - end} bytes after the last index are ignored"
+            )
+
+    def __enter__(self) -> "ArchiveReader":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.mm.close()
+        self.f.close()
+
+    def __len__(self) -> int:
+        return self.n_events
+
+    def __contains__(self, event_id: str) -> bool:
+        return self.find(event_id) is not None
+
+    def __iter__(self) -> Iterator[dm.Event]:
+        """It iterates over events sorted by id"""
+        for _, _, record_offset in self.index_entries():
+            yield self.read_event(record_offset)
+
+    def read_string(self, offset: int) -> Optional[str]:
+        if offset == NULL_REF:
+            return None
+        (length,) = STRING_LEN.unpack_from(self.mm, offset)
+        start = offset + STRING_LEN.size
+        return self.mm[start : start + length].decode("utf-8")
+
+    def index_entry(self, i: int) -> Tuple[int, int]:
+        return INDEX_ENTRY.unpack_from(
+            self.mm, self.index_offset + i * INDEX_ENTRY.size
+        )
+
+    def index_entries(self) -> Iterator[Tuple[str, int, int]]:
+        """It iterates over (event id, id string offset, record offset) by id"""
+        for i in range(self.n_events):
+            id_offset, record_offset = self.index_entry(i)
+            yield self.read_string(id_offset), id_offset, record_offset
+
+    def ids(self) -> Iterator[str]:
+        for event_id, _, _ in self.index_entries():
+            yield event_id
+
+    def find(self, event_id: str) -> Optional[int]:
+        """It returns offset of the event record (binary search in index)"""
+        event_id = str(event_id)
+        lo, hi = 0, self.n_events
+        while lo < hi:
+            mid = (lo + hi) // 2
+            id_offset, record_offset = self.index_entry(mid)
+            value = self.read_string(id_offset)
+            if value == event_id:
+                return record_offset
+            if value < event_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def get(self, event_id: str) -> Optional[dm.Event]:
+        """It returns event by id (or None)"""
+        offset = self.find(event_id)
+        return None if offset is None else self.read_event(offset)
+
+    def column(self, name: str) -> Iterator[Tuple[str, Any]]:
+        """
+        It iterates over (event id, value) of a single column, sorted by id
+
+        Args:
+          name (str): column name, e.g. "start_datetime" or
+            "primary_venue.address.latitude" (see `COLUMNS`)
+        """
+        if name not in COLUMN_LAYOUT or name == "flags":
+            raise KeyError(f"Unknown column: {name}")
+        _, offset, fmt = COLUMN_LAYOUT[name]
+        decode = self.column_decoder(name)
+        for event_id, _, record_offset in self.index_entries():
+            (value,) = struct.unpack_from("<" + fmt, self.mm, record_offset + offset)
+            yield event_id, decode(value)
+
+    def column_decoder(self, name: str):
+        if name in DATETIME_COLUMNS:
+            return decode_datetime
+        if name in FLOAT_COLUMNS:
+            return decode_float
+        if name in TAG_COLUMNS:
+            return lambda v: decode_tags(self.read_string(v))
+        return self.read_string
+
+    def read_event(self, offset: int) -> dm.Event:
+        values = RECORD.unpack_from(self.mm, offset)
+        data: Dict[str, Any] = {}
+        for name, value in zip(COLUMNS, values):
+            if name == "flags":
+                for i, c in enumerate(BOOL_COLUMNS):
+                    bits = (value >> (i * 2)) & 3
+                    data[c] = None if bits == 0 else bits == 2
+                continue
+            data[name] = self.column_decoder(name)(value)
+        return build_event(data)
+
+
+def build_event(data: Dict[str, Any]) -> dm.Event:
+    """It builds Event from flat dictionary of archive columns"""
+    nested: Dict[str, Dict[str, Any]] = {"": {}, "v": {}, "a": {}, "i": {}, "o": {}}
+    prefixes: List[Tuple[str, str]] = [
+        ("primary_venue.address.", "a"),
+        ("primary_venue.", "v"),
+        ("image.", "i"),
+        ("organizer.", "o"),
+    ]
+    for k, v in data.items():
+        for prefix, group in prefixes:
+            if k.startswith(prefix):
+                nested[group][k[len(prefix) :]] = v
+                break
+        else:
+            nested[""][k] = v
+
+    fingerprint = nested[""].pop("fingerprint", None)
+    event = dm.Event(
+        **nested[""],
+        primary_venue=dm.Venue(**nested["v"], address=dm.Address(**nested["a"])),
+        image=dm.Image(**nested["i"]),
+        # NOTE: events without organizer (e.g. search results) keep None
+        organizer=(
+            dm.Organizer(**nested["o"])
+            if any(v is not None for v in nested["o"].values())
+            else None
+        ),
+    )
+    event.fingerprint = fingerprint
+    return event
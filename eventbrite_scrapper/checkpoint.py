@@ -0,0 +1,79 @@
+"""Storages of search cursors used to resume long-running crawls"""
+from typing import Dict, Optional
+import hashlib
+import json
+import logging
+import os
+
+from . import data_models as dm
+
+log = logging.getLogger(__name__)
+
+
+class CheckpointStore:
+    """Base class of checkpoint storages. Cursors are stored by `cursor.key`"""
+
+    def load(self, key: str) -> Optional[dm.SearchCursor]:
+        raise NotImplementedError
+
+    def save(self, cursor: dm.SearchCursor):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+
+class MemoryCheckpointStore(CheckpointStore):
+    """Keeps checkpoints in memory (e.g. to resume after network errors)"""
+
+    def __init__(self):
+        self.data: Dict[str, dict] = {}
+
+    def load(self, key: str) -> Optional[dm.SearchCursor]:
+        data = self.data.get(key)
+        return dm.SearchCursor.from_dict(data) if data else None
+
+    def save(self, cursor: dm.SearchCursor):
+        self.data[cursor.key] = cursor.as_dict()
+
+    def delete(self, key: str):
+        self.data.pop(key, None)
+
+
+class FileCheckpointStore(CheckpointStore):
+    """
+    Keeps checkpoints as JSON files (one file per search query) in directory
+
+    Args:
+      dpath (str): path to directory with checkpoints. Created if not exists
+    """
+
+    def __init__(self, dpath: str):
+        self.dpath = dpath
+        os.makedirs(dpath, exist_ok=True)
+
+    def fpath(self, key: str) -> str:
+        name = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.dpath, f"{name}.json")
+
+    def load(self, key: str) -> Optional[dm.SearchCursor]:
+        try:
+            with open(self.fpath(key), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        return dm.SearchCursor.from_dict(data)
+
+    def save(self, cursor: dm.SearchCursor):
+        fpath = self.fpath(cursor.key)
+        # write & rename, so checkpoint is never left half-written
+        with open(f"{fpath}.tmp", "w", encoding="utf-8") as f:
+            json.dump(cursor.as_dict(), f)
+        os.replace(f"{fpath}.tmp", fpath)
+        log.debug(f"checkpoint saved: {fpath} ({cursor.pages_done} pages)")
+
+    def delete(self, key: str):
+        try:
+            os.remove(self.fpath(key))
+        except FileNotFoundError:
+            pass
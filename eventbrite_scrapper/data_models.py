@@ -1,7 +1,10 @@
-from typing import Optional, Tuple, Union
+from typing import Optional, Tuple, Union, Dict, Any
 from dataclasses import dataclass, field, asdict
 import copy
 import datetime
+import json
+
+from . import profiling
 
 
 @dataclass
@@ -58,6 +61,26 @@ class EventFormat:
     TOUR = D("EventbriteFormat/16", "tours")
 
 
+class SearchExpand:
+    """Profiles of `expand.destination_event` requested from the search API"""
+
+    # only what is required to build `Event`
+    MINIMAL = ("primary_venue",)
+    # everything used by `serialize_event_search_result`
+    DEFAULT = ("primary_venue", "image")
+    # everything eventbrite.com requests itself (kept in `raw_search_data`).
+    # Used by default
+    FULL = (
+        "primary_venue",
+        "image",
+        "ticket_availability",
+        "saves",
+        "event_sales_status",
+        "primary_organizer",
+        "public_collections",
+    )
+
+
 @dataclass
 class EventTag:
     id: str
@@ -97,6 +120,18 @@ class Venue:
     organization_website: str = field(default=None, repr=False)
 
 
+@dataclass
+class Organizer:
+    id: str = field(default=None, repr=False)
+    name: str = field(default=None, repr=False)
+    description: str = field(default=None, repr=False)
+
+    url: str = field(default=None, repr=False)
+    twitter_handler: str = field(default=None, repr=False)
+    facebook_handler: str = field(default=None, repr=False)
+    organization_website: str = field(default=None, repr=False)
+
+
 @dataclass
 class Image:
     id: str = field(default=None, repr=False)
@@ -141,25 +176,96 @@ class Event:
 
     image: Image = field(default_factory=Image, repr=False)
 
+    # available only on event profile (see `EventProfile.load`)
+    organizer: Optional[Organizer] = field(default=None, repr=False)
+
+    # content hash computed at serialization (see `serialization.event_fingerprint`).
+    # NOTE: it is not copied by `dataclasses.replace`, as the copy may differ
+    fingerprint: Optional[str] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    # MinHash signature computed at serialization if requested (see
+    # `duplicates.event_minhash`). Not copied by `dataclasses.replace` either
+    minhash: Optional[bytes] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
     raw_search_data: Optional[dict] = field(default=None, repr=False)
     raw_profile_data: Optional[dict] = field(default=None, repr=False)
 
     def as_dict(self, flatten: bool = False) -> dict:
-        output = {
-            k: v
-            for k, v in asdict(self).items()
-            if k not in ("raw_search_data", "raw_profile_data")
-        }
-
-        if flatten:
-            output = flatten_dict(output)
+        with profiling.stage(profiling.EXPORT):
+            # NOTE: hashes are not exported, so the export schema is unchanged
+            excluded = ("raw_search_data", "raw_profile_data", "fingerprint", "minhash")
+            output = {k: v for k, v in asdict(self).items() if k not in excluded}
+
+            if flatten:
+                output = flatten_dict(output)
+                output["raw_search_data"] = copy.deepcopy(self.raw_search_data)
+                output["raw_profile_data"] = copy.deepcopy(self.raw_profile_data)
+                return output
+
             output["raw_search_data"] = copy.deepcopy(self.raw_search_data)
             output["raw_profile_data"] = copy.deepcopy(self.raw_profile_data)
             return output
 
-        output["raw_search_data"] = copy.deepcopy(self.raw_search_data)
-        output["raw_profile_data"] = copy.deepcopy(self.raw_profile_data)
-        return output
+
+@dataclass
+class SearchCursor:
+    """State of the search crawl. It is used to resume `results_iter`"""
+
+    # normalized search parameters (see `EventSearch.results_iter`)
+    query: Dict[str, Any]
+
+    # obtained from the 1st page (required to use API)
+    csrf_token: Optional[str] = None
+    place_id: Optional[str] = None
+    referer_url: Optional[str] = None
+    timezone: Optional[str] = None
+    cookies: Dict[str, str] = field(default_factory=dict, repr=False)
+
+    # progress
+    offset: int = 0
+    pages_done: int = 0
+    # number of the last processed API page (0 - none)
+    api_page: int = 0
+    object_count: Optional[int] = None
+    finished: bool = False
+
+    @property
+    def key(self) -> str:
+        return search_query_key(self.query)
+
+    def advance(self, n_events: int, api_page: int = None):
+        """
+        It moves cursor after the page with `n_events` events was processed
+        (`api_page` - number of the page if it was loaded from API)
+        """
+        self.offset += n_events
+        self.pages_done += 1
+        if api_page is not None:
+            self.api_page = api_page
+        if self.object_count is not None and self.offset >= self.object_count:
+            self.finished = True
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SearchCursor":
+        query = dict(data["query"])
+        for k in ("category", "event_format"):
+            if query.get(k):
+                query[k] = D(**query[k])
+        return cls(**{**data, "query": query})
+
+
+def search_query_key(query: Dict[str, Any]) -> str:
+    """It returns stable string identifying search query"""
+    return json.dumps(
+        {k: asdict(v) if isinstance(v, D) else v for k, v in query.items()},
+        sort_keys=True,
+    )
 
 
 def flatten_dict(d: dict, sep: str = ".", pkey: str = "") -> dict:
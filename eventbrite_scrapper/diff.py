@@ -0,0 +1,164 @@
+"""Changes between two snapshots of events
+
+Events are matched by `id` and compared by content fields (see
+`serialization.event_content`); changed fields are reported as dotted paths
+(e.g. "primary_venue.address.city").
+
+- `diff_sorted` streams snapshots sorted by id (e.g. `ArchiveReader`) in
+  constant memory
+- `diff_events` accepts snapshots in any order and keeps field digests of the
+  old snapshot in memory
+"""
+
+from typing import Dict, Iterable, Iterator, Optional, Sequence, Tuple
+from dataclasses import dataclass, field
+import logging
+
+from . import data_models as dm
+from .serialization import (
+    CONTENT_PATHS,
+    event_content,
+    event_field_digests,
+)
+
+log = logging.getLogger(__name__)
+
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+
+# size of field digests kept by `diff_events`
+DIGEST_SIZE = 8
+
+
+@dataclass
+class EventChange:
+    kind: str  # ADDED, REMOVED or CHANGED
+    id: str
+    # dotted paths of changed fields (only for CHANGED)
+    fields: Tuple[str, ...] = ()
+    old: Optional[dm.Event] = field(default=None, repr=False)
+    new: Optional[dm.Event] = field(default=None, repr=False)
+
+
+def changed_fields(
+    old: dm.Event, new: dm.Event, fields: Optional[Sequence[str]] = None
+) -> Tuple[str, ...]:
+    """
+    It returns dotted paths of fields that are different in `old` and `new`
+
+    Args:
+      old (Event): previous version of the event
+      new (Event): current version of the event
+      fields (Sequence[str]): paths to compare (see `CONTENT_PATHS`).
+        Defaults to None (all content fields)
+    """
+    # NOTE: stored `Event.fingerprint` is not used, as it is stale if the event
+    # was modified in place after serialization
+    return tuple(
+        path
+        for (path, a), (_, b) in zip(event_content(old), event_content(new))
+        if a != b and (fields is None or path in fields)
+    )
+
+
+def diff_sorted(
+    old: Iterable[dm.Event],
+    new: Iterable[dm.Event],
+    fields: Optional[Sequence[str]] = None,
+) -> Iterator[EventChange]:
+    """
+    It yields changes between two snapshots sorted by id (as strings) using
+    merge join, so only one event of every snapshot is kept in memory
+
+    Args:
+      old (Iterable[Event]): previous snapshot sorted by id
+      new (Iterable[Event]): current snapshot sorted by id
+      fields (Sequence[str]): paths to compare (see `CONTENT_PATHS`).
+        Defaults to None (all content fields)
+
+    Raises:
+      ValueError: if snapshot is not sorted or has duplicated ids
+    """
+    check_fields(fields)
+    old_events = iter_sorted(old, "old")
+    new_events = iter_sorted(new, "new")
+    o = next(old_events, None)
+    n = next(new_events, None)
+    while o is not None or n is not None:
+        if n is None or (o is not None and str(o.id) < str(n.id)):
+            yield EventChange(REMOVED, o.id, old=o)
+            o = next(old_events, None)
+        elif o is None or str(n.id) < str(o.id):
+            yield EventChange(ADDED, n.id, new=n)
+            n = next(new_events, None)
+        else:
+            changed = changed_fields(o, n, fields)
+            if changed:
+                yield EventChange(CHANGED, n.id, changed, old=o, new=n)
+            o = next(old_events, None)
+            n = next(new_events, None)
+
+
+def diff_events(
+    old: Iterable[dm.Event],
+    new: Iterable[dm.Event],
+    fields: Optional[Sequence[str]] = None,
+) -> Iterator[EventChange]:
+    """
+    It yields changes between two snapshots in any order. Only field digests
+    of `old` are kept in memory, so `EventChange.old` is not set. Added and
+    changed events are yielded while `new` is consumed, removed - at the end
+
+    Args:
+      old (Iterable[Event]): previous snapshot
+      new (Iterable[Event]): current snapshot
+      fields (Sequence[str]): paths to compare (see `CONTENT_PATHS`).
+        Defaults to None (all content fields)
+    """
+    check_fields(fields)
+    digests: Dict[str, bytes] = {}
+    for event in old:
+        digests[str(event.id)] = event_field_digests(event, DIGEST_SIZE)
+
+    for event in new:
+        old_digests = digests.pop(str(event.id), None)
+        if old_digests is None:
+            yield EventChange(ADDED, event.id, new=event)
+            continue
+        new_digests = event_field_digests(event, DIGEST_SIZE)
+        if old_digests == new_digests:
+            continue
+        changed = tuple(
+            path
+            for i, path in enumerate(CONTENT_PATHS)
+            if old_digests[i * DIGEST_SIZE : (i + 1) * DIGEST_SIZE]
+            != new_digests[i * DIGEST_SIZE : (i + 1) * DIGEST_SIZE]
+            and (fields is None or path in fields)
+        )
+        if changed:
+            yield EventChange(CHANGED, event.id, changed, new=event)
+
+    for event_id in digests:
+        yield EventChange(REMOVED, event_id)
+
+
+def iter_sorted(events: Iterable[dm.Event], name: str) -> Iterator[dm.Event]:
+    """It yields events and checks that they are sorted by id"""
+    prev = None
+    for event in events:
+        event_id = str(event.id)
+        if prev is not None and event_id <= prev:
+            raise ValueError(
+                f"{name} snapshot is not sorted by id: {event_id} after {prev}"
+            )
+        prev = event_id
+        yield event
+
+
+def check_fields(fields: Optional[Sequence[str]]):
+    if fields is None:
+        return
+    unknown = set(fields).difference(CONTENT_PATHS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {sorted(unknown)}")
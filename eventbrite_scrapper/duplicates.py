@@ -0,0 +1,211 @@
+"""Near-duplicate detection of events (MinHash signatures and LSH banding)
+
+The same event is often listed under different ids (relistings, dates of a
+series) with slightly different names and descriptions. Events get `minhash`
+signature at serialization if the client is created with `signatures=True`
+(otherwise it is computed by `DuplicateDetector.add`): shingles of its name,
+description and venue are hashed into `NUM_PERM` slots (one permutation hashing with
+densification), so the share of equal slots of two signatures estimates
+Jaccard similarity of their shingles.
+
+`DuplicateDetector` splits signatures into bands. Events with an equal band
+are candidates, every candidate is compared with the first event of the band
+bucket only, and similar events are joined with union-find. So detection is
+linear in number of events (~1.6 KB of memory per event).
+
+Example:
+    detector = DuplicateDetector(threshold=0.7)
+    for events in client.search_events.results_iter(**params):
+        detector.add_many(events)
+    detector.clusters()  # [["555555555555", "666666666666"], ...]
+"""
+
+from typing import Dict, Iterable, List, Optional, Set
+from array import array
+import struct
+import zlib
+
+from . import data_models as dm
+from .text import html_to_text, tokenize
+
+NUM_PERM = 64
+SIGNATURE = struct.Struct(f"<{NUM_PERM}I")
+EMPTY = 0xFFFFFFFF
+# hash of the shingle: top bits are the slot, next 32 bits are the value
+MIX = 0x9E3779B97F4A7C15
+SLOT_SHIFT = 64 - (NUM_PERM - 1).bit_length()
+# tokens of the description used for shingles
+MAX_DESCRIPTION_TOKENS = 200
+SHINGLE_SIZE = 2
+
+
+def event_shingles(event: dm.Event) -> Set[str]:
+    """
+    It returns shingles of the event: word pairs of the name and description
+    (summary, or text of the long description if summary is missing) and
+    normalized venue name and address
+    """
+    description = event.short_description
+    if not description and event.long_description:
+        description = html_to_text(event.long_description)
+
+    shingles = set()
+    texts = (
+        ("n", tokenize(event.name)),
+        ("d", tokenize(description)[:MAX_DESCRIPTION_TOKENS]),
+    )
+    for prefix, tokens in texts:
+        if len(tokens) < SHINGLE_SIZE:
+            shingles.update(f"{prefix}:{t}" for t in tokens)
+            continue
+        for i in range(len(tokens) - SHINGLE_SIZE + 1):
+            shingles.add(f"{prefix}:" + " ".join(tokens[i : i + SHINGLE_SIZE]))
+
+    venue = event.primary_venue
+    if isinstance(venue, dm.Venue):
+        values = [venue.name]
+        if isinstance(venue.address, dm.Address):
+            address = venue.address
+            values.extend((address.address_1, address.city, address.postal_code))
+        for value in values:
+            if value:
+                shingles.add("v:" + " ".join(tokenize(value)))
+    return shingles
+
+
+def minhash_signature(shingles: Iterable[str]) -> Optional[bytes]:
+    """
+    It returns MinHash signature (`NUM_PERM` 32-bit slots) of shingles or None
+    if there are no shingles
+    """
+    slots = [EMPTY] * NUM_PERM
+    for h in map(zlib.crc32, map(str.encode, shingles)):
+        # CRC is linear, so it is mixed by multiplication (high bits are used)
+        h = (h * MIX) & 0xFFFFFFFFFFFFFFFF
+        slot = h >> SLOT_SHIFT
+        value = (h >> 16) & EMPTY
+        if value < slots[slot]:
+            slots[slot] = value
+
+    filled = [i for i, v in enumerate(slots) if v != EMPTY]
+    if not filled:
+        return None
+    if len(filled) < NUM_PERM:
+        # empty slot borrows value of the next filled slot (densification), so
+        # signatures of similar sets still agree in empty slots
+        previous = filled[-1] - NUM_PERM
+        for filled_slot in filled:
+            value = slots[filled_slot]
+            # NOTE: negative slots are the empty slots at the end (wrapped)
+            for slot in range(previous + 1, filled_slot):
+                slots[slot] = (value + (filled_slot - slot) * 0x9E3779B1) % EMPTY
+            previous = filled_slot
+    return SIGNATURE.pack(*slots)
+
+
+def event_minhash(event: dm.Event) -> Optional[bytes]:
+    return minhash_signature(event_shingles(event))
+
+
+def similarity(signature1: bytes, signature2: bytes) -> float:
+    """It returns estimated Jaccard similarity of two signatures"""
+    slots1, slots2 = array("I", signature1), array("I", signature2)
+    return sum(a == b for a, b in zip(slots1, slots2)) / NUM_PERM
+
+
+class DuplicateDetector:
+    """
+    Args:
+      threshold (float): minimum estimated Jaccard similarity of duplicates.
+        Defaults to 0.7
+      bands (int): number of LSH bands (`NUM_PERM` must be divisible by it).
+        More bands find more candidates (pairs with similarity `threshold` are
+        found with probability 1 - (1 - threshold ** (NUM_PERM / bands)) **
+        bands, ~0.99 for defaults). Defaults to 16
+    """
+
+    def __init__(self, threshold: float = 0.7, bands: int = 16):
+        if NUM_PERM % bands:
+            raise ValueError(f"{NUM_PERM} slots could not be split into {bands} bands")
+        self.threshold = threshold
+        self.band_size = SIGNATURE.size // bands
+
+        self.ids: List[str] = []
+        self.positions: Dict[str, int] = {}
+        self.signatures: List[bytes] = []
+        self.parents: List[int] = []
+        # band value -> position of the first event with it
+        self.buckets: List[Dict[bytes, int]] = [{} for _ in range(bands)]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, event: dm.Event):
+        """It adds the event (signature is computed if `minhash` is missing)"""
+        signature = event.minhash
+        if signature is None:
+            signature = event_minhash(event)
+        self.add_signature(str(event.id), signature)
+
+    def add_many(self, events: Iterable[dm.Event]):
+        for event in events:
+            self.add(event)
+
+    def add_signature(self, id: str, signature: Optional[bytes]):
+        """It adds signature of the event (the same id is added once)"""
+        if signature is None or id in self.positions:
+            return
+        n = len(self.ids)
+        self.ids.append(id)
+        self.positions[id] = n
+        self.signatures.append(signature)
+        self.parents.append(n)
+
+        size = self.band_size
+        for band, bucket in enumerate(self.buckets):
+            first = bucket.setdefault(signature[band * size : (band + 1) * size], n)
+            if first == n or self.find(first) == self.find(n):
+                continue
+            if similarity(self.signatures[first], signature) >= self.threshold:
+                self.union(first, n)
+
+    def find(self, n: int) -> int:
+        parents = self.parents
+        while parents[n] != n:
+            parents[n] = parents[parents[n]]
+            n = parents[n]
+        return n
+
+    def union(self, n1: int, n2: int):
+        root1, root2 = self.find(n1), self.find(n2)
+        if root1 != root2:
+            # the earliest event is the root
+            self.parents[max(root1, root2)] = min(root1, root2)
+
+    def clusters(self) -> List[List[str]]:
+        """It returns ids of duplicates (clusters of 2+ events, ids in order
+        of addition)"""
+        clusters: Dict[int, List[str]] = {}
+        for n, id in enumerate(self.ids):
+            clusters.setdefault(self.find(n), []).append(id)
+        return [ids for ids in clusters.values() if len(ids) > 1]
+
+    def duplicates_of(self, id: str) -> List[str]:
+        """It returns ids of other events of the cluster of the event"""
+        n = self.positions.get(str(id))
+        if n is None:
+            return []
+        root = self.find(n)
+        return [
+            other for i, other in enumerate(self.ids) if i != n and self.find(i) == root
+        ]
+
+
+def find_duplicates(
+    events: Iterable[dm.Event], threshold: float = 0.7, bands: int = 16
+) -> List[List[str]]:
+    """It returns clusters of ids of near-duplicate events (see
+    `DuplicateDetector`)"""
+    detector = DuplicateDetector(threshold=threshold, bands=bands)
+    detector.add_many(events)
+    return detector.clusters()
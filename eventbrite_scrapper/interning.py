@@ -0,0 +1,128 @@
+"""Sharing of identical venues, addresses and tags between events
+
+Events of recurring series and big venues have identical `Venue`, `Address`
+and `EventTag` objects. `Interner` keeps one instance per content, so events
+serialized with the same interner refer to the same objects.
+
+NOTE: interned objects are shared, so they must not be modified in place (use
+`dataclasses.replace`, as `merge_events` does).
+"""
+
+from typing import Any, Dict, Hashable, Optional, Tuple
+import dataclasses
+import threading
+
+from . import data_models as dm
+
+ADDRESS_FIELDS = tuple(f.name for f in dataclasses.fields(dm.Address))
+VENUE_FIELDS = tuple(
+    f.name for f in dataclasses.fields(dm.Venue) if f.name != "address"
+)
+
+
+class Interner:
+    """
+    It returns a single instance of `Venue`, `Address` and `EventTag` per
+    content. Use one interner per client or per crawl (see `clear`)
+    """
+
+    def __init__(self):
+        self.tags: Dict[Hashable, dm.EventTag] = {}
+        self.addresses: Dict[Hashable, dm.Address] = {}
+        self.venues: Dict[Hashable, dm.Venue] = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.tags) + len(self.addresses) + len(self.venues)
+
+    def clear(self):
+        with self.lock:
+            self.tags.clear()
+            self.addresses.clear()
+            self.venues.clear()
+
+    def get(self, cache: Dict[Hashable, Any], key: Hashable, factory, fields: dict):
+        """It returns cached object of `key` or creates it with `factory(**fields)`"""
+        obj = cache.get(key)
+        if obj is not None:
+            self.hits += 1
+            return obj
+        with self.lock:
+            # the same object could be created by another thread meanwhile
+            obj = cache.get(key)
+            if obj is None:
+                self.misses += 1
+                obj = cache[key] = factory(**fields)
+            return obj
+
+    # NOTE: the hit paths below are inlined (no key building helpers, lambdas
+    #   or method calls), as they run for every event of the search
+
+    def tag(self, id: str, text: str) -> dm.EventTag:
+        obj = self.tags.get((id, text))
+        if obj is None:
+            return self.get(
+                self.tags, (id, text), dm.EventTag, {"id": id, "text": text}
+            )
+        self.hits += 1
+        return obj
+
+    def address(self, **fields) -> dm.Address:
+        key = tuple(map(fields.get, ADDRESS_FIELDS))
+        obj = self.addresses.get(key)
+        if obj is None:
+            return self.get(self.addresses, key, dm.Address, fields)
+        self.hits += 1
+        return obj
+
+    def venue(self, address: Optional[dm.Address] = None, **fields) -> dm.Venue:
+        """It returns venue (`address` must be interned by the same interner)"""
+        # NOTE: interned addresses are unique by content, so identity is enough
+        key = (id(address), *map(fields.get, VENUE_FIELDS))
+        obj = self.venues.get(key)
+        if obj is None:
+            fields["address"] = address
+            return self.get(self.venues, key, dm.Venue, fields)
+        self.hits += 1
+        return obj
+
+    def tags_tuple(self, tags: Optional[Tuple[dm.EventTag]]):
+        if tags is None:
+            return None
+        return tuple(self.tag(t.id, t.text) for t in tags)
+
+    def event(self, event: dm.Event) -> dm.Event:
+        """
+        It returns event that refers to interned venue, address and tags (e.g.
+        for events serialized in another process)
+        """
+        venue = event.primary_venue
+        if isinstance(venue, dm.Venue):
+            address = venue.address
+            if isinstance(address, dm.Address):
+                address = self.address(**dataclasses.asdict(address))
+            venue = self.venue(
+                address=address, **{k: getattr(venue, k) for k in VENUE_FIELDS}
+            )
+        interned = dataclasses.replace(
+            event,
+            primary_venue=venue,
+            tags_categories=self.tags_tuple(event.tags_categories),
+            tags_formats=self.tags_tuple(event.tags_formats),
+            tags_by_organizer=self.tags_tuple(event.tags_by_organizer),
+        )
+        # content is the same, so the fingerprint and signature are still valid
+        interned.fingerprint = event.fingerprint
+        interned.minhash = event.minhash
+        return interned
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "tags": len(self.tags),
+            "addresses": len(self.addresses),
+            "venues": len(self.venues),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
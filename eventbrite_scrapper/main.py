@@ -1,19 +1,42 @@
-from typing import Iterator, Union, List, Dict, Literal
+from typing import (
+    Iterator,
+    Iterable,
+    Union,
+    List,
+    Dict,
+    Literal,
+    Callable,
+    Any,
+    Sequence,
+    Tuple,
+    Optional,
+)
+from collections import deque
 import json
-import re
 import logging
 import datetime
+import threading
 from urllib.parse import quote as url_encode
 
 from . import data_models as dm
 from . import utils
-from .serialization import serialize_event_search_result, serialize_event_profile
-
-import requests
-import lxml.html
+from . import parsing
+from . import profiling
+from .checkpoint import CheckpointStore
+from .interning import Interner
+from .profiling import Profiler
+from .transport import Transport, RequestsTransport
+from .serialization import check_event_fields, merge_events, PROFILE_FIELDS
+
+# heavy dependencies are imported on first use
+requests = utils.lazy_import("requests")
+cf = utils.lazy_import("concurrent.futures")
 
 log = logging.getLogger(__name__)
 
+# number of events of the search page (defined by eventbrite.com)
+SEARCH_PAGE_SIZE = 20
+
 DEFAULT_HEADERS = {
     "Accept-Encoding": "gzip, deflate, br",
     "Accept-Language": "en-US,en;q=0.9",
@@ -43,14 +66,122 @@ class Eventbrite:
 
     def __init__(
         self,
-        session: requests.Session = None,
+        session: "requests.Session" = None,
         headers: Dict[str, str] = None,
+        parse_executor: "cf.Executor" = None,
+        stream_pages: bool = False,
+        interner: Interner = None,
+        transport: Transport = None,
+        profiler: Profiler = None,
+        signatures: bool = False,
     ):
-        self.session = session if session else requests.Session()
+        """
+        Initiate Eventbrite client
+
+        Args:
+          session (requests.Session): session used for all requests
+          headers (Dict[str, str]): default headers
+          parse_executor (Executor): optional executor (e.g. ProcessPoolExecutor)
+            used to parse raw responses. When given, fetching threads only wait
+            for the parsed results, so parsing can scale with CPU cores.
+            Defaults to None (parse in the calling thread)
+          stream_pages (bool): If True, HTML pages are streamed and connection is
+            closed as soon as data required for parsing is downloaded.
+            Defaults to False
+          interner (Interner): if given, identical venues, addresses and tags of
+            search results share the same objects (e.g. recurring events). Use
+            a new interner for every crawl to release them. Defaults to None
+          transport (Transport): transport of all requests (e.g.
+            `HTTP2Transport`). Defaults to None (`RequestsTransport` of `session`)
+          profiler (Profiler): if given, it is started and profiles fetch, parse,
+            serialize and export stages (see `Profiler.write_report`).
+            Defaults to None
+          signatures (bool): if True, events get `minhash` signatures at
+            serialization (see `duplicates.DuplicateDetector`). Defaults to False
+        """
+        if transport is None:
+            transport = RequestsTransport(session if session else requests.Session())
+        self.transport = transport
+        # NOTE: None for transports not based on `requests`
+        self.session = getattr(transport, "session", None)
         self.headers = headers if headers else DEFAULT_HEADERS
+        self.parse_executor = parse_executor
+        self.stream_pages = stream_pages
+        self.interner = interner
+        self.signatures = signatures
 
         self.waiter = utils.WaitManager()
         self.delay_between_fetches = (0.2, 1)
+        # concurrent identical requests share one fetch (see `fetch_once`)
+        self.single_flight = utils.SingleFlight()
+
+        self.profiler = profiler
+        if profiler is not None:
+            profiler.start()
+
+    def parse(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        It runs parsing function `func` in `parse_executor` (if set) and waits
+        for the result
+
+        Args:
+          func (Callable[..., Any]): module level function from `parsing`
+          *args: positional arguments (must be picklable for process pool)
+          **kwargs: keyword arguments (must be picklable for process pool)
+
+        Returns:
+          Result of `func`
+        """
+        with profiling.stage(profiling.PARSE):
+            if self.parse_executor is None:
+                return func(*args, **kwargs)
+            return self.parse_executor.submit(func, *args, **kwargs).result()
+
+    def parse_search(self, func: Callable[..., Any], content: bytes) -> Dict[str, Any]:
+        """
+        It runs search parsing function `func` (see `parse`) with `interner` and
+        `signatures`
+
+        Args:
+          func (Callable[..., Any]): `parsing.parse_search_page` or
+            `parsing.parse_search_api`
+          content (bytes): raw response
+
+        Returns:
+          Result of `func`
+        """
+        if self.interner is None:
+            return self.parse(func, content, signatures=self.signatures)
+        if self.parse_executor is None:
+            with profiling.stage(profiling.PARSE):
+                return func(content, interner=self.interner, signatures=self.signatures)
+
+        # NOTE: interner can't be shared with worker processes, so events are
+        #   interned after parsing
+        data = self.parse(func, content, signatures=self.signatures)
+        with profiling.stage(profiling.SERIALIZE):
+            data["events"] = [self.interner.event(e) for e in data["events"]]
+        return data
+
+    def fetch_once(self, key: Tuple, fetch: Callable[[], Any]) -> Any:
+        """
+        It waits for the delay between fetches and runs `fetch`, unless the
+        request with the same `key` is already in flight: then its result is
+        shared (and no delay is spent). Results must not be modified in place
+
+        Args:
+          key (Tuple): key of the request (e.g. method and normalized URL)
+          fetch (Callable[[], Any]): function that fetches and parses response
+
+        Returns:
+          Result of `fetch`
+        """
+
+        def wait_and_fetch():
+            self.waiter.wait_if_needed(self.delay_between_fetches)
+            return fetch()
+
+        return self.single_flight.do(key, wait_and_fetch)
 
     @property
     def search_events(self) -> "EventSearch":
@@ -64,6 +195,8 @@ class Eventbrite:
 class EventSearch:
     def __init__(self, parent: "Eventbrite"):
         self.p = parent
+        # cursor of the last search (see `results_iter`)
+        self.cursor: dm.SearchCursor = None
 
     def results_iter(
         self,
@@ -74,6 +207,12 @@ class EventSearch:
         category: dm.Category = None,
         event_format: dm.EventFormat = None,
         max_pages: int = 10,
+        page_size: int = 20,
+        expand: Union[Literal["minimal", "default", "full"], Sequence[str]] = "full",
+        cursor: dm.SearchCursor = None,
+        checkpoint: CheckpointStore = None,
+        checkpoint_every: int = 1,
+        start_page: int = 1,
     ) -> Iterator[List[dm.Event]]:
         """This function iterates through the pages of the search results, and yields
            page results
@@ -87,18 +226,39 @@ class EventSearch:
           event_format (EVENT_FORMAT): event format
           max_pages (int): The maximum number of pages to iterate. Defaults to 10 pages
             Note that iterator will stop when search reached it's end
+          page_size (int): number of events per API page (2nd+ pages).
+            Defaults to 20 (same as eventbrite.com)
+          expand (Union[str, Sequence[str]]): expansions of the API results. One of
+            "minimal", "default", "full" (see `SearchExpand`) or list of expansions.
+            Defaults to "full" (the same as eventbrite.com and the search page, so
+            `raw_search_data` of all pages has the same fields)
+          cursor (SearchCursor): cursor to resume the search from (see `self.cursor`).
+            Pages yielded before are counted in `max_pages`
+          checkpoint (CheckpointStore): storage to automatically resume the search
+            from and to save the cursor to
+          checkpoint_every (int): save cursor every N pages. Defaults to 1
+          start_page (int): page to start new search from (`max_pages` is the
+            last page). Pages line up with the search page only if `page_size`
+            is `SEARCH_PAGE_SIZE`, so other sizes are rejected. Defaults to 1
 
         Yields:
             List[Event] - single page events results
+
+        Note:
+            Cursor moves to the next page when the next page is requested, so the
+            page being processed during crash will be yielded again after resume.
         """
         # NOTE: results are fetched differently for the 1st page and 2nd+
-        self.p.waiter.wait_if_needed(self.p.delay_between_fetches)
-        log_page_num = "search {}/{}"
+        expand = resolve_search_expand(expand)
+        if page_size < 1:
+            raise ValueError(f"page_size must be at least 1. Given: {page_size}")
+        if start_page > 1 and page_size != SEARCH_PAGE_SIZE:
+            raise ValueError(
+                f"start_page requires page_size={SEARCH_PAGE_SIZE}. "
+                f"Given: {page_size}"
+            )
 
-        # Page 1: Fetch
-        # (contains results in html code)
-        log.info(log_page_num.format(1, max_pages))
-        page1_url = URL.search_page(
+        query = search_query(
             region=region,
             dt_start=dt_start,
             dt_end=dt_end,
@@ -106,52 +266,286 @@ class EventSearch:
             category=category,
             event_format=event_format,
         )
-        page1_content = self.__fetch_search_page(url=page1_url)
-
-        # Page 1: Parse
-        page1_data = self.__parse_search_page(page1_content)
-        csrf_token = page1_data["csrf_token"]
-        place_id = page1_data["results"]["placeId"]
-        results = page1_data["results"]["search_data"]["events"]["results"]
-        if not results:
-            return
-        events = [serialize_event_search_result(i) for i in results]
-        yield events
+        if cursor is None and checkpoint is not None:
+            cursor = checkpoint.load(dm.search_query_key(query))
+        if cursor is None:
+            cursor = dm.SearchCursor(query=query)
+        elif cursor.query != query:
+            raise ValueError(f"Cursor is created for another query: {cursor.query}")
+        self.cursor = cursor
+
+        # resumed cursor: restore session, API tokens could be expired though
+        is_resumed = cursor.csrf_token is not None
+        if is_resumed:
+            log.info(f"resuming search from page {cursor.pages_done + 1}")
+            self.p.transport.set_cookies(cursor.cookies)
+        elif start_page > 1:
+            # 1st page is still required to obtain API tokens
+            self.__load_first_page(cursor)
+            cursor.pages_done = start_page - 1
+            cursor.offset = cursor.pages_done * page_size
+            if cursor.object_count is not None:
+                cursor.finished = cursor.offset >= cursor.object_count
 
-        if max_pages == 1:
-            return
+        log_page_num = "search {}/{}"
+        while cursor.pages_done < max_pages and not cursor.finished:
+            log.info(log_page_num.format(cursor.pages_done + 1, max_pages))
+
+            api_page = None
+            if cursor.csrf_token is None:
+                # Page 1: Fetch & Parse
+                # (contains results in html code)
+                events = self.__load_first_page(cursor)
+            else:
+                # Page 2: Fetch & Parse
+                # (pulls search results from unofficial API)
+                if cursor.api_page:
+                    api_page, skip = cursor.api_page + 1, 0
+                else:
+                    # NOTE: page 1 size is defined by eventbrite.com, so the
+                    #   first API page and number of its already seen events
+                    #   are derived from offset
+                    api_page, skip = divmod(cursor.offset, page_size)
+                    api_page += 1
+                try:
+                    events = self.__load_api_page(cursor, api_page, page_size, expand)
+                except (ValueError, KeyError):
+                    if not is_resumed:
+                        raise
+                    log.warning("search API rejected resumed cursor, refreshing")
+                    self.__load_first_page(cursor)
+                    events = self.__load_api_page(cursor, api_page, page_size, expand)
+                is_resumed = False
+
+                if events and len(events) <= skip:
+                    # short page with already seen events only
+                    cursor.api_page = api_page
+                    continue
+                events = events[skip:]
+
+            if not events:
+                cursor.finished = True
+                break
 
-        # Page 2: Fetch & Parse
-        # (pulls search results from unofficial API)
-        timezone = events[0].timezone
-        for page_n in range(1, max_pages):
-            log.info(log_page_num.format(page_n + 1, max_pages))
-            self.p.waiter.wait_if_needed(self.p.delay_between_fetches)
+            yield events
 
-            data = self.__fetch_search_api(
-                places=[place_id],
-                dt_start=dt_start,
-                dt_end=dt_end,
-                price=price,
-                category=category,
-                event_format=event_format,
-                client_timezone=timezone,
-                # additional requirements
-                referer_url=page1_url,
-                csrf_token=csrf_token,
-                page_n=page_n + 1,
+            cursor.advance(len(events), api_page)
+            if checkpoint is not None and cursor.pages_done % checkpoint_every == 0:
+                checkpoint.save(cursor)
+
+            log.debug(f"waiting for {self.p.delay_between_fetches} sec")
+
+        if checkpoint is not None:
+            checkpoint.save(cursor)
+
+    def sweep(
+        self,
+        queries: Iterable[Dict[str, Any]],
+        checkpoint: CheckpointStore = None,
+        **kwargs,
+    ) -> Iterator[Tuple[Dict[str, Any], List[dm.Event]]]:
+        """
+        It runs several searches (e.g. for multiple regions) one by one. With
+        `checkpoint`, finished searches are skipped and unfinished are resumed
+
+        Args:
+          queries (Iterable[Dict[str, Any]]): parameters of `results_iter`
+            (e.g. [{"region": ..., "dt_start": ..., "dt_end": ...}, ...])
+          checkpoint (CheckpointStore): storage of search cursors
+          **kwargs: common parameters of `results_iter` (e.g. max_pages)
+
+        Yields:
+            Tuple[dict, List[Event]] - query and single page events results
+        """
+        for query in queries:
+            params = {**kwargs, **query}
+            for events in self.results_iter(checkpoint=checkpoint, **params):
+                yield query, events
+
+    def sharded_results_iter(
+        self,
+        region: str,
+        dt_start: Union[str, datetime.datetime],
+        dt_end: Union[str, datetime.datetime],
+        price: Literal["paid", "free"] = None,
+        category: dm.Category = None,
+        event_format: dm.EventFormat = None,
+        max_results_per_shard: int = 500,
+        max_workers: int = 4,
+        max_pages_per_shard: int = 100,
+        page_size: int = 20,
+        expand: Union[Literal["minimal", "default", "full"], Sequence[str]] = "full",
+    ) -> Iterator[List[dm.Event]]:
+        """
+        It splits date range into sub-ranges (shards) and searches them concurrently
+        instead of walking deep pages of the whole date range one by one.
+        Shards with more than `max_results_per_shard` results are split in halves
+        (down to a single day). A shard that is not finished after
+        `max_pages_per_shard` pages (e.g. a single day with more results) is
+        truncated with a warning. If iteration is stopped early, running shards
+        stop after their current page.
+
+        Args:
+          region, dt_start, dt_end, price, category, event_format: see `results_iter`
+          max_results_per_shard (int): shard is split if search reports more
+            results. Defaults to 500
+          max_workers (int): number of shards searched concurrently. Requests are
+            still spaced by `delay_between_fetches`. Defaults to 4
+          max_pages_per_shard (int): `max_pages` of every shard. Defaults to 100
+          page_size (int): see `results_iter`
+          expand (Union[str, Sequence[str]]): see `results_iter`
+
+        Yields:
+            List[Event] - events of a shard that were not yielded before
+            (events are deduplicated by id across shards)
+        """
+        query = search_query(
+            region=region,
+            dt_start=dt_start,
+            dt_end=dt_end,
+            price=price,
+            category=category,
+            event_format=event_format,
+        )
+        window = (
+            datetime.datetime.strptime(query["dt_start"], "%Y-%m-%d").date(),
+            datetime.datetime.strptime(query["dt_end"], "%Y-%m-%d").date(),
+        )
+
+        # set when the caller stops iteration: running shards stop after a page
+        stop = threading.Event()
+
+        def search_shard(window: Tuple[datetime.date, datetime.date]):
+            """It returns (events, []) or ([], sub-windows) if shard is too big"""
+            if stop.is_set():
+                return [], []
+            search = EventSearch(self.p)
+            pages = search.results_iter(
+                **{
+                    **query,
+                    "dt_start": window[0].strftime("%Y-%m-%d"),
+                    "dt_end": window[1].strftime("%Y-%m-%d"),
+                },
+                max_pages=max_pages_per_shard,
+                page_size=page_size,
+                expand=expand,
             )
+            events = []
+            for page in pages:
+                count = search.cursor.object_count
+                if (
+                    not events
+                    and count is not None
+                    and count > max_results_per_shard
+                    and window[0] < window[1]
+                ):
+                    pages.close()
+                    middle = window[0] + (window[1] - window[0]) // 2
+                    log.info(f"shard {window} has {count} results, splitting")
+                    return [], [
+                        (window[0], middle),
+                        (middle + datetime.timedelta(days=1), window[1]),
+                    ]
+                events.extend(page)
+                if stop.is_set():
+                    pages.close()
+                    return [], []
+            if not search.cursor.finished:
+                # e.g. a single day with more results than `max_pages_per_shard`
+                log.warning(
+                    f"shard {window} is truncated to {len(events)} of "
+                    f"{search.cursor.object_count} results "
+                    f"(max_pages_per_shard={max_pages_per_shard})"
+                )
+            return events, []
+
+        seen = set()
+        with cf.ThreadPoolExecutor(max_workers) as executor:
+            futures = {executor.submit(search_shard, window)}
+            try:
+                while futures:
+                    done, futures = cf.wait(futures, return_when=cf.FIRST_COMPLETED)
+                    for future in done:
+                        events, sub_windows = future.result()
+                        for w in sub_windows:
+                            futures.add(executor.submit(search_shard, w))
+
+                        new_events = [e for e in events if e.id not in seen]
+                        seen.update(e.id for e in new_events)
+                        if new_events:
+                            yield new_events
+            finally:
+                # stopped early: do not start remaining shards
+                stop.set()
+                for future in futures:
+                    future.cancel()
+
+    def __load_first_page(self, cursor: dm.SearchCursor) -> List[dm.Event]:
+        """It loads the search page and fills in `cursor` with API requirements"""
+        q = cursor.query
+        page1_url = URL.search_page(
+            region=q["region"],
+            dt_start=q["dt_start"],
+            dt_end=q["dt_end"],
+            price=q["price"],
+            category=q["category"],
+            event_format=q["event_format"],
+        )
+        page1_data = self.p.fetch_once(
+            ("GET", utils.normalize_url(page1_url)),
+            lambda: self.p.parse_search(
+                parsing.parse_search_page, self.__fetch_search_page(url=page1_url)
+            ),
+        )
+        events = list(page1_data["events"])
 
-            results = data["events"]["results"]
-            if not results:
-                return
+        cursor.csrf_token = page1_data["csrf_token"]
+        cursor.place_id = page1_data["place_id"]
+        cursor.referer_url = page1_url
+        cursor.object_count = page1_data["object_count"]
+        if events and not cursor.timezone:
+            cursor.timezone = events[0].timezone
+        cursor.cookies = self.p.transport.get_cookies()
 
-            events = [serialize_event_search_result(i) for i in results]
-            yield events
+        return events
 
-            log.debug(f"waiting for {self.p.delay_between_fetches} sec")
+    def __load_api_page(
+        self,
+        cursor: dm.SearchCursor,
+        page_n: int,
+        page_size: int,
+        expand: Sequence[str],
+    ) -> List[dm.Event]:
+        """It loads events of API page `page_n` (counted from 1)"""
+        q = cursor.query
+        url, payload, headers = self.__search_api_request(
+            places=[cursor.place_id],
+            dt_start=q["dt_start"],
+            dt_end=q["dt_end"],
+            price=q["price"],
+            category=q["category"],
+            event_format=q["event_format"],
+            client_timezone=cursor.timezone,
+            # additional requirements
+            referer_url=cursor.referer_url,
+            csrf_token=cursor.csrf_token,
+            page_n=page_n,
+            page_size=page_size,
+            expand=expand,
+        )
 
-    def get_results(
+        data = self.p.fetch_once(
+            ("POST", utils.normalize_url(url), json.dumps(payload, sort_keys=True)),
+            lambda: self.p.parse_search(
+                parsing.parse_search_api,
+                self.__fetch_search_api(url, payload=payload, headers=headers),
+            ),
+        )
+        if data["object_count"] is not None:
+            cursor.object_count = data["object_count"]
+        return data["events"]
+
+    def events_iter(
         self,
         region: str,
         dt_start: Union[str, datetime.datetime],
@@ -160,10 +554,35 @@ class EventSearch:
         category: dm.Category = None,
         event_format: dm.EventFormat = None,
         max_pages: int = 10,
-    ) -> List[dm.Event]:
-        output = []
+        page_size: int = 20,
+        expand: Union[Literal["minimal", "default", "full"], Sequence[str]] = "full",
+        max_events: int = None,
+        stop_when: Callable[[dm.Event], bool] = None,
+        where: Callable[[dm.Event], bool] = None,
+    ) -> Iterator[dm.Event]:
+        """
+        It iterates through the events of the search results one by one. Next page
+        is requested only when events of the previous page are consumed, and no
+        requests are made after the stop condition is met.
+
+        Args:
+          region, dt_start, dt_end, price, category, event_format, max_pages,
+            page_size, expand: see `results_iter`
+          max_events (int): stop after that many events (after `where`).
+            Defaults to None (no limit)
+          stop_when (Callable[[Event], bool]): stop when it returns True for an
+            event (the event is not yielded), e.g.
+            `lambda e: e.start_datetime > dt_limit`
+          where (Callable[[Event], bool]): yield only events for which it
+            returns True
+
+        Yields:
+            Event
+        """
+        if max_events is not None and max_events <= 0:
+            return
 
-        for page_results in self.results_iter(
+        pages = self.results_iter(
             region=region,
             dt_start=dt_start,
             dt_end=dt_end,
@@ -171,12 +590,59 @@ class EventSearch:
             category=category,
             event_format=event_format,
             max_pages=max_pages,
-        ):
-            for event in page_results:
-                output.append(event)
-        return output
+            page_size=page_size,
+            expand=expand,
+        )
+        n_events = 0
+        try:
+            for page_results in pages:
+                for event in page_results:
+                    if stop_when is not None and stop_when(event):
+                        return
+                    if where is not None and not where(event):
+                        continue
+
+                    yield event
+                    n_events += 1
+                    if max_events is not None and n_events >= max_events:
+                        return
+        finally:
+            pages.close()
+
+    def get_results(
+        self,
+        region: str,
+        dt_start: Union[str, datetime.datetime],
+        dt_end: Union[str, datetime.datetime],
+        price: Literal["paid", "free"] = None,
+        category: dm.Category = None,
+        event_format: dm.EventFormat = None,
+        max_pages: int = 10,
+        page_size: int = 20,
+        expand: Union[Literal["minimal", "default", "full"], Sequence[str]] = "full",
+        max_events: int = None,
+        stop_when: Callable[[dm.Event], bool] = None,
+        where: Callable[[dm.Event], bool] = None,
+    ) -> List[dm.Event]:
+        """It returns list of events. See `events_iter` for parameters"""
+        return list(
+            self.events_iter(
+                region=region,
+                dt_start=dt_start,
+                dt_end=dt_end,
+                price=price,
+                category=category,
+                event_format=event_format,
+                max_pages=max_pages,
+                page_size=page_size,
+                expand=expand,
+                max_events=max_events,
+                stop_when=stop_when,
+                where=where,
+            )
+        )
 
-    def __fetch_search_page(self, url: str) -> str:
+    def __fetch_search_page(self, url: str) -> bytes:
         """Fetch content from HTML page"""
         headers = {
             "Accept": (
@@ -203,64 +669,17 @@ class EventSearch:
             "User-Agent": self.p.headers["User-Agent"],
         }
 
-        r = self.p.session.get(url, headers=headers)
-        data = r.content.decode("utf-8")
-
-        return data
-
-    def __parse_search_page(self, content: str) -> dict:
-        """
-        It takes the HTML of a search page, parses it, and returns a dictionary with
-        the CSRF token and the JSON with the search results.
-
-        Args:
-          content (str): the HTML content of the search page
-
-        Returns:
-          A dictionary with two keys:
-            - csrf_token
-            - results
-        """
-        tree = lxml.html.fromstring(content)
-
-        # SEARCH RESULTS:
-        # getting JSON with search results in <script>...</script>
-        raw_results = re.findall(
-            r"(?ims)window\.\_\_SERVER_DATA\_\_ \=(.*?\})\;",
-            tree.xpath("//script[contains(.,'window.__SERVER_DATA__')]")[0].text,
-        )
-        results = json.loads(raw_results[0].strip())
-
-        data = {
-            "csrf_token": self.__extract_csrf_token(tree),
-            "results": results,
-        }
-        return data
-
-    @staticmethod
-    def __extract_csrf_token(value: Union[str, lxml.html.HtmlElement]) -> str:
-        """
-        It takes a string or an lxml.html.HtmlElement object, and returns csrf token
-
-        Args:
-          value (Union[str, Any]): The HTML string or lxml.html.HtmlElement object to
-            extract the CSRF
-        token from.
-
-        Returns:
-          The csrf token is being returned.
-        """
-        if isinstance(value, str):
-            tree = lxml.html.fromstring(value)
-        else:
-            tree = value
-
-        xpath = "//input[@name='csrfmiddlewaretoken']"
-        csrf_token = tree.xpath(xpath)[0].get("value")
-
-        return csrf_token
+        markers = parsing.SEARCH_PAGE_MARKERS if self.p.stream_pages else None
+        with profiling.stage(profiling.FETCH):
+            return self.p.transport.get(url, headers=headers, markers=markers)
 
     def __fetch_search_api(
+        self, url: str, payload: Dict[str, Any], headers: Dict[str, str]
+    ) -> bytes:
+        with profiling.stage(profiling.FETCH):
+            return self.p.transport.post_json(url, data=payload, headers=headers)
+
+    def __search_api_request(
         self,
         referer_url: str,
         csrf_token: str,
@@ -273,9 +692,12 @@ class EventSearch:
         event_format: dm.D = None,
         online_events_only: bool = False,
         price: Literal["paid", "free"] = None,
-    ) -> dict:
-        if page_n < 2:
-            raise NotImplementedError("Page for api must be at least 2")
+        page_size: int = 20,
+        expand: Sequence[str] = dm.SearchExpand.FULL,
+    ) -> Tuple[str, Dict[str, Any], Dict[str, str]]:
+        """It returns URL, JSON payload and headers of the search API request"""
+        if page_n < 1:
+            raise ValueError(f"Page for api must be at least 1. Given: {page_n}")
 
         headers = {
             "Accept-Encoding": "gzip, deflate, br",
@@ -309,7 +731,7 @@ class EventSearch:
                 "dedup": True,
                 "places": [str(i) for i in places],  # e.g ["85921881"]
                 "page": page_n,
-                "page_size": 20,
+                "page_size": page_size,
                 "online_events_only": online_events_only,
                 "client_timezone": client_timezone,
                 "include_promoted_events_for": {
@@ -318,15 +740,7 @@ class EventSearch:
                 },
                 # price (added later)
             },
-            "expand.destination_event": [
-                "primary_venue",
-                "image",
-                "ticket_availability",
-                "saves",
-                "event_sales_status",
-                "primary_organizer",
-                "public_collections",
-            ],
+            "expand.destination_event": list(expand),
         }
         if category or event_format:
             data["event_search"]["tags"] = []
@@ -340,40 +754,116 @@ class EventSearch:
         log.debug(f"  - API URL: {url}")
         log.debug(f"  - API DATA: {json.dumps(data)}")
 
-        r = self.p.session.post(url, json=data, headers=headers)
-        data = r.json()
-
-        return data
+        return url, data, headers
 
 
 class EventProfile:
     def __init__(self, parent: "Eventbrite"):
         self.p = parent
 
-    def load(self, url: str) -> dm.Event:
+    def load(
+        self,
+        url: str,
+        fields: Iterable[str] = None,
+        keep_raw: Union[bool, Sequence[str]] = True,
+    ) -> dm.Event:
         """
         It takes a eventbrite event URL, loads it and return Event object
 
         Args:
           url (str): The URL of the event page.
+          fields (Iterable[str]): names of `Event` fields to serialize (e.g.
+            ["primary_venue"] to skip building description).
+            Defaults to None (all fields)
+          keep_raw (Union[bool, Sequence[str]]): keep page data in
+            `raw_profile_data`: True (all), False (nothing) or list of top level
+            keys to keep. Defaults to True
 
         Returns:
           A dictionary of the event profile
         """
-        self.p.waiter.wait_if_needed(self.p.delay_between_fetches)
+        fields = check_event_fields(fields)
 
         # If not URL then it is event id
         if not url.startswith("http"):
             url = URL.event_profile(event_id=url)
 
-        html_content = self.__load_event_page(url)
+        # NOTE: concurrent loads of the same page share one request, and loads
+        #   with the same parameters share one parsed event
+        page_key = ("GET", utils.normalize_url(url))
 
-        data = self.__extract_window_data(html_content)
-        event = serialize_event_profile(data)
+        def load_event() -> dm.Event:
+            html_content = self.p.fetch_once(
+                page_key, lambda: self.__load_event_page(url)
+            )
+            return self.p.parse(
+                parsing.parse_event_page,
+                html_content,
+                fields=fields,
+                keep_raw=keep_raw,
+                signatures=self.p.signatures,
+            )
 
-        return event
+        return self.p.single_flight.do(
+            page_key + (flight_key(fields), flight_key(keep_raw)), load_event
+        )
+
+    def enrich(
+        self,
+        events: Iterable[dm.Event],
+        fields: Iterable[str] = None,
+        max_workers: int = 4,
+        keep_raw: Union[bool, Sequence[str]] = True,
+    ) -> Iterator[dm.Event]:
+        """
+        It loads profiles of search results concurrently and merges them into
+        single events (see `merge_events` for precedence rules)
+
+        Args:
+          events (Iterable[Event]): events from search results
+          fields (Iterable[str]): names of `Event` fields that are needed. If none
+            of them requires profile (see `PROFILE_FIELDS`), profiles are not
+            loaded. Defaults to None (all fields)
+          max_workers (int): number of profiles loaded concurrently. Requests are
+            still spaced by `delay_between_fetches`. Defaults to 4
+          keep_raw (Union[bool, Sequence[str]]): see `load`
 
-    def __load_event_page(self, url: str):
+        Yields:
+            Event - merged events in the same order as `events`. If profile of
+              an event fails to load, the search result is yielded as is
+        """
+        fields = check_event_fields(fields)
+        if fields is not None and not fields.intersection(PROFILE_FIELDS):
+            log.debug("requested fields are available in search results")
+            yield from events
+            return
+
+        def enrich_event(event: dm.Event) -> dm.Event:
+            try:
+                profile = self.load(
+                    event.url or event.id, fields=fields, keep_raw=keep_raw
+                )
+            except Exception as e:
+                log.warning(f"failed to load profile of event {event.id}: {e!r}")
+                return event
+            with profiling.stage(profiling.SERIALIZE):
+                return merge_events(event, profile, signatures=self.p.signatures)
+
+        # keep limited number of profiles in flight (events could be endless)
+        with cf.ThreadPoolExecutor(max_workers) as executor:
+            futures = deque()
+            try:
+                for event in events:
+                    futures.append(executor.submit(enrich_event, event))
+                    if len(futures) >= max_workers * 2:
+                        yield futures.popleft().result()
+                while futures:
+                    yield futures.popleft().result()
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def __load_event_page(self, url: str) -> bytes:
         headers = {
             "Accept": (
                 "text/html,application/xhtml+xml,application/xml;"
@@ -399,38 +889,70 @@ class EventProfile:
             "User-Agent": self.p.headers["User-Agent"],
         }
 
-        r = self.p.session.get(url, headers=headers)
-        data = r.content.decode("utf-8")
-
-        return data
-
-    @staticmethod
-    def __extract_window_data(value: Union[str, lxml.html.HtmlElement]) -> dict:
-        """
-        Parses data from html block with `window.server_data` in it
+        markers = parsing.EVENT_PAGE_MARKERS if self.p.stream_pages else None
+        with profiling.stage(profiling.FETCH):
+            return self.p.transport.get(url, headers=headers, markers=markers)
+
+
+def flight_key(value: Any) -> Any:
+    """It converts parameter into hashable part of the single-flight key"""
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(value))
+    if isinstance(value, (list, tuple)):
+        return tuple(value)
+    return value
+
+
+def search_query(
+    region: str,
+    dt_start: Union[str, datetime.datetime],
+    dt_end: Union[str, datetime.datetime],
+    price: Literal["paid", "free"] = None,
+    category: dm.D = None,
+    event_format: dm.D = None,
+) -> Dict[str, Any]:
+    """It returns search parameters normalized to be stored in `SearchCursor`"""
+    return {
+        "region": region,
+        "dt_start": norm_search_date(dt_start, "dt_start"),
+        "dt_end": norm_search_date(dt_end, "dt_end"),
+        "price": price,
+        "category": category,
+        "event_format": event_format,
+    }
+
+
+def norm_search_date(
+    value: Union[str, datetime.datetime, None],
+    name: str = "date",
+) -> Optional[str]:
+    """It converts datetime into `%Y-%m-%d` string used by search"""
+    if isinstance(value, datetime.datetime):
+        return value.strftime("%Y-%m-%d")
+    if value is not None and not isinstance(value, str):
+        raise TypeError(f"{name} must be datetime or str. Given: {type(value)}")
+    return value
+
+
+def resolve_search_expand(
+    expand: Union[Literal["minimal", "default", "full"], Sequence[str]],
+) -> Sequence[str]:
+    """
+    It converts expansion profile name into list of API expansions
 
-        Args:
-          value (Union[str, lxml.html.HtmlElement]): The HTML string or
-            lxml.html.HtmlElement object to extract the data from.
+    Args:
+      expand (Union[str, Sequence[str]]): "minimal", "default", "full" or list of
+        expansions (e.g. ["primary_venue", "image"])
 
-        Returns:
-          A dictionary of the data from the page.
-        """
-        if isinstance(value, str):
-            tree = lxml.html.fromstring(value)
-        else:
-            tree = value
-
-        raw_results = re.findall(
-            r"(?ims)window\.\_\_SERVER_DATA\_\_ \=(.*?\})\;",
-            tree.xpath("//script[contains(.,'window.__SERVER_DATA__')]")[0].text,
-        )
+    Returns:
+      List of expansions for `expand.destination_event`
+    """
+    if isinstance(expand, str):
         try:
-            results = json.loads(raw_results[0].strip(), strict=False)
-        except json.JSONDecodeError as e:
-            log.error(raw_results[0])
-            raise e
-        return results
+            return getattr(dm.SearchExpand, expand.upper())
+        except AttributeError:
+            raise ValueError(f"Unknown expand profile: {expand}")
+    return tuple(expand)
 
 
 class URL:
@@ -0,0 +1,182 @@
+"""Parsing of raw eventbrite responses into `Event` objects
+
+All functions are defined at module level and take raw response bytes, so they
+can be pickled and executed in a process pool (see `Eventbrite.parse_executor`)
+"""
+from typing import TYPE_CHECKING, Union, Dict, Any, Optional, Iterable, Sequence
+import json
+import re
+import logging
+
+from . import data_models as dm
+from . import profiling
+from . import utils
+from .serialization import serialize_event_search_result, serialize_event_profile
+
+if TYPE_CHECKING:
+    import lxml.html
+    from .interning import Interner
+
+lxml_html = utils.lazy_import("lxml.html")
+
+log = logging.getLogger(__name__)
+
+RE_SERVER_DATA = re.compile(r"(?ims)window\.\_\_SERVER_DATA\_\_ \=(.*?\})\;")
+
+# (start, end) markers of the parts of HTML required by parsers
+# (used to stop downloading pages early, see `utils.read_until`)
+SERVER_DATA_MARKER = (b"window.__SERVER_DATA__", b"</script>")
+CSRF_TOKEN_MARKER = (b'name="csrfmiddlewaretoken"', b">")
+SEARCH_PAGE_MARKERS = (SERVER_DATA_MARKER, CSRF_TOKEN_MARKER)
+EVENT_PAGE_MARKERS = (SERVER_DATA_MARKER,)
+
+
+def to_html_tree(value: Union[bytes, str, "lxml.html.HtmlElement"]):
+    """It converts raw HTML (bytes or str) into lxml tree"""
+    if isinstance(value, bytes):
+        value = value.decode("utf-8")
+    if isinstance(value, str):
+        return lxml_html.fromstring(value)
+    return value
+
+
+def extract_window_data(
+    value: Union[bytes, str, "lxml.html.HtmlElement"],
+    strict: bool = True,
+) -> dict:
+    """
+    Parses data from html block with `window.server_data` in it
+
+    Args:
+      value (Union[bytes, str, lxml.html.HtmlElement]): The HTML or
+        lxml.html.HtmlElement object to extract the data from.
+      strict (bool): passed to `json.loads`. Defaults to True
+
+    Returns:
+      A dictionary of the data from the page.
+    """
+    tree = to_html_tree(value)
+
+    raw_results = RE_SERVER_DATA.findall(
+        tree.xpath("//script[contains(.,'window.__SERVER_DATA__')]")[0].text,
+    )
+    try:
+        results = json.loads(raw_results[0].strip(), strict=strict)
+    except json.JSONDecodeError as e:
+        log.error(raw_results[0])
+        raise e
+    return results
+
+
+def extract_csrf_token(value: Union[bytes, str, "lxml.html.HtmlElement"]) -> str:
+    """
+    It takes HTML or an lxml.html.HtmlElement object, and returns csrf token
+
+    Args:
+      value (Union[bytes, str, lxml.html.HtmlElement]): The HTML or
+        lxml.html.HtmlElement object to extract the CSRF token from.
+
+    Returns:
+      The csrf token is being returned.
+    """
+    tree = to_html_tree(value)
+
+    xpath = "//input[@name='csrfmiddlewaretoken']"
+    csrf_token = tree.xpath(xpath)[0].get("value")
+
+    return csrf_token
+
+
+def parse_search_page(
+    content: Union[bytes, str], interner: "Interner" = None, signatures: bool = False
+) -> Dict[str, Any]:
+    """
+    It takes the HTML of a search page, parses it, and returns a dictionary with
+    the CSRF token, place id and serialized events.
+
+    Args:
+      content (Union[bytes, str]): the HTML content of the search page
+      interner (Interner): shares identical venues, addresses and tags between
+        events (see `serialize_event_search_result`). Defaults to None
+      signatures (bool): see `serialize_event_search_result`. Defaults to False
+
+    Returns:
+      A dictionary with keys:
+        - csrf_token
+        - place_id
+        - events
+        - object_count (total number of results, if available)
+    """
+    tree = to_html_tree(content)
+
+    # SEARCH RESULTS:
+    # getting JSON with search results in <script>...</script>
+    results = extract_window_data(tree)
+    raw_events = results["search_data"]["events"]
+
+    with profiling.stage(profiling.SERIALIZE):
+        events = [
+            serialize_event_search_result(i, interner, signatures=signatures)
+            for i in raw_events["results"] or []
+        ]
+    data = {
+        "csrf_token": extract_csrf_token(tree),
+        "place_id": results["placeId"],
+        "events": events,
+        "object_count": (raw_events.get("pagination") or {}).get("object_count"),
+    }
+    return data
+
+
+def parse_search_api(
+    content: Union[bytes, str], interner: "Interner" = None, signatures: bool = False
+) -> Dict[str, Any]:
+    """
+    It takes the body of the search API response and returns a dictionary with
+    serialized events.
+
+    Args:
+      content (Union[bytes, str]): JSON body of the search API response
+      interner (Interner): shares identical venues, addresses and tags between
+        events (see `serialize_event_search_result`). Defaults to None
+      signatures (bool): see `serialize_event_search_result`. Defaults to False
+
+    Returns:
+      A dictionary with keys:
+        - events
+        - object_count (total number of results, if available)
+    """
+    raw_events = json.loads(content)["events"]
+
+    with profiling.stage(profiling.SERIALIZE):
+        events = [
+            serialize_event_search_result(i, interner, signatures=signatures)
+            for i in raw_events["results"] or []
+        ]
+    data = {
+        "events": events,
+        "object_count": (raw_events.get("pagination") or {}).get("object_count"),
+    }
+    return data
+
+
+def parse_event_page(
+    content: Union[bytes, str],
+    fields: Optional[Iterable[str]] = None,
+    keep_raw: Union[bool, Sequence[str]] = True,
+    signatures: bool = False,
+) -> dm.Event:
+    """
+    It takes the HTML of an event page and returns serialized Event
+
+    Args:
+      content (Union[bytes, str]): the HTML content of the event page
+      fields (Iterable[str]): see `serialize_event_profile`
+      keep_raw (Union[bool, Sequence[str]]): see `serialize_event_profile`
+      signatures (bool): see `serialize_event_profile`. Defaults to False
+    """
+    data = extract_window_data(content, strict=False)
+    with profiling.stage(profiling.SERIALIZE):
+        return serialize_event_profile(
+            data, fields=fields, keep_raw=keep_raw, signatures=signatures
+        )
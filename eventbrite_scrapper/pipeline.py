@@ -0,0 +1,364 @@
+"""Pipeline of stages connected by bounded queues
+
+Every stage runs in its own threads (`concurrency`), so network and CPU stages
+overlap, while bounded queues keep memory limited: a slow stage blocks the
+stages before it (backpressure).
+
+Items of a stage with `concurrency` > 1 are processed by several threads, so
+their order is not preserved (e.g. use `EventProfile.enrich` if profiles are
+needed in the search order). When the pipeline stops (completed, cancelled or
+failed), the source is closed if it is a generator.
+
+Example:
+    search = client.search_events.results_iter(**params)
+    stats = (
+        Pipeline(search)
+        .flat_map(lambda page: page, name="events")
+        .filter(lambda e: not e.is_online_event)
+        .map(lambda e: client.event_profile.load(e.url), concurrency=4)
+        .sink(write_event)
+        .run()
+    )
+"""
+
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+from dataclasses import dataclass, field
+import logging
+import queue
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+# marks end of the stream in queues
+_END = object()
+
+
+@dataclass
+class StageStats:
+    name: str
+    concurrency: int = 1
+    items_in: int = 0
+    items_out: int = 0
+    # time spent in stage function (all threads)
+    busy_sec: float = 0
+    # time spent waiting for the next stage (backpressure)
+    blocked_sec: float = 0
+    started: Optional[float] = field(default=None, repr=False)
+    finished: Optional[float] = field(default=None, repr=False)
+
+    @property
+    def elapsed_sec(self) -> float:
+        if self.started is None:
+            return 0
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def throughput(self) -> float:
+        """Output items per second"""
+        elapsed = self.elapsed_sec
+        return self.items_out / elapsed if elapsed else 0
+
+    def as_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "concurrency": self.concurrency,
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "busy_sec": round(self.busy_sec, 3),
+            "blocked_sec": round(self.blocked_sec, 3),
+            "elapsed_sec": round(self.elapsed_sec, 3),
+            "throughput": round(self.throughput, 3),
+        }
+
+
+class PipelineCancelled(Exception):
+    pass
+
+
+class _Stage:
+    def __init__(
+        self,
+        name: str,
+        kind: str,
+        func: Callable,
+        concurrency: int,
+        queue_size: int,
+    ):
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be at least 1. Given: {concurrency}")
+        self.name = name
+        self.kind = kind
+        self.func = func
+        self.concurrency = concurrency
+        # input queue of the stage
+        self.queue = queue.Queue(queue_size)
+        self.stats = StageStats(name=name, concurrency=concurrency)
+        self.lock = threading.Lock()
+        self.running = concurrency
+
+    def process(self, item: Any) -> Iterable[Any]:
+        if self.kind == "map":
+            return (self.func(item),)
+        if self.kind == "filter":
+            return (item,) if self.func(item) else ()
+        if self.kind == "flat_map":
+            return self.func(item)
+        if self.kind == "sink":
+            self.func(item)
+            return ()
+        raise ValueError(f"Unknown stage kind: {self.kind}")
+
+
+class Pipeline:
+    """
+    Composable pipeline: source -> stages -> (sink or iterator). Output order
+    is not preserved after stages with `concurrency` > 1
+
+    Args:
+      source (Iterable[Any]): items to process (e.g. `results_iter` pages). It
+        is closed (if it has `close`, e.g. generator) when the pipeline stops
+      queue_size (int): default size of queues between stages. Defaults to 100
+    """
+
+    def __init__(self, source: Iterable[Any], queue_size: int = 100):
+        self.source = source
+        self.queue_size = queue_size
+        self.stages: List[_Stage] = []
+        self.source_stats = StageStats(name="source")
+        self.cancel_event = threading.Event()
+        self.errors: List[BaseException] = []
+        self.threads: List[threading.Thread] = []
+        self.output: Optional[queue.Queue] = None
+
+    # --- building ---
+
+    def _add(
+        self,
+        kind: str,
+        func: Callable,
+        concurrency: int,
+        queue_size: int,
+        name: str,
+    ) -> "Pipeline":
+        if self.stages and self.stages[-1].kind == "sink":
+            raise ValueError("Sink must be the last stage")
+        if self.threads:
+            raise RuntimeError("Pipeline is already started")
+
+        name = name or getattr(func, "__name__", kind)
+        if name == "<lambda>" or name in {s.name for s in self.stages}:
+            name = f"{kind}-{len(self.stages) + 1}"
+        stage = _Stage(name, kind, func, concurrency, queue_size or self.queue_size)
+        self.stages.append(stage)
+        return self
+
+    def map(
+        self,
+        func: Callable[[Any], Any],
+        concurrency: int = 1,
+        queue_size: int = None,
+        name: str = None,
+    ) -> "Pipeline":
+        """It adds stage that replaces every item with `func(item)`"""
+        return self._add("map", func, concurrency, queue_size, name)
+
+    def filter(
+        self,
+        func: Callable[[Any], bool],
+        concurrency: int = 1,
+        queue_size: int = None,
+        name: str = None,
+    ) -> "Pipeline":
+        """It adds stage that passes only items for which `func(item)` is True"""
+        return self._add("filter", func, concurrency, queue_size, name)
+
+    def flat_map(
+        self,
+        func: Callable[[Any], Iterable[Any]],
+        concurrency: int = 1,
+        queue_size: int = None,
+        name: str = None,
+    ) -> "Pipeline":
+        """It adds stage that replaces every item with items of `func(item)`"""
+        return self._add("flat_map", func, concurrency, queue_size, name)
+
+    def sink(
+        self,
+        func: Callable[[Any], None],
+        concurrency: int = 1,
+        queue_size: int = None,
+        name: str = None,
+    ) -> "Pipeline":
+        """It adds the last stage that consumes every item with `func(item)`"""
+        return self._add("sink", func, concurrency, queue_size, name)
+
+    # --- running ---
+
+    @property
+    def stats(self) -> Dict[str, StageStats]:
+        """Stats of source and every stage"""
+        stats = {self.source_stats.name: self.source_stats}
+        stats.update({s.name: s.stats for s in self.stages})
+        return stats
+
+    def cancel(self):
+        """It stops all stages. Items in queues are discarded"""
+        self.cancel_event.set()
+
+    def run(self) -> Dict[str, StageStats]:
+        """
+        It runs pipeline until all items are processed (items produced by the
+        last stage, if it is not a sink, are discarded)
+
+        Returns:
+          Stats by stage name
+
+        Raises:
+          First exception raised by any stage
+        """
+        for _ in self:
+            pass
+        return self.stats
+
+    def __iter__(self) -> Iterator[Any]:
+        """It runs pipeline and yields items produced by the last stage"""
+        self._start()
+        is_completed = False
+        try:
+            while True:
+                item = self._get(self.output)
+                if item is _END:
+                    is_completed = not self.cancel_event.is_set()
+                    break
+                yield item
+        finally:
+            if not is_completed:
+                # stopped by consumer or by error
+                self.cancel()
+            for t in self.threads:
+                t.join()
+
+        if self.errors:
+            raise self.errors[0]
+        if not is_completed:
+            raise PipelineCancelled()
+
+    def _start(self):
+        if self.threads:
+            raise RuntimeError("Pipeline is already started")
+
+        queues = [s.queue for s in self.stages]
+        self.output = queue.Queue(self.queue_size)
+        next_queues = queues[1:] + [self.output]
+        next_workers = [s.concurrency for s in self.stages[1:]] + [1]
+
+        self.threads.append(
+            threading.Thread(
+                target=self._run_source,
+                args=(
+                    queues[0] if queues else self.output,
+                    self.stages[0].concurrency if self.stages else 1,
+                ),
+                name="pipeline-source",
+                daemon=True,
+            )
+        )
+        for stage, out, n_out in zip(self.stages, next_queues, next_workers):
+            for i in range(stage.concurrency):
+                self.threads.append(
+                    threading.Thread(
+                        target=self._run_stage,
+                        args=(stage, out, n_out),
+                        name=f"pipeline-{stage.name}-{i}",
+                        daemon=True,
+                    )
+                )
+        for t in self.threads:
+            t.start()
+
+    def _put(self, q: queue.Queue, item: Any) -> bool:
+        """It puts item into queue, returns False if pipeline is cancelled"""
+        while not self.cancel_event.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue) -> Any:
+        """It gets item from the queue, returns `_END` if pipeline is cancelled"""
+        while not self.cancel_event.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END
+
+    def _fail(self, e: BaseException):
+        log.error(f"pipeline stage failed: {e!r}")
+        self.errors.append(e)
+        self.cancel()
+
+    def _run_source(self, out: queue.Queue, n_out: int):
+        stats = self.source_stats
+        stats.started = time.monotonic()
+        source = None
+        try:
+            source = iter(self.source)
+            for item in source:
+                stats.items_out += 1
+                start = time.monotonic()
+                if not self._put(out, item):
+                    return
+                stats.blocked_sec += time.monotonic() - start
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            # e.g. stops `results_iter` and releases its resources on cancel
+            close = getattr(source, "close", None)
+            if close is not None:
+                try:
+                    close()
+                except BaseException as e:
+                    self._fail(e)
+            stats.finished = time.monotonic()
+            for _ in range(n_out):
+                self._put(out, _END)
+
+    def _run_stage(self, stage: _Stage, out: queue.Queue, n_out: int):
+        stats = stage.stats
+        with stage.lock:
+            if stats.started is None:
+                stats.started = time.monotonic()
+        try:
+            while True:
+                item = self._get(stage.queue)
+                if item is _END:
+                    return
+
+                start = time.monotonic()
+                blocked = 0
+                n_results = 0
+                for result in stage.process(item):
+                    n_results += 1
+                    put_start = time.monotonic()
+                    if not self._put(out, result):
+                        return
+                    blocked += time.monotonic() - put_start
+                with stage.lock:
+                    stats.items_in += 1
+                    stats.items_out += n_results
+                    stats.busy_sec += time.monotonic() - start - blocked
+                    stats.blocked_sec += blocked
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            with stage.lock:
+                stage.running -= 1
+                is_last = stage.running == 0
+            if is_last:
+                stats.finished = time.monotonic()
+                for _ in range(n_out):
+                    self._put(out, _END)
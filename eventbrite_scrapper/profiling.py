@@ -0,0 +1,485 @@
+"""Profiling of fetch, parse, serialize and export stages
+
+`Profiler` measures stages marked with `stage(name)` (`Eventbrite` marks
+"fetch", "parse", "serialize" and "export"): number of calls, time and change
+of traced memory. Optionally:
+
+- memory: tracemalloc traces Python allocations (it slows allocations down
+  several times, so profile a sample of the crawl). Allocation sites are
+  assigned to the stage by the innermost frame of this package in their
+  traceback (e.g. bytes allocated by urllib3 for `transport` are "fetch",
+  copies made by `Event.as_dict` are "export"). Memory of lxml trees is not
+  traced (libxml2 allocates it), so peak RSS of every stage is reported too
+- cpu: a thread samples stacks of all threads every `interval` seconds and
+  assigns samples to the current (innermost) stage of the thread
+- memory_limit: when RSS (or traced memory, if RSS is not available) exceeds
+  it, a warning is logged or `on_memory_limit` is called (e.g. to flush
+  buffered events)
+
+NOTE: stages that run in `parse_executor` processes are not profiled (only
+waiting for their results is measured).
+
+Example:
+    profiler = Profiler(memory_limit=2 * 2**30, on_memory_limit=flush)
+    client = Eventbrite(profiler=profiler)
+    events = client.search_events.get_results(**params)
+    profiler.stop()
+    profiler.write_report("./profile.txt")
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from collections import Counter
+from dataclasses import dataclass, asdict
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+from . import utils
+
+# NOTE: tracemalloc imports pickle, so it is imported when profiling is used
+tracemalloc = utils.lazy_import("tracemalloc")
+
+log = logging.getLogger(__name__)
+
+FETCH = "fetch"
+PARSE = "parse"
+SERIALIZE = "serialize"
+EXPORT = "export"
+OTHER = "other"
+
+# stage of allocations made (directly or by libraries) from modules of this package
+MODULE_STAGES = {
+    "transport.py": FETCH,
+    "parsing.py": PARSE,
+    "serialization.py": SERIALIZE,
+    "interning.py": SERIALIZE,
+    "duplicates.py": SERIALIZE,
+    "data_models.py": EXPORT,
+    "archive.py": EXPORT,
+}
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# new snapshot of allocations is taken when traced memory grows by 25%
+SNAPSHOT_GROWTH = 1.25
+SNAPSHOT_MIN_BYTES = 16 * 2**20
+# warning / `on_memory_limit` is repeated after memory drops below 90% of limit
+LIMIT_HYSTERESIS = 0.9
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# profiler that receives stages (see `stage`)
+_active: Optional["Profiler"] = None
+
+
+@dataclass
+class StageProfile:
+    name: str
+    calls: int = 0
+    # time of outermost calls (including nested stages)
+    elapsed_sec: float = 0
+    # change of traced memory (memory kept after the stage)
+    traced_bytes: int = 0
+    # maximum RSS seen while the stage was running
+    max_rss_bytes: int = 0
+    # CPU samples taken while it was the innermost stage of a thread
+    samples: int = 0
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_STAGE = _NullStage()
+
+
+def stage(name: str):
+    """It returns context manager that marks the stage for the active profiler
+    (no-op, if profiling is not started)"""
+    profiler = _active
+    if profiler is None:
+        return NULL_STAGE
+    return _Stage(profiler, name)
+
+
+class _Stage:
+    __slots__ = ("profiler", "name", "stack", "nested", "start", "traced")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        p = self.profiler
+        stack = p.stacks.get(threading.get_ident())
+        if stack is None:
+            stack = p.stacks.setdefault(threading.get_ident(), [])
+        # e.g. parse -> parse (only outermost call is measured)
+        self.nested = self.name in stack
+        self.stack = stack
+        stack.append(self.name)
+        if not self.nested:
+            self.traced = tracemalloc.get_traced_memory()[0] if p.memory else 0
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        p = self.profiler
+        self.stack.pop()
+        if not self.nested:
+            elapsed = time.perf_counter() - self.start
+            traced = tracemalloc.get_traced_memory()[0] if p.memory else 0
+            with p.lock:
+                stats = p.get_stats(self.name)
+                stats.calls += 1
+                stats.elapsed_sec += elapsed
+                stats.traced_bytes += traced - self.traced
+        if p.limit_pending:
+            p.handle_memory_limit()
+        return False
+
+
+class Profiler:
+    """
+    Args:
+      memory (bool): trace allocations with tracemalloc. Defaults to True
+      cpu (bool): sample stacks of threads. Defaults to True
+      interval (float): seconds between samples (and memory checks).
+        Defaults to 0.005
+      memory_limit (int): memory ceiling in bytes (RSS or traced memory).
+        Defaults to None (no limit)
+      on_memory_limit (Callable[[int], None]): called with current memory when
+        it exceeds `memory_limit` (e.g. to flush buffers). It is called by the
+        next thread that leaves a stage. Defaults to None (log warning)
+      traceback_limit (int): frames stored by tracemalloc. Allocations without
+        frames of this package within the limit are reported as "other".
+        Tracing is slower with more frames. Defaults to 10
+      top (int): number of allocation sites and functions per stage in the
+        report. Defaults to 10
+    """
+
+    def __init__(
+        self,
+        memory: bool = True,
+        cpu: bool = True,
+        interval: float = 0.005,
+        memory_limit: int = None,
+        on_memory_limit: Callable[[int], None] = None,
+        traceback_limit: int = 10,
+        top: int = 10,
+    ):
+        self.memory = memory
+        self.cpu = cpu
+        self.interval = interval
+        self.memory_limit = memory_limit
+        self.on_memory_limit = on_memory_limit
+        self.traceback_limit = traceback_limit
+        self.top = top
+
+        self.stats: Dict[str, StageProfile] = {}
+        # thread id -> names of stages
+        self.stacks: Dict[int, List[str]] = {}
+        self.lock = threading.Lock()
+        # (stage, function) -> samples where the function is running / on stack
+        self.self_samples: Counter = Counter()
+        self.total_samples: Counter = Counter()
+
+        # snapshot of allocations with the most traced memory
+        self.snapshot: Optional["tracemalloc.Snapshot"] = None
+        self.snapshot_bytes = 0
+        self.peak_traced_bytes = 0
+        self.peak_rss_bytes = 0
+
+        self.over_limit = False
+        self.limit_pending = False
+        self.limit_hits = 0
+
+        self.started = False
+        self.started_tracemalloc = False
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "Profiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def get_stats(self, name: str) -> StageProfile:
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = StageProfile(name=name)
+        return stats
+
+    def start(self):
+        """It starts profiling (stages are received by this profiler)"""
+        global _active
+        if self.started:
+            return
+        if _active is not None:
+            raise RuntimeError("Another profiler is already started")
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start(self.traceback_limit)
+            self.started_tracemalloc = True
+        if self.memory_limit is not None and self.current_memory() is None:
+            raise ValueError("memory_limit requires RSS (Linux) or memory=True")
+
+        _active = self
+        self.started = True
+        self.stop_event.clear()
+        self.thread = threading.Thread(
+            target=self.run_sampler, name="eventbrite-profiler", daemon=True
+        )
+        self.thread.start()
+
+    def stop(self):
+        """It stops profiling (collected data are kept for the report)"""
+        global _active
+        if not self.started:
+            return
+        self.stop_event.set()
+        self.thread.join()
+        if self.memory and self.snapshot is None:
+            self.take_snapshot()
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+            self.started_tracemalloc = False
+        self.started = False
+        if _active is self:
+            _active = None
+
+    # --- sampling ---
+
+    def run_sampler(self):
+        own_ident = threading.get_ident()
+        while not self.stop_event.wait(self.interval):
+            if self.cpu:
+                self.sample_stacks(own_ident)
+            self.check_memory()
+
+    def sample_stacks(self, own_ident: int):
+        for ident, frame in sys._current_frames().items():
+            stack = self.stacks.get(ident)
+            if ident == own_ident or not stack:
+                continue
+            try:
+                name = stack[-1]
+            except IndexError:  # the stage is left meanwhile
+                continue
+            with self.lock:
+                self.get_stats(name).samples += 1
+            self.self_samples[(name, function_name(frame))] += 1
+            seen = set()
+            while frame is not None:
+                key = function_name(frame)
+                if key not in seen:
+                    seen.add(key)
+                    self.total_samples[(name, key)] += 1
+                frame = frame.f_back
+
+    def check_memory(self):
+        rss = rss_bytes()
+        if rss is not None:
+            self.peak_rss_bytes = max(self.peak_rss_bytes, rss)
+            running = {name for stack in list(self.stacks.values()) for name in stack}
+            with self.lock:
+                for name in running:
+                    stats = self.get_stats(name)
+                    stats.max_rss_bytes = max(stats.max_rss_bytes, rss)
+
+        traced = 0
+        if self.memory:
+            traced = tracemalloc.get_traced_memory()[0]
+            self.peak_traced_bytes = max(self.peak_traced_bytes, traced)
+            if traced >= SNAPSHOT_MIN_BYTES and (
+                traced > self.snapshot_bytes * SNAPSHOT_GROWTH
+            ):
+                self.take_snapshot()
+
+        if self.memory_limit is None:
+            return
+        current = rss if rss is not None else traced
+        if current > self.memory_limit and not self.over_limit:
+            self.over_limit = True
+            self.limit_hits += 1
+            self.limit_pending = True
+        elif current < self.memory_limit * LIMIT_HYSTERESIS:
+            self.over_limit = False
+
+    def take_snapshot(self):
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+            )
+        )
+        self.snapshot = snapshot
+        self.snapshot_bytes = tracemalloc.get_traced_memory()[0]
+
+    def current_memory(self) -> Optional[int]:
+        rss = rss_bytes()
+        if rss is not None:
+            return rss
+        if self.memory:
+            return tracemalloc.get_traced_memory()[0]
+        return None
+
+    def handle_memory_limit(self):
+        with self.lock:
+            if not self.limit_pending:
+                return
+            self.limit_pending = False
+        current = self.current_memory()
+        if self.on_memory_limit is not None:
+            self.on_memory_limit(current)
+            return
+        running = sorted({name for s in list(self.stacks.values()) for name in s})
+        log.warning(
+            f"memory {current / 2**20:.0f} MiB exceeds limit "
+            f"{self.memory_limit / 2**20:.0f} MiB (running stages: {running})"
+        )
+
+    # --- report ---
+
+    def allocation_sites(self) -> Dict[str, List[Tuple[str, int, int]]]:
+        """It returns top (site, size, count) of allocations of every stage
+        (from the snapshot with the most traced memory)"""
+        if self.snapshot is None:
+            return {}
+        sites: Dict[Tuple[str, str], List[int]] = {}
+        for stat in self.snapshot.statistics("traceback"):
+            name, site = allocation_stage(stat.traceback)
+            values = sites.setdefault((name, site), [0, 0])
+            values[0] += stat.size
+            values[1] += stat.count
+
+        by_stage: Dict[str, List[Tuple[str, int, int]]] = {}
+        for (name, site), (size, count) in sites.items():
+            by_stage.setdefault(name, []).append((site, size, count))
+        return {
+            name: sorted(values, key=lambda v: v[1], reverse=True)[: self.top]
+            for name, values in by_stage.items()
+        }
+
+    def hot_functions(self, name: str) -> List[Tuple[str, int, int]]:
+        """It returns top (function, self samples, total samples) of the stage"""
+        functions = [
+            (function, n, self.total_samples[(name, function)])
+            for (stage_name, function), n in list(self.self_samples.items())
+            if stage_name == name
+        ]
+        functions.sort(key=lambda v: v[1], reverse=True)
+        return functions[: self.top]
+
+    def summary(self) -> Dict[str, Any]:
+        sites = self.allocation_sites()
+        with self.lock:
+            stats = {name: asdict(s) for name, s in self.stats.items()}
+        for name in sites:
+            stats.setdefault(name, asdict(StageProfile(name=name)))
+        for name, values in stats.items():
+            values["top_allocations"] = [
+                {"site": site, "size": size, "count": count}
+                for site, size, count in sites.get(name, ())
+            ]
+            values["hot_functions"] = [
+                {"function": function, "self_samples": n, "total_samples": total}
+                for function, n, total in self.hot_functions(name)
+            ]
+        return {
+            "stages": stats,
+            "peak_traced_bytes": self.peak_traced_bytes,
+            "peak_rss_bytes": self.peak_rss_bytes,
+            "snapshot_bytes": self.snapshot_bytes,
+            "memory_limit": self.memory_limit,
+            "memory_limit_hits": self.limit_hits,
+        }
+
+    def report(self) -> str:
+        """It returns text report of the stages"""
+        summary = self.summary()
+        lines = [
+            f"peak traced memory: {mib(summary['peak_traced_bytes'])}, "
+            f"peak RSS: {mib(summary['peak_rss_bytes'])}, "
+            f"memory limit hits: {summary['memory_limit_hits']}",
+        ]
+        for name, stats in sorted(summary["stages"].items()):
+            lines.append("")
+            lines.append(
+                f"[{name}] calls: {stats['calls']}, "
+                f"time: {stats['elapsed_sec']:.3f} s, "
+                f"traced memory change: {mib(stats['traced_bytes'])}, "
+                f"max RSS: {mib(stats['max_rss_bytes'])}, "
+                f"CPU samples: {stats['samples']}"
+            )
+            if stats["top_allocations"]:
+                lines.append(
+                    f"  top allocations (snapshot of {mib(summary['snapshot_bytes'])}):"
+                )
+            for i in stats["top_allocations"]:
+                lines.append(f"    {mib(i['size']):>10} {i['count']:>9} {i['site']}")
+            if stats["hot_functions"]:
+                lines.append("  hot functions (self / total samples):")
+            for i in stats["hot_functions"]:
+                lines.append(
+                    f"    {i['self_samples']:>7} {i['total_samples']:>7} {i['function']}"
+                )
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, fpath: str):
+        """It writes the report (JSON, if `fpath` ends with .json)"""
+        with open(fpath, "w", encoding="utf-8") as f:
+            if fpath.endswith(".json"):
+                json.dump(self.summary(), f, indent=2)
+            else:
+                f.write(self.report())
+
+
+def allocation_stage(traceback: "tracemalloc.Traceback") -> Tuple[str, str]:
+    """
+    It returns (stage, site) of the allocation: stage is defined by the
+    innermost frame of this package, site is the innermost frame (and the
+    frame of this package, if it is different)
+    """
+    frames = list(traceback)  # the oldest frame first
+    if not frames:
+        return OTHER, "<unknown>"
+    site = short_path(frames[-1].filename, frames[-1].lineno)
+    for i, frame in enumerate(reversed(frames)):
+        if os.path.dirname(frame.filename) != PACKAGE_DIR:
+            continue
+        name = MODULE_STAGES.get(os.path.basename(frame.filename), OTHER)
+        if i:
+            site = f"{site} via {short_path(frame.filename, frame.lineno)}"
+        return name, site
+    return OTHER, site
+
+
+def function_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({short_path(code.co_filename, code.co_firstlineno)})"
+
+
+def short_path(fpath: str, lineno: int) -> str:
+    parts = fpath.replace("\\", "/").rsplit("/", 2)
+    return f"{'/'.join(parts[-2:])}:{lineno}"
+
+
+def rss_bytes() -> Optional[int]:
+    """It returns resident memory of the process (Linux only, None otherwise)"""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def mib(value: Optional[int]) -> str:
+    return f"{(value or 0) / 2**20:.1f} MiB"
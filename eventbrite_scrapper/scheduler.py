@@ -0,0 +1,312 @@
+"""Recrawl scheduler that spends limited request budget on events that change
+
+Every observation of the event (profile load or search result) is compared
+with the previous one of the same source (search `hash` or `fingerprint`), and
+the change rate of the event is estimated from detected changes. Priority of
+the event is the probability that it changed since the last fetch, multiplied
+by urgency (events that start soon are more important, past events are not
+fetched).
+
+Example:
+    scheduler = RecrawlScheduler(requests_per_hour=600)
+    for events in client.search_events.results_iter(**params):
+        scheduler.observe_many(events, source="search")
+    scheduler.run(client)
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+from dataclasses import dataclass, field, asdict
+import heapq
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+from . import data_models as dm
+
+log = logging.getLogger(__name__)
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+SOURCE_PROFILE = "profile"
+SOURCE_SEARCH = "search"
+
+
+@dataclass
+class EventState:
+    id: str
+    url: Optional[str] = None
+    # timestamp of the event start (None - unknown)
+    start_ts: Optional[float] = None
+    # timestamp of the last fetch of the profile (None - never fetched)
+    fetched_ts: Optional[float] = None
+    # source -> (version, timestamp of observation)
+    versions: Dict[str, Tuple[str, float]] = field(default_factory=dict)
+    # comparisons of versions, detected changes, total time between them
+    n_checks: int = 0
+    n_changes: int = 0
+    checked_sec: float = 0
+    n_errors: int = 0
+
+    def change_rate(self, default: float) -> float:
+        """
+        It returns estimated number of changes per second. Changes between
+        two observations are counted once, so the number of changes is
+        estimated as for Poisson process with incomplete change history (Cho &
+        Garcia-Molina). One change per `1 / default` seconds is used as prior,
+        so events that did not change yet are fetched rarely, but not never
+        """
+        n, x = self.n_checks, self.n_changes
+        changes = -n * math.log((n - x + 0.5) / (n + 0.5)) if n else 0.0
+        return (changes + 1) / (self.checked_sec + 1 / default)
+
+
+class RecrawlScheduler:
+    """
+    Args:
+      requests_per_hour (float): budget of profile fetches
+      min_interval_sec (float): minimum time between fetches of the same
+        event. Defaults to 1 hour
+      default_change_rate (float): changes per second of events without
+        history. Defaults to once per week
+      urgency_hours (float): events that start in `urgency_hours` are twice
+        as important as events that start much later. Defaults to 48
+    """
+
+    def __init__(
+        self,
+        requests_per_hour: float,
+        min_interval_sec: float = HOUR,
+        default_change_rate: float = 1 / (7 * DAY),
+        urgency_hours: float = 48,
+    ):
+        if requests_per_hour <= 0:
+            raise ValueError(f"requests_per_hour must be positive: {requests_per_hour}")
+        self.requests_per_hour = requests_per_hour
+        self.min_interval_sec = min_interval_sec
+        self.default_change_rate = default_change_rate
+        self.urgency_hours = urgency_hours
+
+        self.states: Dict[str, EventState] = {}
+        self.lock = threading.Lock()
+        # token bucket of the budget
+        self.tokens = 1.0
+        self.tokens_ts: Optional[float] = None
+        self.stop_event = threading.Event()
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    # --- observations ---
+
+    def observe(
+        self,
+        event: dm.Event,
+        source: str = SOURCE_PROFILE,
+        observed_ts: float = None,
+    ):
+        """
+        It updates the state of the event
+
+        Args:
+          event (Event): loaded profile or search result
+          source (str): "profile" (counts as fetch) or "search"
+          observed_ts (float): timestamp of observation. Defaults to now
+        """
+        now = time.time() if observed_ts is None else observed_ts
+        version = event.fingerprint
+        if source == SOURCE_SEARCH and event.hash is not None:
+            version = f"{event.hash}:{version}"
+
+        with self.lock:
+            state = self.states.get(str(event.id))
+            if state is None:
+                state = self.states[str(event.id)] = EventState(id=str(event.id))
+            if event.url:
+                state.url = event.url
+            if event.start_datetime is not None:
+                state.start_ts = event.start_datetime.timestamp()
+            if source == SOURCE_PROFILE:
+                state.fetched_ts = now
+                state.n_errors = 0
+
+            if version is None:
+                return
+            previous = state.versions.get(source)
+            if previous is not None and now > previous[1]:
+                state.n_checks += 1
+                state.checked_sec += now - previous[1]
+                if previous[0] != version:
+                    state.n_changes += 1
+            state.versions[source] = (version, now)
+
+    def observe_many(self, events: Iterable[dm.Event], source: str = SOURCE_SEARCH):
+        """It observes events (e.g. a page of `results_iter`)"""
+        now = time.time()
+        for event in events:
+            self.observe(event, source=source, observed_ts=now)
+
+    def observe_error(self, event_id: str, observed_ts: float = None):
+        """It postpones event which failed to load (exponential backoff)"""
+        now = time.time() if observed_ts is None else observed_ts
+        with self.lock:
+            state = self.states.get(str(event_id))
+            if state is not None:
+                state.n_errors += 1
+                state.fetched_ts = now
+
+    def remove(self, event_id: str):
+        with self.lock:
+            self.states.pop(str(event_id), None)
+
+    # --- priorities ---
+
+    def priority(self, state: EventState, now: float) -> float:
+        """
+        It returns priority of fetching the event now:
+        P(changed since last fetch) * urgency (0 - do not fetch: no URL,
+        already started or fetched recently)
+        """
+        if state.url is None:
+            return 0.0
+        if state.start_ts is not None and state.start_ts <= now:
+            return 0.0
+        if state.fetched_ts is None:
+            p_changed = 1.0
+        else:
+            age = now - state.fetched_ts
+            # failed fetches are retried after 1, 2, 4, ... min intervals
+            if age < self.min_interval_sec * (2 ** min(state.n_errors, 10)):
+                return 0.0
+            rate = state.change_rate(self.default_change_rate)
+            p_changed = 1 - math.exp(-rate * age)
+
+        if state.start_ts is None:
+            urgency = 1.0
+        else:
+            hours_to_start = (state.start_ts - now) / HOUR
+            urgency = 1 + self.urgency_hours / (self.urgency_hours + hours_to_start)
+        return p_changed * urgency
+
+    def queue(self, now: float = None, limit: int = None) -> List[Tuple[float, str]]:
+        """
+        It returns (priority, event id) of events to fetch, best first
+
+        Args:
+          now (float): timestamp. Defaults to now
+          limit (int): maximum number of events. Defaults to None (all)
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            items = (
+                (self.priority(state, now), event_id)
+                for event_id, state in self.states.items()
+            )
+            items = [i for i in items if i[0] > 0]
+        if limit is None:
+            return sorted(items, reverse=True)
+        return heapq.nlargest(limit, items)
+
+    # --- budget ---
+
+    def available_requests(self, now: float = None) -> int:
+        """It refills the token bucket and returns number of allowed requests"""
+        now = time.time() if now is None else now
+        with self.lock:
+            if self.tokens_ts is not None:
+                elapsed = max(0.0, now - self.tokens_ts)
+                # burst: at most a minute of budget (and at least 1 request)
+                burst = max(1.0, self.requests_per_hour / 60)
+                self.tokens = min(
+                    burst, self.tokens + elapsed * self.requests_per_hour / HOUR
+                )
+            self.tokens_ts = now
+            return int(self.tokens)
+
+    def next_batch(self, now: float = None) -> List[EventState]:
+        """It returns the best events that could be fetched within the budget"""
+        now = time.time() if now is None else now
+        n = self.available_requests(now)
+        if n < 1:
+            return []
+        batch = [self.states[i] for _, i in self.queue(now, limit=n)]
+        with self.lock:
+            self.tokens -= len(batch)
+        return batch
+
+    def run(
+        self,
+        client,
+        max_requests: int = None,
+        fields: Iterable[str] = None,
+        keep_raw: bool = False,
+        callback=None,
+    ) -> int:
+        """
+        It fetches profiles of the best events within budget until `stop` is
+        called (or `max_requests` are made)
+
+        Args:
+          client (Eventbrite): client used to load profiles
+          max_requests (int): Defaults to None (run forever)
+          fields (Iterable[str]): fields of `EventProfile.load`
+          keep_raw (bool): `keep_raw` of `EventProfile.load`. Defaults to False
+          callback (Callable[[Event], None]): called with every loaded event
+
+        Returns:
+          Number of made requests
+        """
+        n_requests = 0
+        self.stop_event.clear()
+        while not self.stop_event.is_set():
+            if max_requests is not None and n_requests >= max_requests:
+                break
+            batch = self.next_batch()
+            if max_requests is not None:
+                batch = batch[: max_requests - n_requests]
+            if not batch:
+                # wait for the next token
+                self.stop_event.wait(HOUR / self.requests_per_hour)
+                continue
+
+            for state in batch:
+                n_requests += 1
+                try:
+                    event = client.event_profile.load(
+                        state.url, fields=fields, keep_raw=keep_raw
+                    )
+                except Exception as e:
+                    log.warning(f"failed to load event {state.id}: {e!r}")
+                    self.observe_error(state.id)
+                    continue
+                self.observe(event, source=SOURCE_PROFILE)
+                if callback is not None:
+                    callback(event)
+        return n_requests
+
+    def stop(self):
+        self.stop_event.set()
+
+    # --- persistence ---
+
+    def save(self, fpath: str):
+        """It writes states of events to JSON lines file"""
+        with self.lock:
+            states = [asdict(s) for s in self.states.values()]
+        with open(f"{fpath}.tmp", "w", encoding="utf-8") as f:
+            for state in states:
+                f.write(json.dumps(state) + "\n")
+        os.replace(f"{fpath}.tmp", fpath)
+
+    def load(self, fpath: str):
+        """It reads states of events written by `save`"""
+        with open(fpath, encoding="utf-8") as f:
+            for line in f:
+                data = json.loads(line)
+                data["versions"] = {k: tuple(v) for k, v in data["versions"].items()}
+                state = EventState(**data)
+                with self.lock:
+                    self.states[state.id] = state
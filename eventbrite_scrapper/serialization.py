@@ -1,15 +1,52 @@
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Iterable, Iterator, Sequence, Union, List
+from typing import Set, Tuple, TYPE_CHECKING
+import dataclasses
 import datetime
+import hashlib
+import operator
 
 from . import data_models as dm
+from . import utils
 
-import pytz
+if TYPE_CHECKING:
+    from .interning import Interner
+
+pytz = utils.lazy_import("pytz")
+duplicates = utils.lazy_import(f"{__package__}.duplicates")
 
 log = logging.getLogger("eventbrite.serialization")
 
+# fields of `Event` that are always serialized
+EVENT_KEY_FIELDS = ("id", "hash", "name", "url")
+
+# `merge_events` precedence:
+# - fields below are taken from profile (if not None)
+PROFILE_PRECEDENCE_FIELDS = ("long_description", "is_cancelled")
+# - everything else is taken from search result (if not None)
+# `Event` fields that require loading of the profile
+PROFILE_FIELDS = ("long_description", "primary_venue", "organizer")
+
+# `Event` fields that are not part of the content (see `event_fingerprint`)
+NON_CONTENT_FIELDS = ("raw_search_data", "raw_profile_data", "fingerprint", "minhash")
+
+
+def serialize_event_search_result(
+    data: Dict[str, Any], interner: "Interner" = None, signatures: bool = False
+) -> dm.Event:
+    """
+    It converts search result (search page or API) into Event
 
-def serialize_event_search_result(data: Dict[str, Any]) -> dm.Event:
+    Args:
+      data (Dict[str, Any]): search result
+      interner (Interner): if given, identical venues, addresses and tags of
+        different events are shared. Defaults to None
+      signatures (bool): whether to compute `minhash` signature (see
+        `duplicates.event_minhash`). Defaults to False
+
+    Returns:
+      Event
+    """
     _id = data.get("id")
     if not _id:
         _id = data.get("eventbrite_event_id")
@@ -21,17 +58,23 @@ def serialize_event_search_result(data: Dict[str, Any]) -> dm.Event:
     start_dt = norm_event_datetime(data["start_date"], data["start_time"], tz)
     end_dt = norm_event_datetime(data["end_date"], data["end_time"], tz)
 
-    published_dt = datetime.datetime.strptime(
-        data.get("published"), "%Y-%m-%dT%H:%M:%SZ"
-    )
-    published_dt = published_dt.replace(tzinfo=pytz.utc)
+    published_dt = norm_utc_datetime(data.get("published"))
+
+    if interner is None:
+        make_tag, make_address, make_venue = dm.EventTag, dm.Address, dm.Venue
+    else:
+        make_tag, make_address, make_venue = (
+            interner.tag,
+            interner.address,
+            interner.venue,
+        )
 
     tags_categories = []
     tags_formats = []
     tags_by_organizer = []
-    for i in data.get("tags", []):
+    for i in data.get("tags") or []:
         i: dict
-        tag = dm.EventTag(id=i["tag"], text=i["display_name"])
+        tag = make_tag(id=i["tag"], text=i["display_name"])
         if i.get("prefix", "") == "EventbriteCategory":
             tags_categories.append(tag)
         elif i.get("prefix", "") == "EventbriteFormat":
@@ -39,17 +82,20 @@ def serialize_event_search_result(data: Dict[str, Any]) -> dm.Event:
         elif i.get("_type", "") == "tag":
             tags_by_organizer.append(tag)
 
-    venue = data.get("primary_venue", {})
+    # expansions (venue, image, ...) could be missing depending on API request
+    venue = data.get("primary_venue") or {}
+    address = venue.get("address") or {}
+    image = data.get("image") or {}
 
     event = dm.Event(
         id=_id,
-        hash=data["dedup"]["hash"],
+        hash=(data.get("dedup") or {}).get("hash"),
         name=data["name"],
         url=data["url"],
         parent_event_url=data.get("parent_url"),
         is_online_event=data["is_online_event"],
-        long_description=data["full_description"],  # null
-        short_description=data["summary"],
+        long_description=data.get("full_description"),  # null
+        short_description=data.get("summary"),
         # dates
         start_datetime=start_dt,
         end_datetime=end_dt,
@@ -62,34 +108,30 @@ def serialize_event_search_result(data: Dict[str, Any]) -> dm.Event:
         tags_categories=tuple(tags_categories),
         tags_formats=tuple(tags_formats),
         tags_by_organizer=tuple(tags_by_organizer),
-        primary_venue=dm.Venue(
+        primary_venue=make_venue(
             id=venue.get("id"),
             name=venue.get("name"),
-            address=dm.Address(
-                city=venue.get("address", {}).get("city"),
+            address=make_address(
+                city=address.get("city"),
                 # coordinates
-                latitude=float(venue.get("address", {}).get("latitude")),
-                longitude=float(venue.get("address", {}).get("longitude")),
+                latitude=to_float(address.get("latitude")),
+                longitude=to_float(address.get("longitude")),
                 # address parts
-                country=venue.get("address", {}).get("country"),
-                region=venue.get("address", {}).get("region"),
-                postal_code=venue.get("address", {}).get("postal_code"),
-                address_1=venue.get("address", {}).get("address_1"),
-                address_2=venue.get("address", {}).get("address_2"),
+                country=address.get("country"),
+                region=address.get("region"),
+                postal_code=address.get("postal_code"),
+                address_1=address.get("address_1"),
+                address_2=address.get("address_2"),
                 # address display
-                localized_area_display=venue.get("address", {}).get(
-                    "localized_area_display"
-                ),
-                localized_address_display=venue.get("address", {}).get(
-                    "localized_address_display"
-                ),
+                localized_area_display=address.get("localized_area_display"),
+                localized_address_display=address.get("localized_address_display"),
             ),
             url=None,
         ),
         image=dm.Image(
-            id=data.get("image", {}).get("id"),
-            url=data.get("image", {}).get("url"),
-            original_url=data.get("image", {}).get("original", {}).get("url"),
+            id=image.get("id"),
+            url=image.get("url"),
+            original_url=(image.get("original") or {}).get("url"),
         ),
         tickets_url=data.get("tickets_url"),
         tickets_by=data.get("tickets_by"),
@@ -99,11 +141,35 @@ def serialize_event_search_result(data: Dict[str, Any]) -> dm.Event:
         # debug
         raw_search_data=data,
     )
+    set_event_hashes(event, signatures)
 
     return event
 
 
-def serialize_event_profile(data: Dict[str, Any]) -> dm.Event:
+def serialize_event_profile(
+    data: Dict[str, Any],
+    fields: Optional[Iterable[str]] = None,
+    keep_raw: Union[bool, Sequence[str]] = True,
+    signatures: bool = False,
+) -> dm.Event:
+    """
+    It converts `window.__SERVER_DATA__` of the event page into Event
+
+    Args:
+      data (Dict[str, Any]): data of the event page
+      fields (Iterable[str]): names of `Event` fields to serialize, other fields
+        are left empty (`id`, `hash`, `name`, `url` are always set).
+        Defaults to None (all fields)
+      keep_raw (Union[bool, Sequence[str]]): whether to keep page data in
+        `raw_profile_data`. If list of keys is given, only these top level keys
+        are kept. Defaults to True
+      signatures (bool): see `serialize_event_search_result`. Defaults to False
+
+    Returns:
+      Event
+    """
+    fields = check_event_fields(fields)
+
     # shortcuts
     d_event: dict = data["event"]
     organizer: dict = data["organizer"]
@@ -113,25 +179,15 @@ def serialize_event_profile(data: Dict[str, Any]) -> dm.Event:
     event_map: dict = comp["eventMap"]
 
     # main
-    start_datetime = datetime.datetime.strptime(
-        d_event.get("start", {}).get("utc"), "%Y-%m-%dT%H:%M:%SZ"
-    )
-    start_datetime = start_datetime.replace(tzinfo=pytz.utc)
-
-    end_datetime = datetime.datetime.strptime(
-        d_event.get("end", {}).get("utc"), "%Y-%m-%dT%H:%M:%SZ"
-    )
-    end_datetime = end_datetime.replace(tzinfo=pytz.utc)
+    start_datetime = norm_utc_datetime(d_event.get("start", {}).get("utc"))
+    end_datetime = norm_utc_datetime(d_event.get("end", {}).get("utc"))
 
     # components.eventDescription.structuredContent.modules
-    long_description = ""
-    for i in event_desc.get("structuredContent", {}).get("modules", []):
-        if i.get("type") == "text":
-            long_description += f'<div>{i["text"]}</div>\n'
-        elif i.get("type") == "image":
-            long_description += f'<img href="{i["url"]}">\n'
-        else:
-            log.warning(f"Unknown content type: {i}")
+    long_description = None
+    if fields is None or "long_description" in fields:
+        long_description = build_long_description(
+            event_desc.get("structuredContent", {}).get("modules", [])
+        )
 
     event = dm.Event(
         id=d_event["id"],
@@ -180,6 +236,15 @@ def serialize_event_profile(data: Dict[str, Any]) -> dm.Event:
             facebook_handler=organizer.get("orgFacebook"),
             organization_website=organizer.get("orgWebsite"),
         ),
+        organizer=dm.Organizer(
+            id=organizer["id"],
+            name=organizer["name"],
+            description=organizer["description"],
+            url=organizer["url"],
+            twitter_handler=organizer.get("orgTwitter"),
+            facebook_handler=organizer.get("orgFacebook"),
+            organization_website=organizer.get("orgWebsite"),
+        ),
         image=dm.Image(
             id=None,  # too complex - unreliable
             url=None,  # too complex - unreliable
@@ -192,16 +257,133 @@ def serialize_event_profile(data: Dict[str, Any]) -> dm.Event:
         language=None,  # not included
         # debug
         raw_search_data=None,  # not relevant
-        raw_profile_data=data,
+        raw_profile_data=select_raw_data(data, keep_raw),
     )
+    if fields is not None:
+        clear_event_fields(event, keep=fields)
+    set_event_hashes(event, signatures)
+
+    return event
+
+
+def merge_events(
+    search: dm.Event, profile: dm.Event, signatures: bool = False
+) -> dm.Event:
+    """
+    It merges search result and profile of the same event into new Event
+
+    Precedence rules:
+      - `long_description`, `is_cancelled`: profile, then search
+      - `primary_venue`: venue and address of search result; only
+        `address.full_address` is taken from profile (profile venue holds
+        organizer data, so it is used only if search result has no venue)
+      - `organizer`: profile (search results do not include it)
+      - `raw_search_data` / `raw_profile_data`: from search / profile
+      - other fields: search (coordinates, tags, timezone, hash, ...), then profile
+
+    Args:
+      search (Event): event from search results
+      profile (Event): event loaded with `EventProfile.load`
+      signatures (bool): see `serialize_event_search_result`. Defaults to False
+
+    Returns:
+      New Event (`search` and `profile` are not modified)
+    """
+    if search.id != profile.id:
+        raise ValueError(f"Events are different: {search.id} != {profile.id}")
+
+    values = {}
+    for f in dataclasses.fields(dm.Event):
+        if not f.init:
+            continue
+        search_value = getattr(search, f.name)
+        profile_value = getattr(profile, f.name)
+        if f.name in PROFILE_PRECEDENCE_FIELDS:
+            first, second = profile_value, search_value
+        else:
+            first, second = search_value, profile_value
+        values[f.name] = first if first is not None else second
+
+    values["raw_search_data"] = search.raw_search_data
+    values["raw_profile_data"] = profile.raw_profile_data
+    values["primary_venue"] = merge_venues(search.primary_venue, profile.primary_venue)
 
+    event = dm.Event(**values)
+    set_event_hashes(event, signatures)
     return event
 
 
+def merge_venues(search: Optional[dm.Venue], profile: Optional[dm.Venue]):
+    """It merges venues according to `merge_events` rules"""
+    if not isinstance(profile, dm.Venue):
+        return search
+    if not isinstance(search, dm.Venue):
+        return profile
+
+    address, profile_address = search.address, profile.address
+    if (
+        isinstance(address, dm.Address)
+        and isinstance(profile_address, dm.Address)
+        and address.full_address is None
+        and profile_address.full_address is not None
+    ):
+        address = dataclasses.replace(
+            address, full_address=profile_address.full_address
+        )
+        return dataclasses.replace(search, address=address)
+    return search
+
+
+def build_long_description(modules: List[Dict[str, Any]]) -> str:
+    """It builds HTML description from `structuredContent` modules"""
+    parts = []
+    for i in modules:
+        if i.get("type") == "text":
+            parts.append(f'<div>{i["text"]}</div>\n')
+        elif i.get("type") == "image":
+            parts.append(f'<img href="{i["url"]}">\n')
+        else:
+            log.warning(f"Unknown content type: {i}")
+    return "".join(parts)
+
+
+def check_event_fields(fields: Optional[Iterable[str]]) -> Optional[Set[str]]:
+    """It validates names of `Event` fields (None means all fields)"""
+    if fields is None:
+        return None
+    fields = set(fields)
+    unknown = fields.difference(f.name for f in dataclasses.fields(dm.Event))
+    if unknown:
+        raise ValueError(f"Unknown Event fields: {sorted(unknown)}")
+    return fields
+
+
+def clear_event_fields(event: dm.Event, keep: Set[str]):
+    """It sets to None all fields of `event` that are not in `keep`"""
+    for f in dataclasses.fields(event):
+        if f.name in EVENT_KEY_FIELDS or f.name in keep:
+            continue
+        if f.name in ("raw_search_data", "raw_profile_data"):
+            continue
+        setattr(event, f.name, None)
+
+
+def select_raw_data(
+    data: Dict[str, Any],
+    keep_raw: Union[bool, Sequence[str]],
+) -> Optional[Dict[str, Any]]:
+    """It returns raw data (or its top level `keep_raw` keys) to be kept in Event"""
+    if keep_raw is True:
+        return data
+    if not keep_raw:
+        return None
+    return {k: data[k] for k in keep_raw if k in data}
+
+
 def norm_event_datetime(
     date_str: str,
     time_str: str,
-    tz: pytz.BaseTzInfo,
+    tz: "pytz.BaseTzInfo",
 ) -> datetime.datetime:
     dt_str = f"{date_str} {time_str}"
     dt = datetime.datetime.strptime(dt_str, "%Y-%m-%d %H:%M")
@@ -210,3 +392,99 @@ def norm_event_datetime(
     dt = dt.astimezone(pytz.utc)
 
     return dt
+
+
+def norm_utc_datetime(value: Optional[str]) -> Optional[datetime.datetime]:
+    """It parses `%Y-%m-%dT%H:%M:%SZ` string into tz-aware datetime (or None)"""
+    if not value:
+        return None
+    dt = datetime.datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ")
+    return dt.replace(tzinfo=pytz.utc)
+
+
+def to_float(value: Any) -> Optional[float]:
+    return float(value) if value is not None else None
+
+
+def content_paths(cls: type = dm.Event, prefix: str = "") -> Tuple[str, ...]:
+    """It returns dotted paths of content fields of `cls` (nested dataclasses
+    are expanded, e.g. "primary_venue.address.city")"""
+    paths = []
+    for f in dataclasses.fields(cls):
+        if f.name in NON_CONTENT_FIELDS:
+            continue
+        if isinstance(f.type, type) and dataclasses.is_dataclass(f.type):
+            paths.extend(content_paths(f.type, f"{prefix}{f.name}."))
+        else:
+            paths.append(f"{prefix}{f.name}")
+    return tuple(paths)
+
+
+# dotted paths of `Event` content fields
+CONTENT_PATHS = content_paths()
+_CONTENT_GETTERS = tuple(operator.attrgetter(p) for p in CONTENT_PATHS)
+_SCALAR_TYPES = (str, int, float, bool)
+
+
+def canonical_value(value: Any) -> str:
+    """It returns stable string representation of the field value"""
+    if type(value) in _SCALAR_TYPES:
+        return repr(value)
+    # NOTE: `Venue.address` defaults to `Address` class, not instance
+    if value is None or isinstance(value, type):
+        return "None"
+    if isinstance(value, datetime.datetime):
+        # the same instant is equal regardless of tzinfo implementation
+        if value.tzinfo is not None:
+            value = value.astimezone(datetime.timezone.utc)
+        return value.isoformat()
+    if isinstance(value, dm.EventTag):
+        return repr((value.id, value.text))
+    if isinstance(value, (tuple, list)):
+        return "(" + ",".join([canonical_value(v) for v in value]) + ")"
+    if dataclasses.is_dataclass(value):
+        return canonical_value(
+            tuple(getattr(value, f.name) for f in dataclasses.fields(value))
+        )
+    return repr(value)
+
+
+def event_content_values(event: dm.Event) -> List[str]:
+    """It returns canonical values of `CONTENT_PATHS` fields"""
+    values = []
+    for getter in _CONTENT_GETTERS:
+        try:
+            value = getter(event)
+        except AttributeError:  # e.g. `primary_venue` is None
+            value = None
+        values.append(canonical_value(value))
+    return values
+
+
+def event_content(event: dm.Event) -> Iterator[Tuple[str, str]]:
+    """It yields (dotted path, canonical value) of all content fields"""
+    return zip(CONTENT_PATHS, event_content_values(event))
+
+
+def event_fingerprint(event: dm.Event) -> str:
+    """It returns hash of the event content (raw data are not included)"""
+    content = "\x00".join(event_content_values(event)).encode("utf-8")
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+def set_event_hashes(event: dm.Event, signatures: bool = False):
+    """It sets `fingerprint` (and `minhash` if `signatures`) of the event"""
+    event.fingerprint = event_fingerprint(event)
+    if signatures:
+        event.minhash = duplicates.event_minhash(event)
+
+
+def event_field_digests(event: dm.Event, digest_size: int = 8) -> bytes:
+    """It returns concatenated digests of `CONTENT_PATHS` values (`digest_size`
+    bytes each)"""
+    return b"".join(
+        [
+            hashlib.blake2b(value.encode("utf-8"), digest_size=digest_size).digest()
+            for value in event_content_values(event)
+        ]
+    )
@@ -0,0 +1,273 @@
+"""Synthetic eventbrite payloads used by offline tests and benchmarks"""
+import datetime
+import json
+import re
+import threading
+from urllib.parse import urlparse, parse_qsl
+from json import dumps as json_dumps
+from typing import List, Dict, Any
+
+from requests.cookies import RequestsCookieJar
+
+
+def make_search_result(n: int, venue_n: int = None) -> Dict[str, Any]:
+    """
+    It builds a single search result in the format returned by the search API
+
+    Args:
+      n (int): sequence number used to build unique ids and names
+      venue_n (int): venue sequence number. Defaults to `n`
+
+    Returns:
+      A dictionary as found in `events.results` of the search response
+    """
+    venue_n = n if venue_n is None else venue_n
+    return {
+        "id": str(100000000000 + n),
+        "eid": str(100000000000 + n),
+        "name": f"Event number {n}",
+        "url": f"https://www.eventbrite.com/e/event-number-{n}-{100000000000 + n}",
+        "parent_url": None,
+        "is_online_event": False,
+        "full_description": None,
+        "summary": f"Summary of event number {n}",
+        "timezone": "America/Los_Angeles",
+        "start_date": "2023-03-20",
+        "start_time": "19:00",
+        "end_date": "2023-03-20",
+        "end_time": "22:00",
+        "published": "2023-02-01T10:00:00Z",
+        "hide_start_date": False,
+        "hide_end_date": False,
+        "is_cancelled": None,
+        "dedup": {"hash": f"hash-{n}"},
+        "tags": [
+            {
+                "prefix": "EventbriteCategory",
+                "tag": "EventbriteCategory/103",
+                "display_name": "Music",
+            },
+            {
+                "prefix": "EventbriteFormat",
+                "tag": "EventbriteFormat/6",
+                "display_name": "Performance",
+            },
+            {"_type": "tag", "tag": "OrganizerTag/jazz", "display_name": "jazz"},
+        ],
+        "primary_venue": {
+            "id": str(5000 + venue_n),
+            "name": f"Venue {venue_n}",
+            "address": {
+                "city": "San Francisco",
+                "latitude": "37.7749",
+                "longitude": "-122.4194",
+                "country": "US",
+                "region": "CA",
+                "postal_code": "94103",
+                "address_1": f"{venue_n} Market St",
+                "address_2": None,
+                "localized_area_display": "San Francisco, CA",
+                "localized_address_display": f"{venue_n} Market St, San Francisco",
+            },
+        },
+        "image": {
+            "id": str(9000 + n),
+            "url": f"https://img.evbuc.com/{n}.jpg",
+            "original": {"url": f"https://img.evbuc.com/{n}-original.jpg"},
+        },
+        "tickets_url": f"https://www.eventbrite.com/checkout/{n}",
+        "tickets_by": "Eventbrite",
+        "checkout_flow": "widget",
+        "series_id": None,
+        "language": "en-us",
+    }
+
+
+def make_search_api_response(results: List[dict], page: int = 2) -> dict:
+    return {
+        "events": {
+            "results": results,
+            "pagination": {
+                "object_count": len(results),
+                "page_number": page,
+                "page_size": len(results),
+                "page_count": 1,
+            },
+        }
+    }
+
+
+def make_search_page_html(
+    results: List[dict],
+    csrf_token: str = "csrf-token",
+    place_id: str = "85922583",
+    object_count: int = None,
+) -> str:
+    """It builds search page HTML with results embedded in `__SERVER_DATA__`"""
+    server_data = {
+        "placeId": place_id,
+        "search_data": {
+            "events": {
+                "results": results,
+                "pagination": {
+                    "object_count": (
+                        len(results) if object_count is None else object_count
+                    ),
+                    "page_number": 1,
+                    "page_size": 20,
+                },
+            }
+        },
+    }
+    return (
+        "<html><head><title>Search</title></head><body>"
+        f'<form><input type="hidden" name="csrfmiddlewaretoken" value="{csrf_token}">'
+        "</form>"
+        f"<script>window.__SERVER_DATA__ = {json.dumps(server_data)};</script>"
+        "<div>" + "footer " * 5000 + "</div>"
+        "</body></html>"
+    )
+
+
+def make_event_page_data(n: int, modules: int = 3) -> dict:
+    """It builds `__SERVER_DATA__` payload as found on the event page"""
+    structured_modules = []
+    for i in range(modules):
+        if i % 2:
+            structured_modules.append(
+                {"type": "image", "url": f"https://img.evbuc.com/{n}-{i}.jpg"}
+            )
+        else:
+            structured_modules.append({"type": "text", "text": f"<p>Part {i}</p>"})
+
+    return {
+        "event": {
+            "id": str(100000000000 + n),
+            "name": f"Event number {n}",
+            "url": f"https://www.eventbrite.com/e/event-number-{n}-{100000000000 + n}",
+            "isOnlineEvent": False,
+            "start": {"utc": "2023-03-21T02:00:00Z", "timezone": "America/Los_Angeles"},
+            "end": {"utc": "2023-03-21T05:00:00Z", "timezone": "America/Los_Angeles"},
+            "hideStartDate": False,
+            "hideEndDate": False,
+            "compactCheckoutDisqualifications": {"is_canceled": False},
+        },
+        "organizer": {
+            "id": str(7000 + n),
+            "name": f"Organizer {n}",
+            "description": f"Organizer {n} description",
+            "url": f"https://www.eventbrite.com/o/organizer-{7000 + n}",
+            "orgTwitter": "organizer",
+            "orgFacebook": None,
+            "orgWebsite": "https://example.com",
+        },
+        "components": {
+            "eventDescription": {
+                "summary": f"Summary of event number {n}",
+                "structuredContent": {"modules": structured_modules},
+            },
+            "eventMap": {"venueAddress": f"{n} Market St, San Francisco, CA 94103"},
+        },
+    }
+
+
+def make_event_page_html(n: int, modules: int = 3) -> str:
+    data = make_event_page_data(n, modules=modules)
+    return (
+        "<html><head><title>Event</title></head><body>"
+        f"<script>window.__SERVER_DATA__ = {json.dumps(data)};</script>"
+        "<div>" + "footer " * 5000 + "</div>"
+        "</body></html>"
+    )
+
+
+class FakeResponse:
+    def __init__(self, content: bytes, status_code: int = 200):
+        self.content = content
+        self.status_code = status_code
+        self.bytes_read = 0
+        self.closed = False
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size: int = 1):
+        for i in range(0, len(self.content), chunk_size):
+            if self.closed:
+                return
+            chunk = self.content[i : i + chunk_size]
+            self.bytes_read += len(chunk)
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSession:
+    """
+    Stand-in for `requests.Session` serving synthetic search and event pages
+
+    Args:
+      n_results (int): total number of events available in search
+      page1_size (int): number of events embedded in the search page HTML
+    """
+
+    def __init__(
+        self,
+        n_results: int = 50,
+        page1_size: int = 20,
+        results_per_day: int = None,
+    ):
+        self.n_results = n_results
+        self.page1_size = page1_size
+        self.results_per_day = results_per_day
+        self.lock = threading.Lock()
+        self.calls = []
+        self.responses = []
+        self.cookies = RequestsCookieJar()
+        self.cookies.set("csrftoken", "cookie-token")
+
+    def search_results(self, dt_start: str, dt_end: str) -> List[int]:
+        """It returns sequence numbers of events found in the date range"""
+        if not self.results_per_day:
+            return list(range(self.n_results))
+
+        start = datetime.date.fromisoformat(dt_start).toordinal()
+        end = datetime.date.fromisoformat(dt_end).toordinal()
+        return [
+            (day - 700000) * 1000 + i
+            for day in range(start, end + 1)
+            for i in range(self.results_per_day)
+        ]
+
+    def get(self, url: str, headers: dict = None, **kwargs) -> FakeResponse:
+        with self.lock:
+            self.calls.append(("GET", url, None))
+        if "/e/" in url:
+            n = int(re.search(r"(\d+)/?$", url).group(1)) - 100000000000
+            html = make_event_page_html(n)
+        else:
+            params = dict(parse_qsl(urlparse(url).query))
+            found = self.search_results(params["start_date"], params["end_date"])
+            results = [make_search_result(i) for i in found[: self.page1_size]]
+            html = make_search_page_html(results, object_count=len(found))
+
+        r = FakeResponse(html.encode("utf-8"))
+        with self.lock:
+            self.responses.append(r)
+        return r
+
+    def post(self, url: str, json: dict = None, headers: dict = None, **kwargs):
+        with self.lock:
+            self.calls.append(("POST", url, json))
+        search = json["event_search"]
+        page, page_size = search["page"], search["page_size"]
+        found = self.search_results(
+            search["date_range"]["from"], search["date_range"]["to"]
+        )
+        start = (page - 1) * page_size
+        results = [make_search_result(i) for i in found[start : start + page_size]]
+        body = make_search_api_response(results, page=page)
+        body["events"]["pagination"]["object_count"] = len(found)
+        return FakeResponse(json_dumps(body).encode("utf-8"))
+
@@ -0,0 +1,79 @@
+import dataclasses
+
+import pytest
+
+from eventbrite_scrapper.archive import ArchiveReader, ArchiveWriter
+from eventbrite_scrapper.serialization import (
+    serialize_event_profile,
+    serialize_event_search_result,
+    merge_events,
+)
+from eventbrite_scrapper.tests.fixtures import make_event_page_data, make_search_result
+
+
+def make_event(n: int):
+    search = serialize_event_search_result(make_search_result(n, venue_n=n % 3))
+    profile = serialize_event_profile(make_event_page_data(n))
+    return merge_events(search, profile)
+
+
+def without_raw(event):
+    return dataclasses.replace(event, raw_search_data=None, raw_profile_data=None)
+
+
+def test_archive_roundtrip(tmp_path):
+    fpath = str(tmp_path / "events.ebar")
+    events = [make_event(n) for n in (5, 1, 3)]
+    with ArchiveWriter(fpath) as writer:
+        writer.extend(events)
+
+    with ArchiveReader(fpath) as reader:
+        assert len(reader) == 3
+        assert list(reader.ids()) == sorted(e.id for e in events)
+        assert reader.get(events[0].id) == without_raw(events[0])
+        assert reader.get("missing") is None
+        assert [e.id for e in reader] == sorted(e.id for e in events)
+
+        lats = dict(reader.column("primary_venue.address.latitude"))
+        assert lats[events[1].id] == events[1].primary_venue.address.latitude
+        starts = dict(reader.column("start_datetime"))
+        assert starts[events[2].id] == events[2].start_datetime
+        with pytest.raises(KeyError):
+            list(reader.column("raw_search_data"))
+
+
+def test_archive_append(tmp_path):
+    fpath = str(tmp_path / "events.ebar")
+    with ArchiveWriter(fpath) as writer:
+        writer.extend(make_event(n) for n in range(3))
+
+    changed = dataclasses.replace(make_event(1), name="Renamed", is_cancelled=True)
+    with ArchiveWriter(fpath) as writer:
+        writer.extend([changed, make_event(3)])
+
+    with ArchiveReader(fpath) as reader:
+        assert len(reader) == 4
+        assert reader.get(changed.id).name == "Renamed"
+        assert reader.get(changed.id).is_cancelled is True
+        assert reader.get(make_event(0).id) == without_raw(make_event(0))
+
+
+def test_archive_not_closed(tmp_path):
+    fpath = str(tmp_path / "events.ebar")
+    writer = ArchiveWriter(fpath)
+    writer.append(make_event(0))
+    writer.f.close()  # crash before `close`
+
+    with ArchiveReader(fpath) as reader:
+        assert len(reader) == 0
+
+    with ArchiveWriter(fpath) as writer:
+        writer.extend(make_event(n) for n in range(1, 3))
+    writer = ArchiveWriter(fpath)
+    # magic in strings is not taken for trailer
+    writer.append(dataclasses.replace(make_event(1), name="EBAR"))
+    writer.f.close()
+
+    with ArchiveReader(fpath) as reader:
+        assert list(reader.ids()) == [make_event(1).id, make_event(2).id]
+        assert reader.get(make_event(1).id) == without_raw(make_event(1))
@@ -0,0 +1,71 @@
+from eventbrite_scrapper import Eventbrite
+from eventbrite_scrapper import data_models as dm
+from eventbrite_scrapper.checkpoint import FileCheckpointStore, MemoryCheckpointStore
+from eventbrite_scrapper.tests.fixtures import FakeSession
+
+SEARCH_PARAMS = {
+    "region": "ca--san-francisco",
+    "dt_start": "2023-03-20",
+    "dt_end": "2023-03-25",
+    "category": dm.Category.MUSIC,
+}
+
+
+def make_client(**kwargs) -> Eventbrite:
+    client = Eventbrite(session=FakeSession(**kwargs))
+    client.delay_between_fetches = (0, 0)
+    return client
+
+
+def test_resume_from_checkpoint(tmp_path):
+    store = FileCheckpointStore(str(tmp_path))
+
+    client = make_client(n_results=100)
+    seen = []
+    for events in client.search_events.results_iter(**SEARCH_PARAMS, checkpoint=store):
+        seen.append(events)
+        if len(seen) == 3:
+            break  # crash while processing page 3
+
+    client = make_client(n_results=100)
+    store = FileCheckpointStore(str(tmp_path))
+    resumed = list(client.search_events.results_iter(**SEARCH_PARAMS, checkpoint=store))
+
+    assert resumed[0] == seen[2]
+    assert len(resumed) == 3
+    assert sum(len(e) for e in seen[:2] + resumed) == 100
+    # page 1 was not fetched again
+    assert [c[0] for c in client.session.calls] == ["POST"] * 3
+
+
+def test_cursor_round_trip():
+    client = make_client(n_results=60)
+    search = client.search_events
+    pages = search.results_iter(**SEARCH_PARAMS)
+    next(pages)
+    next(pages)
+
+    cursor = dm.SearchCursor.from_dict(search.cursor.as_dict())
+
+    assert cursor == search.cursor
+    assert cursor.offset == 20
+
+
+def test_sweep_skips_finished_queries():
+    store = MemoryCheckpointStore()
+    queries = [
+        {"region": "ca--san-francisco"},
+        {"region": "ny--new-york"},
+    ]
+    params = {"dt_start": "2023-03-20", "dt_end": "2023-03-25"}
+
+    client = make_client(n_results=30)
+    for query, _ in client.search_events.sweep(queries[:1], checkpoint=store, **params):
+        pass
+    client = make_client(n_results=30)
+    regions = {
+        query["region"]
+        for query, _ in client.search_events.sweep(queries, checkpoint=store, **params)
+    }
+
+    assert regions == {"ny--new-york"}
@@ -0,0 +1,97 @@
+import dataclasses
+
+import pytest
+
+from eventbrite_scrapper.archive import ArchiveReader, ArchiveWriter
+from eventbrite_scrapper.diff import ADDED, CHANGED, REMOVED, diff_events, diff_sorted
+from eventbrite_scrapper.serialization import serialize_event_search_result
+from eventbrite_scrapper.tests.fixtures import make_search_result
+
+
+def make_snapshots():
+    old = [serialize_event_search_result(make_search_result(n)) for n in range(5)]
+    result = make_search_result(2)
+    result["name"] = "Renamed"
+    result["primary_venue"]["address"]["city"] = "Oakland"
+    new = [old[0], old[1], serialize_event_search_result(result), old[4]]
+    new.append(serialize_event_search_result(make_search_result(7)))
+    return old, new
+
+
+def summary(changes):
+    return sorted((c.kind, c.id, c.fields) for c in changes)
+
+
+EXPECTED = [
+    (ADDED, "100000000007", ()),
+    (CHANGED, "100000000002", ("name", "primary_venue.address.city")),
+    (REMOVED, "100000000003", ()),
+]
+
+
+def test_diff_sorted():
+    old, new = make_snapshots()
+
+    assert summary(diff_sorted(old, new)) == EXPECTED
+    assert summary(diff_sorted(old, new, fields=["image.url"])) == [
+        EXPECTED[0],
+        EXPECTED[2],
+    ]
+    with pytest.raises(ValueError):
+        list(diff_sorted(old[::-1], new))
+
+
+def test_diff_events_unsorted():
+    old, new = make_snapshots()
+
+    assert summary(diff_events(old[::-1], new[::-1])) == EXPECTED
+
+
+def test_diff_archives(tmp_path):
+    old, new = make_snapshots()
+    for name, events in (("old", old), ("new", new)):
+        with ArchiveWriter(str(tmp_path / name)) as writer:
+            writer.extend(events)
+
+    with ArchiveReader(str(tmp_path / "old")) as r1:
+        with ArchiveReader(str(tmp_path / "new")) as r2:
+            assert summary(diff_sorted(r1, r2)) == EXPECTED
+
+
+def test_fingerprint_ignores_raw_data():
+    event = serialize_event_search_result(make_search_result(1))
+    copy = dataclasses.replace(event, raw_search_data=None)
+
+    assert list(diff_sorted([event], [copy])) == []
+
+
+def test_modified_copy_is_changed():
+    event = serialize_event_search_result(make_search_result(1))
+    copy = dataclasses.replace(event, name="Renamed")
+
+    assert copy.fingerprint is None
+    assert summary(diff_sorted([event], [copy])) == [
+        (CHANGED, "100000000001", ("name",))
+    ]
+
+
+def test_modified_in_place_is_changed():
+    old = serialize_event_search_result(make_search_result(1))
+    new = serialize_event_search_result(make_search_result(1))
+    assert old.fingerprint == new.fingerprint
+
+    # stored fingerprint is stale after in-place modification
+    new.name = "Renamed"
+    new.primary_venue.address.city = "Oakland"
+
+    expected = [(CHANGED, "100000000001", ("name", "primary_venue.address.city"))]
+    assert summary(diff_sorted([old], [new])) == expected
+    assert summary(diff_events([old], [new])) == expected
+
+
+def test_fingerprint_is_not_exported():
+    event = serialize_event_search_result(make_search_result(1))
+
+    assert event.fingerprint is not None
+    assert "fingerprint" not in event.as_dict()
+    assert "fingerprint" not in event.as_dict(flatten=True)
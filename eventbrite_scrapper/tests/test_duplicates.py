@@ -0,0 +1,82 @@
+import pytest
+
+from eventbrite_scrapper import Eventbrite
+from eventbrite_scrapper.duplicates import (
+    DuplicateDetector,
+    event_minhash,
+    find_duplicates,
+    similarity,
+)
+from eventbrite_scrapper.serialization import serialize_event_search_result
+from eventbrite_scrapper.tests.fixtures import FakeSession, make_search_result
+
+SUMMARY = (
+    "Join us for an evening of live jazz with the quartet from New Orleans, "
+    "local food trucks and craft beer in the garden of the old brewery"
+)
+
+
+def make_event(n, name, summary=SUMMARY, venue_n=None):
+    result = make_search_result(n, venue_n=venue_n)
+    result["name"] = name
+    result["summary"] = summary
+    return serialize_event_search_result(result, signatures=True)
+
+
+def test_minhash_is_computed_at_serialization():
+    event = make_event(1, "Jazz in the Garden")
+
+    assert event.minhash == event_minhash(event)
+    assert len(event.minhash) == 256
+    assert "minhash" not in event.as_dict()
+    assert "minhash" not in event.as_dict(flatten=True)
+    assert serialize_event_search_result(make_search_result(1)).minhash is None
+
+
+def test_client_signatures():
+    client = Eventbrite(session=FakeSession(n_results=30), signatures=True)
+    client.delay_between_fetches = (0, 0)
+    events = client.search_events.get_results(
+        region="ca--san-francisco", dt_start="2023-03-20", dt_end="2023-03-25"
+    )
+    enriched = list(client.event_profile.enrich(events[:2]))
+
+    assert len(events) == 30
+    assert all(e.minhash == event_minhash(e) for e in events + enriched)
+
+
+def test_similarity():
+    event = make_event(1, "Jazz in the Garden", venue_n=1)
+    relisted = make_event(2, "Jazz in the Garden (new date)", venue_n=1)
+    other = make_event(3, "Pottery class", summary="Learn to make a bowl")
+
+    assert similarity(event.minhash, event.minhash) == 1
+    assert similarity(event.minhash, relisted.minhash) > 0.7
+    assert similarity(event.minhash, other.minhash) < 0.2
+
+
+def test_clusters():
+    events = [
+        make_event(1, "Jazz in the Garden", venue_n=1),
+        make_event(2, "Pottery class", summary="Learn to make a bowl"),
+        make_event(3, "Jazz in the Garden (new date)", venue_n=1),
+        make_event(4, "Jazz in the garden!", venue_n=1),
+        make_event(5, "Pottery class", summary="Learn to make a bowl", venue_n=2),
+        make_event(6, "Yoga", summary="Morning yoga in the park"),
+    ]
+
+    assert find_duplicates(events) == [
+        ["100000000001", "100000000003", "100000000004"],
+        ["100000000002", "100000000005"],
+    ]
+
+    detector = DuplicateDetector()
+    detector.add_many(events + events[:1])
+    assert len(detector) == 6
+    assert detector.duplicates_of("100000000002") == ["100000000005"]
+    assert detector.duplicates_of("100000000006") == []
+
+
+def test_bands_must_split_signature():
+    with pytest.raises(ValueError):
+        DuplicateDetector(bands=10)
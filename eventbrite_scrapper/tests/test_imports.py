@@ -0,0 +1,66 @@
+import subprocess
+import sys
+
+from .context import DPATH_APP
+
+HEAVY_MODULES = ("requests", "lxml.etree", "pytz")
+
+CHECK_LOADED = "import sys; print(','.join(m for m in {modules!r} if m in sys.modules))"
+
+
+def loaded_modules(code: str) -> str:
+    code = f"{code}; {CHECK_LOADED.format(modules=HEAVY_MODULES)}"
+    p = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=DPATH_APP,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return p.stdout.strip()
+
+
+def test_lazy_imports():
+    assert loaded_modules("import eventbrite_scrapper") == ""
+    assert loaded_modules("from eventbrite_scrapper import data_models") == ""
+    assert loaded_modules("from eventbrite_scrapper.main import URL") == ""
+    assert (
+        loaded_modules("from eventbrite_scrapper import Eventbrite; Eventbrite()")
+        == "requests"
+    )
+
+
+FIRST_USE_FROM_THREADS = """
+import threading
+from eventbrite_scrapper import parsing, serialization
+
+barrier = threading.Barrier(16)
+errors = []
+
+def first_use():
+    barrier.wait()
+    try:
+        serialization.pytz.timezone("UTC")
+        parsing.lxml_html.fromstring("<p>x</p>")
+    except Exception as e:
+        errors.append(repr(e))
+
+threads = [threading.Thread(target=first_use) for _ in range(16)]
+for t in threads:
+    t.start()
+for t in threads:
+    t.join()
+print(errors)
+"""
+
+
+def test_lazy_imports_first_use_from_threads():
+    for _ in range(3):
+        p = subprocess.run(
+            [sys.executable, "-c", FIRST_USE_FROM_THREADS],
+            cwd=DPATH_APP,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        assert p.stdout.strip() == "[]"
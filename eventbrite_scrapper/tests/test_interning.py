@@ -0,0 +1,38 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from eventbrite_scrapper import Eventbrite
+from eventbrite_scrapper.interning import Interner
+from eventbrite_scrapper.serialization import serialize_event_search_result
+from eventbrite_scrapper.tests.fixtures import FakeSession, make_search_result
+
+
+def test_interned_search_results():
+    interner = Interner()
+    a = serialize_event_search_result(make_search_result(1, venue_n=7), interner)
+    b = serialize_event_search_result(make_search_result(2, venue_n=7), interner)
+    c = serialize_event_search_result(make_search_result(3, venue_n=8), interner)
+
+    assert a.primary_venue is b.primary_venue
+    assert a.primary_venue.address is b.primary_venue.address
+    assert a.primary_venue is not c.primary_venue
+    assert a.tags_categories[0] is c.tags_categories[0]
+    # the same content as without interner
+    assert a == serialize_event_search_result(make_search_result(1, venue_n=7))
+    assert interner.stats()["venues"] == 2
+
+
+def test_intern_parsed_in_executor():
+    interner = Interner()
+    with ThreadPoolExecutor(2) as executor:
+        client = Eventbrite(
+            session=FakeSession(n_results=40),
+            parse_executor=executor,
+            interner=interner,
+        )
+        client.delay_between_fetches = (0, 0)
+        events = client.search_events.get_results(
+            region="ca--san-francisco", dt_start="2023-03-20", dt_end="2023-03-25"
+        )
+
+    assert len(events) == 40
+    assert len({id(e.tags_formats[0]) for e in events}) == 1
@@ -0,0 +1,80 @@
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
+from eventbrite_scrapper import Eventbrite
+from eventbrite_scrapper import parsing, utils
+from eventbrite_scrapper.tests.fixtures import (
+    FakeResponse,
+    FakeSession,
+    make_search_result,
+    make_search_page_html,
+    make_event_page_html,
+)
+
+
+def test_parse_search_page():
+    results = [make_search_result(i) for i in range(5)]
+    html = make_search_page_html(results, csrf_token="abc", place_id="123")
+
+    data = parsing.parse_search_page(html.encode("utf-8"))
+
+    assert data["csrf_token"] == "abc"
+    assert data["place_id"] == "123"
+    assert [e.id for e in data["events"]] == [r["id"] for r in results]
+
+
+def test_parse_event_page():
+    event = parsing.parse_event_page(make_event_page_html(3).encode("utf-8"))
+
+    assert event.id == "100000000003"
+    assert event.primary_venue.name == "Organizer 3"
+    assert event.long_description.startswith("<div><p>Part 0</p></div>")
+
+
+def test_parsed_events_are_picklable():
+    results = [make_search_result(i) for i in range(3)]
+    data = parsing.parse_search_page(make_search_page_html(results))
+
+    assert pickle.loads(pickle.dumps(data))["events"] == data["events"]
+
+
+def test_parse_executor():
+    with ThreadPoolExecutor(2) as executor:
+        client = Eventbrite(session=FakeSession(n_results=45), parse_executor=executor)
+        client.delay_between_fetches = (0, 0)
+        events = client.search_events.get_results(
+            region="ca--san-francisco",
+            dt_start="2023-03-20",
+            dt_end="2023-03-25",
+        )
+        profile = client.event_profile.load(events[0].url)
+
+    assert len(events) == 45
+    assert profile.id == events[0].id
+
+
+def test_read_until_stops_after_markers():
+    html = make_event_page_html(1).encode("utf-8")
+    r = FakeResponse(html)
+
+    content = utils.read_until(r, parsing.EVENT_PAGE_MARKERS, chunk_size=7)
+
+    assert r.closed
+    assert content.endswith(b"</script>")
+    assert r.bytes_read < len(html)
+    assert parsing.parse_event_page(content) == parsing.parse_event_page(html)
+
+
+def test_stream_pages():
+    session = FakeSession(n_results=10)
+    client = Eventbrite(session=session, stream_pages=True)
+    client.delay_between_fetches = (0, 0)
+
+    events = client.search_events.get_results(
+        region="ca--san-francisco", dt_start="2023-03-20", dt_end="2023-03-25"
+    )
+    profile = client.event_profile.load(events[0].url)
+
+    assert len(events) == 10
+    assert profile.id == events[0].id
+    assert all(r.bytes_read < len(r.content) for r in session.responses)
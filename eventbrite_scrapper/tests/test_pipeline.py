@@ -0,0 +1,80 @@
+import threading
+import time
+
+import pytest
+
+from eventbrite_scrapper.pipeline import Pipeline, PipelineCancelled
+
+
+def test_pipeline_stages():
+    output = []
+
+    stats = (
+        Pipeline(range(10), queue_size=2)
+        .flat_map(lambda i: [i, i], name="double")
+        .filter(lambda i: i % 2 == 0)
+        .map(lambda i: i * 10, concurrency=3, name="multiply")
+        .sink(output.append)
+        .run()
+    )
+
+    assert sorted(output) == [0, 0, 20, 20, 40, 40, 60, 60, 80, 80]
+    assert stats["double"].items_out == 20
+    assert stats["multiply"].items_in == 10
+    assert stats["append"].items_in == 10
+
+
+def test_pipeline_backpressure():
+    produced = []
+
+    def source():
+        for i in range(100):
+            produced.append(i)
+            yield i
+
+    pipeline = Pipeline(source(), queue_size=1).map(lambda i: i)
+    items = iter(pipeline)
+    next(items)
+    time.sleep(0.2)
+
+    # source + 2 queues + items being moved by threads
+    assert len(produced) < 10
+    items.close()
+
+
+def test_pipeline_error_and_cancel():
+    def fail(i):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        Pipeline(range(10)).map(fail).run()
+
+    pipeline = Pipeline(iter(int, 1)).map(lambda i: i)  # endless source
+    threading.Timer(0.2, pipeline.cancel).start()
+    with pytest.raises(PipelineCancelled):
+        pipeline.run()
+
+
+def test_pipeline_closes_source():
+    closed = []
+
+    def source():
+        try:
+            for i in range(1000):
+                yield i
+        finally:
+            closed.append(True)
+
+    def fail(i):
+        if i == 5:
+            raise RuntimeError("boom")
+        return i
+
+    with pytest.raises(RuntimeError):
+        Pipeline(source(), queue_size=1).map(fail).run()
+    assert closed == [True]
+
+    items = iter(Pipeline(source(), queue_size=1).map(lambda i: i))
+    next(items)
+    items.close()
+    assert closed == [True, True]
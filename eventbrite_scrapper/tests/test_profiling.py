@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+from eventbrite_scrapper import Eventbrite
+from eventbrite_scrapper import profiling
+from eventbrite_scrapper.profiling import Profiler
+from eventbrite_scrapper.tests.fixtures import FakeSession
+
+SEARCH_PARAMS = {
+    "region": "ca--san-francisco",
+    "dt_start": "2023-03-20",
+    "dt_end": "2023-03-25",
+}
+
+
+def test_stages(tmp_path):
+    profiler = Profiler(interval=0.001)
+    try:
+        client = Eventbrite(session=FakeSession(n_results=60), profiler=profiler)
+        client.delay_between_fetches = (0, 0)
+
+        events = client.search_events.get_results(**SEARCH_PARAMS, page_size=20)
+        dicts = [e.as_dict() for e in events]
+    finally:
+        profiler.stop()
+
+    assert len(dicts) == 60
+    stats = profiler.stats
+    assert {"fetch", "parse", "serialize", "export"} <= set(stats)
+    assert stats["fetch"].calls == 3
+    # serialization is nested in parsing, so it is measured separately
+    assert stats["serialize"].calls == stats["parse"].calls == 3
+    assert stats["export"].calls == 60
+    assert profiling.stage("fetch") is profiling.NULL_STAGE
+
+    summary = profiler.summary()
+    assert summary["stages"]["serialize"]["top_allocations"]
+    profiler.write_report(str(tmp_path / "profile.json"))
+    with open(tmp_path / "profile.json") as f:
+        assert json.load(f)["stages"]["export"]["calls"] == 60
+    assert "[serialize] calls: 3" in profiler.report()
+
+
+def test_allocation_stage_by_module():
+    client = Eventbrite(session=FakeSession())
+    client.delay_between_fetches = (0, 0)
+    with Profiler(cpu=False) as profiler:
+        with profiling.stage("export"):
+            events = client.search_events.get_results(**SEARCH_PARAMS)
+            dicts = [e.as_dict() for e in events]
+
+    sites = profiler.allocation_sites()
+    assert dicts
+    assert any("data_models.py" in site for site, _, _ in sites["export"])
+    assert any("serialization.py" in site for site, _, _ in sites["serialize"])
+
+
+def test_memory_limit():
+    calls = []
+    profiler = Profiler(memory=False, cpu=False, interval=0.001, memory_limit=1)
+    profiler.on_memory_limit = calls.append
+    with profiler:
+        while not profiler.limit_pending:
+            pass
+        with profiling.stage("fetch"):
+            pass
+        assert len(calls) == 1 and calls[0] > 1
+        with profiling.stage("fetch"):
+            pass
+
+    assert len(calls) == 1
+    assert profiler.limit_hits == 1
+
+
+def test_single_active_profiler():
+    with Profiler(memory=False, cpu=False):
+        with pytest.raises(RuntimeError):
+            Profiler(memory=False, cpu=False).start()
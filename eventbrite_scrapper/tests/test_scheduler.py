@@ -0,0 +1,89 @@
+import datetime
+
+from eventbrite_scrapper.scheduler import HOUR, DAY, RecrawlScheduler
+from eventbrite_scrapper.serialization import serialize_event_search_result
+from eventbrite_scrapper.tests.fixtures import make_search_result
+
+NOW = datetime.datetime(2023, 3, 1, tzinfo=datetime.timezone.utc).timestamp()
+
+
+def make_event(n, name=None, start_date="2023-03-20"):
+    result = make_search_result(n)
+    result["start_date"] = start_date
+    if name is not None:
+        result["name"] = name
+    return serialize_event_search_result(result)
+
+
+def test_changing_and_soon_events_first():
+    scheduler = RecrawlScheduler(requests_per_hour=60)
+    # 1 - changes every day, 2 - never changes, 3 - starts tomorrow
+    for day in range(5):
+        ts = NOW - (5 - day) * DAY
+        scheduler.observe(make_event(1, name=f"Renamed {day}"), observed_ts=ts)
+        scheduler.observe(make_event(2), observed_ts=ts)
+        scheduler.observe(make_event(3, start_date="2023-03-02"), observed_ts=ts)
+    # already started
+    scheduler.observe(make_event(4, start_date="2023-02-01"), observed_ts=NOW - DAY)
+
+    queue = [event_id for _, event_id in scheduler.queue(NOW)]
+    assert queue == ["100000000001", "100000000003", "100000000002"]
+    assert scheduler.states["100000000001"].n_changes == 4
+    assert scheduler.states["100000000002"].n_changes == 0
+
+
+def test_search_hash_counts_changes_without_fetch():
+    scheduler = RecrawlScheduler(requests_per_hour=60)
+    scheduler.observe(make_event(1), source="search", observed_ts=NOW - DAY)
+    scheduler.observe(make_event(1, "New"), source="search", observed_ts=NOW)
+
+    state = scheduler.states["100000000001"]
+    assert (state.n_checks, state.n_changes, state.fetched_ts) == (1, 1, None)
+    # never fetched
+    assert scheduler.priority(state, NOW) > 1
+
+
+def test_budget():
+    scheduler = RecrawlScheduler(requests_per_hour=120, min_interval_sec=HOUR)
+    for n in range(10):
+        scheduler.observe(make_event(n), source="search", observed_ts=NOW)
+
+    assert len(scheduler.next_batch(NOW)) == 1
+    assert scheduler.next_batch(NOW) == []
+    # 2 requests per minute, burst is limited to a minute of budget
+    assert len(scheduler.next_batch(NOW + 30)) == 1
+    assert len(scheduler.next_batch(NOW + HOUR)) == 2
+
+
+def test_run_and_save(tmp_path):
+    # `run` uses the current time
+    START_DATE = (datetime.date.today() + datetime.timedelta(days=30)).isoformat()
+
+    class Profiles:
+        def __init__(self):
+            self.urls = []
+
+        def load(self, url, fields=None, keep_raw=False):
+            self.urls.append(url)
+            if len(self.urls) == 2:
+                raise ValueError("not found")
+            n = int(url.rsplit("-", 1)[1]) - 100000000000
+            return make_event(n, start_date=START_DATE)
+
+    class Client:
+        event_profile = Profiles()
+
+    scheduler = RecrawlScheduler(requests_per_hour=3600 * 60)
+    for n in range(3):
+        scheduler.observe(make_event(n, start_date=START_DATE), source="search")
+
+    assert scheduler.run(Client(), max_requests=3) == 3
+    assert len(set(Client.event_profile.urls)) == 3
+    assert sum(s.n_errors for s in scheduler.states.values()) == 1
+    # fetched recently
+    assert scheduler.queue() == []
+
+    scheduler.save(str(tmp_path / "states"))
+    loaded = RecrawlScheduler(requests_per_hour=60)
+    loaded.load(str(tmp_path / "states"))
+    assert loaded.states == scheduler.states
@@ -0,0 +1,244 @@
+from concurrent.futures import ThreadPoolExecutor
+import datetime
+import json
+import time
+
+from eventbrite_scrapper import Eventbrite
+from eventbrite_scrapper import data_models as dm
+from eventbrite_scrapper.serialization import serialize_event_search_result
+from eventbrite_scrapper.tests.fixtures import FakeSession, make_search_result
+
+SEARCH_PARAMS = {
+    "region": "ca--san-francisco",
+    "dt_start": "2023-03-20",
+    "dt_end": "2023-03-25",
+}
+
+
+def make_client(**kwargs) -> Eventbrite:
+    client = Eventbrite(session=FakeSession(**kwargs))
+    client.delay_between_fetches = (0, 0)
+    return client
+
+
+def test_page_size_and_expand():
+    client = make_client(n_results=120)
+
+    events = client.search_events.get_results(
+        **SEARCH_PARAMS, page_size=50, expand="minimal"
+    )
+
+    assert [e.id for e in events] == [make_search_result(i)["id"] for i in range(120)]
+    posts = [c[2] for c in client.session.calls if c[0] == "POST"]
+    assert [p["event_search"]["page"] for p in posts] == [1, 2, 3]
+    assert all(p["event_search"]["page_size"] == 50 for p in posts)
+    assert posts[0]["expand.destination_event"] == list(dm.SearchExpand.MINIMAL)
+
+
+class ShortPageSession(FakeSession):
+    """API page 2 has 2 events less (e.g. removed by dedup)"""
+
+    def post(self, *args, **kwargs):
+        r = super().post(*args, **kwargs)
+        body = json.loads(r.content)
+        if body["events"]["pagination"]["page_number"] == 2:
+            del body["events"]["results"][:2]
+        r.content = json.dumps(body).encode("utf-8")
+        return r
+
+
+def test_short_middle_page():
+    client = Eventbrite(session=ShortPageSession(n_results=100))
+    client.delay_between_fetches = (0, 0)
+
+    events = client.search_events.get_results(**SEARCH_PARAMS)
+
+    expected = [make_search_result(i)["id"] for i in range(100)]
+    assert [e.id for e in events] == expected[:20] + expected[22:]
+    posts = [c[2] for c in client.session.calls if c[0] == "POST"]
+    # page 6 is empty: 98 of 100 reported events were returned
+    assert [p["event_search"]["page"] for p in posts] == [2, 3, 4, 5, 6]
+
+
+def test_default_expand_is_full():
+    client = make_client(n_results=30)
+
+    client.search_events.get_results(**SEARCH_PARAMS)
+
+    posts = [c[2] for c in client.session.calls if c[0] == "POST"]
+    assert posts[0]["expand.destination_event"] == list(dm.SearchExpand.FULL)
+
+
+def test_serialize_without_expansions():
+    data = make_search_result(1)
+    for key in ("primary_venue", "image", "dedup", "published"):
+        data.pop(key)
+
+    event = serialize_event_search_result(data)
+
+    assert event.primary_venue.address.latitude is None
+    assert event.image.url is None
+    assert event.hash is None
+
+
+def test_sharded_results():
+    client = make_client(results_per_day=30)
+
+    pages = list(
+        client.search_events.sharded_results_iter(
+            region="ca--san-francisco",
+            dt_start="2023-03-20",
+            dt_end="2023-03-27",
+            max_results_per_shard=100,
+        )
+    )
+
+    ids = [e.id for page in pages for e in page]
+    assert len(ids) == len(set(ids)) == 8 * 30
+    # 8 days -> 2 x 4 days (probes) -> 4 x 2 days
+    shard_urls = {c[1] for c in client.session.calls if c[0] == "GET"}
+    assert len(shard_urls) == 7
+
+
+class UnevenDaysSession(FakeSession):
+    """The first day has a single page, the second day has many slow pages"""
+
+    def search_results(self, dt_start, dt_end):
+        first_day = datetime.date(2023, 3, 20).toordinal() - 700000
+        found = super().search_results(dt_start, dt_end)
+        return [i for i in found if i // 1000 != first_day or i % 1000 < 10]
+
+    def post(self, *args, **kwargs):
+        time.sleep(0.02)
+        return super().post(*args, **kwargs)
+
+
+def test_sharded_results_early_stop():
+    client = Eventbrite(session=UnevenDaysSession(results_per_day=200))
+    client.delay_between_fetches = (0, 0)
+
+    for events in client.search_events.sharded_results_iter(
+        region="ca--san-francisco",
+        dt_start="2023-03-20",
+        dt_end="2023-03-21",
+        max_results_per_shard=50,
+    ):
+        break
+
+    assert len(events) == 10
+    # the second day shard stops after the current page (of 9 API pages)
+    posts = [c for c in client.session.calls if c[0] == "POST"]
+    assert len(posts) <= 2
+
+
+def test_sharded_search_warns_on_truncated_day(caplog):
+    client = make_client(results_per_day=100)
+
+    batches = list(
+        client.search_events.sharded_results_iter(
+            region="ca--san-francisco",
+            dt_start="2023-03-20",
+            dt_end="2023-03-20",
+            max_results_per_shard=50,
+            max_pages_per_shard=2,
+        )
+    )
+
+    assert sum(len(b) for b in batches) == 40
+    assert "is truncated to 40 of 100 results" in caplog.text
+
+
+def test_enrich():
+    client = make_client(n_results=30)
+    events = client.search_events.get_results(**SEARCH_PARAMS)
+    n_calls = len(client.session.calls)
+
+    enriched = list(client.event_profile.enrich(events, max_workers=3))
+    skipped = list(client.event_profile.enrich(events, fields=["name", "timezone"]))
+
+    assert [e.id for e in enriched] == [e.id for e in events]
+    assert all(e.long_description and e.organizer.url for e in enriched)
+    assert skipped == events
+    assert len(client.session.calls) == n_calls + 30
+
+
+class FailingProfileSession(FakeSession):
+    """Event page of the 6th event fails to load"""
+
+    def get(self, url, headers=None, **kwargs):
+        if url.endswith("-100000000005"):
+            raise ConnectionError("connection reset")
+        return super().get(url, headers, **kwargs)
+
+
+def test_enrich_keeps_event_on_profile_failure(caplog):
+    client = Eventbrite(session=FailingProfileSession(n_results=10))
+    client.delay_between_fetches = (0, 0)
+    events = client.search_events.get_results(**SEARCH_PARAMS)
+
+    enriched = list(client.event_profile.enrich(events, max_workers=3))
+
+    assert [e.id for e in enriched] == [e.id for e in events]
+    assert enriched[5] is events[5]
+    assert enriched[5].long_description is None
+    assert all(e.long_description for e in enriched[:5] + enriched[6:])
+    assert "failed to load profile of event" in caplog.text
+
+
+def test_events_iter_stops_requests():
+    client = make_client(n_results=100)
+
+    events = client.search_events.get_results(
+        **SEARCH_PARAMS,
+        max_events=25,
+        where=lambda e: int(e.id) % 2 == 0,
+    )
+
+    assert len(events) == 25
+    assert all(int(e.id) % 2 == 0 for e in events)
+    # 50 events on 3 pages are enough
+    assert len(client.session.calls) == 3
+
+
+def test_events_iter_stop_when():
+    client = make_client(n_results=100)
+    last_id = make_search_result(30)["id"]
+
+    events = list(
+        client.search_events.events_iter(
+            **SEARCH_PARAMS, stop_when=lambda e: e.id == last_id
+        )
+    )
+
+    assert len(events) == 30
+    assert len(client.session.calls) == 2
+
+
+class SlowSession(FakeSession):
+    def get(self, url, headers=None, **kwargs):
+        time.sleep(0.2)
+        return super().get(url, headers, **kwargs)
+
+
+def test_concurrent_loads_share_request():
+    client = Eventbrite(session=SlowSession())
+    client.delay_between_fetches = (0, 0)
+    url = "https://www.eventbrite.com/e/event-number-1-100000000001"
+    urls = [url, url + "/", url.replace("www.", "WWW."), url, url]
+
+    with ThreadPoolExecutor(len(urls)) as executor:
+        events = list(executor.map(client.event_profile.load, urls))
+
+    assert len(client.session.calls) == 1
+    assert all(e is events[0] for e in events)
+    assert client.single_flight.n_shared == 4
+
+    # different parameters: page is shared, parsing is not
+    with ThreadPoolExecutor(2) as executor:
+        full, venue = executor.map(
+            lambda f: client.event_profile.load(url, fields=f),
+            [None, ["primary_venue"]],
+        )
+
+    assert len(client.session.calls) == 2
+    assert full.long_description and venue.long_description is None
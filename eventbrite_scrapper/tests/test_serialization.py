@@ -0,0 +1,67 @@
+import pytest
+
+from eventbrite_scrapper.serialization import (
+    serialize_event_profile,
+    serialize_event_search_result,
+    merge_events,
+)
+from eventbrite_scrapper.tests.fixtures import make_event_page_data, make_search_result
+
+
+def test_profile_long_description():
+    event = serialize_event_profile(make_event_page_data(1, modules=3))
+
+    assert event.long_description == (
+        "<div><p>Part 0</p></div>\n"
+        '<img href="https://img.evbuc.com/1-1.jpg">\n'
+        "<div><p>Part 2</p></div>\n"
+    )
+
+
+def test_profile_fields_selection():
+    data = make_event_page_data(1, modules=1000)
+
+    event = serialize_event_profile(data, fields=["primary_venue"], keep_raw=False)
+
+    assert event.id == data["event"]["id"]
+    assert event.primary_venue.name == data["organizer"]["name"]
+    assert event.long_description is None
+    assert event.start_datetime is None
+    assert event.raw_profile_data is None
+
+
+def test_profile_keep_raw_keys():
+    data = make_event_page_data(1)
+
+    event = serialize_event_profile(data, keep_raw=["event"])
+
+    assert event.raw_profile_data == {"event": data["event"]}
+
+
+def test_profile_unknown_fields():
+    with pytest.raises(ValueError):
+        serialize_event_profile(make_event_page_data(1), fields=["venue"])
+
+
+def test_merge_events():
+    search = serialize_event_search_result(make_search_result(1))
+    profile = serialize_event_profile(make_event_page_data(1))
+
+    event = merge_events(search, profile)
+
+    assert event.long_description == profile.long_description
+    assert event.tags_categories == search.tags_categories
+    assert event.timezone == search.timezone
+    assert event.primary_venue.name == search.primary_venue.name
+    assert event.primary_venue.address.latitude == 37.7749
+    assert event.primary_venue.address.full_address == (
+        profile.primary_venue.address.full_address
+    )
+    # venue of search result is kept, organizer comes from profile
+    assert event.primary_venue.id == search.primary_venue.id
+    assert event.primary_venue.url is None
+    assert event.organizer == profile.organizer
+    assert event.organizer.id == profile.primary_venue.id
+    assert event.organizer.url == profile.primary_venue.url
+    # inputs are not modified
+    assert search.primary_venue.address.full_address is None
@@ -0,0 +1,74 @@
+from eventbrite_scrapper import data_models as dm
+from eventbrite_scrapper.text_index import TextIndex, tokenize
+
+
+def make_event(n: int, name: str, description: str = None, tags=()) -> dm.Event:
+    return dm.Event(
+        id=str(n),
+        hash=None,
+        name=name,
+        url=f"https://www.eventbrite.com/e/{n}",
+        long_description=description,
+        tags_categories=tuple(dm.EventTag(f"EventbriteCategory/{t}", t) for t in tags),
+    )
+
+
+def make_index() -> TextIndex:
+    index = TextIndex()
+    index.add(
+        [
+            make_event(1, "Jazz night", "<p>Live music &amp; drinks</p>", ["Music"]),
+            make_event(2, "Jazz jazz jazz festival", tags=["Music"]),
+            make_event(3, "Music live at the park", tags=["Outdoor"]),
+            make_event(4, "Café meetup", "Networking"),
+        ]
+    )
+    return index
+
+
+def test_tokenize():
+    assert tokenize("Café <b>LIVE</b>-music!") == ["cafe", "b", "live", "b", "music"]
+
+
+def test_ranked_search():
+    index = make_index()
+
+    assert [i for i, _ in index.search("jazz")] == ["2", "1"]
+    assert [i for i, _ in index.search("cafe")] == ["4"]
+    assert [i for i, _ in index.search("live music")][:2] in (["1", "3"], ["3", "1"])
+
+
+def test_phrase_and_tag_filters():
+    index = make_index()
+
+    assert [i for i, _ in index.search('"live music"')] == ["1"]
+    assert [i for i, _ in index.search("music", tags=["outdoor"])] == ["3"]
+    assert [i for i, _ in index.search(tags=["EventbriteCategory/Music"])] == [
+        "1",
+        "2",
+    ]
+    # phrases do not span fields
+    assert index.search('"night live"') == []
+
+
+def test_replace_and_save(tmp_path):
+    index = make_index()
+    index.add_event(make_event(2, "Blues festival"))
+
+    assert [i for i, _ in index.search("jazz")] == ["1"]
+    assert len(index) == 4
+
+    index.save(str(tmp_path / "index"))
+    loaded = TextIndex.load(str(tmp_path / "index"))
+
+    assert len(loaded) == 4
+    assert loaded.search("festival") == index.search("festival")
+    assert loaded.search('"live music"', tags=["music"]) == index.search(
+        '"live music"', tags=["music"]
+    )
+
+
+def test_tag_filter_requires_keyword():
+    index = make_index()
+
+    assert [i for i, _ in index.search("festival", tags=["music"])] == ["2"]
@@ -0,0 +1,105 @@
+import json
+
+import pytest
+
+from eventbrite_scrapper import Eventbrite
+from eventbrite_scrapper.transport import RequestsTransport, http2_headers
+from eventbrite_scrapper.tests.fixtures import FakeSession
+
+
+class CountingTransport(RequestsTransport):
+    def __init__(self, session):
+        super().__init__(session)
+        self.n_requests = 0
+
+    def get(self, url, headers, markers=None):
+        self.n_requests += 1
+        return super().get(url, headers, markers)
+
+    def post_json(self, url, data, headers):
+        self.n_requests += 1
+        return super().post_json(url, data, headers)
+
+
+def test_custom_transport():
+    transport = CountingTransport(FakeSession(n_results=50))
+    client = Eventbrite(transport=transport)
+    client.delay_between_fetches = (0, 0)
+
+    events = client.search_events.get_results(
+        region="ca--san-francisco", dt_start="2023-03-20", dt_end="2023-03-25"
+    )
+
+    assert len(events) == 50
+    assert transport.n_requests == 3
+    assert client.session is transport.session
+
+
+def test_http2_headers():
+    headers = {"Host": "www.eventbrite.com", "Connection": "keep-alive", "DNT": "1"}
+
+    assert http2_headers(headers) == {"DNT": "1"}
+
+
+def test_http2_transport_requires_httpx():
+    try:
+        import httpx  # noqa: F401
+    except ImportError:
+        from eventbrite_scrapper.transport import HTTP2Transport
+
+        with pytest.raises(ImportError, match="http2"):
+            HTTP2Transport()
+    else:
+        pytest.skip("httpx is installed")
+
+
+def test_http2_transport_stream():
+    httpx = pytest.importorskip("httpx")
+    from eventbrite_scrapper.transport import HTTP2Transport
+
+    def handler(request):
+        # connection-specific headers of the caller are dropped
+        assert request.headers["connection"] != "close"
+        assert request.headers["dnt"] == "1"
+        return httpx.Response(200, content=b"<a>start data end</a>" + b"x" * 10**5)
+
+    transport = HTTP2Transport(httpx.Client(transport=httpx.MockTransport(handler)))
+    content = transport.get(
+        "https://example.com",
+        {"Connection": "close", "DNT": "1"},
+        markers=[(b"start", b"end")],
+    )
+
+    assert content == b"<a>start data end"
+
+
+def test_http2_transport_search():
+    httpx = pytest.importorskip("httpx")
+    from eventbrite_scrapper.transport import HTTP2Transport
+
+    session = FakeSession(n_results=50)
+    posts = []
+
+    def handler(request):
+        if request.method == "POST":
+            posts.append(request)
+            r = session.post(str(request.url), json=json.loads(request.content))
+            return httpx.Response(200, content=r.content)
+        r = session.get(str(request.url))
+        cookie = "csrftoken=cookie-token; Path=/"
+        return httpx.Response(200, content=r.content, headers={"Set-Cookie": cookie})
+
+    transport = HTTP2Transport(httpx.Client(transport=httpx.MockTransport(handler)))
+    client = Eventbrite(transport=transport, stream_pages=True)
+    client.delay_between_fetches = (0, 0)
+
+    events = client.search_events.get_results(
+        region="ca--san-francisco", dt_start="2023-03-20", dt_end="2023-03-25"
+    )
+
+    assert len(events) == 50
+    assert client.session is None
+    assert transport.get_cookies() == {"csrftoken": "cookie-token"}
+    assert len(posts) == 2
+    assert all(p.headers["cookie"] == "csrftoken=cookie-token" for p in posts)
+    assert all(p.headers["x-csrftoken"] for p in posts)
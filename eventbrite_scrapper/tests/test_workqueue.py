@@ -0,0 +1,139 @@
+import time
+
+import pytest
+
+from eventbrite_scrapper import Eventbrite
+from eventbrite_scrapper import data_models as dm
+from eventbrite_scrapper.workqueue import (
+    SQLiteWorkQueue,
+    Worker,
+    put_search_jobs,
+    put_profile_jobs,
+)
+from eventbrite_scrapper.tests.fixtures import FakeSession
+
+
+def test_dedup_lease_and_retry(tmp_path):
+    queue = SQLiteWorkQueue(str(tmp_path / "queue.db"), max_attempts=2)
+
+    assert put_profile_jobs(queue, ["1", "2", "1"]) == 2
+    assert put_profile_jobs(queue, ["2"]) == 0
+
+    job = queue.lease("w1", lease_sec=60)
+    other = SQLiteWorkQueue(str(tmp_path / "queue.db"))
+    assert other.lease("w2", lease_sec=60).payload == {"event": "2"}
+    assert other.lease("w2", lease_sec=60) is None
+
+    queue.fail(job, "boom")
+    job = queue.lease("w1", lease_sec=-1)  # lease expires immediately
+    assert job.attempts == 2
+    assert queue.lease("w1", lease_sec=60) is None
+    assert queue.stats() == {"failed": 1, "leased": 1}
+
+
+def test_stale_worker_lost_lease(tmp_path):
+    queue = SQLiteWorkQueue(str(tmp_path / "queue.db"))
+    put_profile_jobs(queue, ["1"])
+
+    stale = queue.lease("w1", lease_sec=-1)  # lease expires immediately
+    job = queue.lease("w2", lease_sec=60)
+    assert job.id == stale.id
+
+    assert not queue.extend(stale, 60)
+    assert not queue.complete(stale)
+    assert not queue.fail(stale, "boom")
+    assert queue.stats() == {"leased": 1}
+
+    assert queue.extend(job, 60)
+    assert queue.complete(job)
+    assert queue.stats() == {"done": 1}
+
+
+def test_worker_stops_job_with_lost_lease(tmp_path):
+    queue = SQLiteWorkQueue(str(tmp_path / "queue.db"))
+    query = {
+        "region": "ca--san-francisco",
+        "dt_start": "2023-03-20",
+        "dt_end": "2023-03-25",
+    }
+    put_search_jobs(queue, query, max_pages=3, pages_per_job=3)
+
+    pages = []
+
+    def sink(job, events):
+        pages.append(events)
+        # another worker takes the job after the first page
+        queue.lease("w2", lease_sec=60)
+
+    client = Eventbrite(session=FakeSession(n_results=70))
+    client.delay_between_fetches = (0, 0)
+    worker = Worker(client, queue, sink=sink, lease_sec=-1)
+
+    assert worker.run() == 1
+    assert len(pages) == 1
+    assert queue.stats() == {"leased": 1}
+
+
+def test_page_range_jobs_cover_search(tmp_path):
+    queue = SQLiteWorkQueue(str(tmp_path / "queue.db"))
+    query = {
+        "region": "ca--san-francisco",
+        "dt_start": "2023-03-20",
+        "dt_end": "2023-03-25",
+    }
+    put_search_jobs(queue, query, max_pages=4, pages_per_job=2)
+
+    results = []
+    client = Eventbrite(session=FakeSession(n_results=100))
+    client.delay_between_fetches = (0, 0)
+    Worker(client, queue, sink=lambda job, events: results.extend(events)).run()
+
+    single = client.search_events.get_results(**query, max_pages=4)
+    assert [e.id for e in results] == [e.id for e in single]
+    assert len(single) == 80
+
+    with pytest.raises(ValueError, match="page_size"):
+        put_search_jobs(queue, {**query, "page_size": 50}, max_pages=4)
+    with pytest.raises(ValueError, match="page_size"):
+        list(client.search_events.results_iter(**query, page_size=50, start_page=3))
+
+
+def test_reserve_request_is_shared(tmp_path):
+    q1 = SQLiteWorkQueue(str(tmp_path / "queue.db"))
+    q2 = SQLiteWorkQueue(str(tmp_path / "queue.db"))
+
+    waits = [q.reserve_request(10) for q in (q1, q2, q1)]
+
+    assert waits[0] < 1
+    assert 9 < waits[1] <= 10
+    assert 19 < waits[2] <= 20
+
+
+def test_worker(tmp_path):
+    queue = SQLiteWorkQueue(str(tmp_path / "queue.db"))
+    query = {
+        "region": "ca--san-francisco",
+        "dt_start": "2023-03-20",
+        "dt_end": "2023-03-25",
+        "category": dm.Category.MUSIC,
+    }
+    assert put_search_jobs(queue, query, max_pages=4, pages_per_job=2) == 2
+    assert put_search_jobs(queue, query, max_pages=4, pages_per_job=2) == 0
+    put_profile_jobs(queue, ["100000000001"])
+
+    results = []
+    client = Eventbrite(session=FakeSession(n_results=70))
+    worker = Worker(
+        client,
+        queue,
+        sink=lambda job, events: results.extend(events),
+        requests_per_sec=1000,
+    )
+    start = time.monotonic()
+
+    assert worker.run() == 3
+    assert time.monotonic() - start < 5
+    assert queue.stats() == {"done": 3}
+    ids = [e.id for e in results]
+    assert len(ids) == 71
+    assert len(set(ids)) == 70
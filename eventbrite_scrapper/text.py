@@ -0,0 +1,23 @@
+"""Text normalization shared by the full-text index and duplicate detection"""
+
+from typing import List, Optional
+import html
+import re
+import unicodedata
+
+RE_HTML_TAG = re.compile(r"<[^>]+>")
+RE_COMBINING = re.compile(r"[\u0300-\u036f]")
+RE_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """It returns lowercase tokens without accents"""
+    if not text:
+        return []
+    text = RE_COMBINING.sub("", unicodedata.normalize("NFKD", text.lower()))
+    return RE_TOKEN.findall(text)
+
+
+def html_to_text(value: str) -> str:
+    """It returns text of HTML (tags are replaced with spaces)"""
+    return html.unescape(RE_HTML_TAG.sub(" ", value))
@@ -0,0 +1,404 @@
+"""Full-text index of events with BM25 ranking
+
+Indexed text: `name`, `short_description`, `long_description` (HTML is
+stripped) and tag texts. Postings of every term are kept in compact arrays:
+document numbers, start offsets and positions (for phrase queries).
+
+Example:
+    index = TextIndex()
+    for events in client.search_events.results_iter(**params):
+        index.add(events)
+    index.search('jazz "live music"', tags=["music"], limit=10)
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+from array import array
+from bisect import bisect_left
+import heapq
+import json
+import logging
+import math
+import re
+import struct
+import sys
+
+from . import data_models as dm
+from .text import html_to_text, tokenize
+
+log = logging.getLogger(__name__)
+
+MAGIC = b"EBTI"
+VERSION = 1
+HEADER = struct.Struct("<4sII")  # magic, version, length of JSON metadata
+
+RE_PHRASE = re.compile(r'"([^"]*)"')
+
+# positions of different fields are separated, so phrases do not span fields
+FIELD_GAP = 10
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+# terms with lower IDF (found in ~90% of documents) are not scored when query
+# has other terms or phrases
+MIN_IDF = 0.1
+
+
+def normalize_tag(value: str) -> str:
+    return " ".join(tokenize(value))
+
+
+def event_texts(event: dm.Event) -> Iterator[str]:
+    """It yields indexed texts of the event"""
+    yield event.name
+    yield event.short_description
+    if event.long_description:
+        yield html_to_text(event.long_description)
+    for tags in (event.tags_categories, event.tags_formats, event.tags_by_organizer):
+        for tag in tags or ():
+            yield tag.text
+
+
+def event_tags(event: dm.Event) -> Set[str]:
+    """It returns normalized ids and texts of event tags"""
+    values = set()
+    for tags in (event.tags_categories, event.tags_formats, event.tags_by_organizer):
+        for tag in tags or ():
+            values.add(tag.id.lower())
+            values.add(normalize_tag(tag.text))
+    return values
+
+
+class _Postings:
+    """Documents of the term: positions of `docs[i]` are
+    `positions[starts[i] : starts[i + 1]]`"""
+
+    __slots__ = ("docs", "starts", "positions")
+
+    def __init__(self):
+        self.docs = array("I")
+        self.starts = array("I")
+        self.positions = array("I")
+
+    def tf(self, i: int) -> int:
+        end = self.starts[i + 1] if i + 1 < len(self.starts) else len(self.positions)
+        return end - self.starts[i]
+
+    def doc_positions(self, doc: int) -> Optional[array]:
+        i = bisect_left(self.docs, doc)
+        if i == len(self.docs) or self.docs[i] != doc:
+            return None
+        return self.positions[self.starts[i] : self.starts[i] + self.tf(i)]
+
+
+class TextIndex:
+    """
+    Incremental full-text index of events. Adding event with already indexed
+    id replaces the previous version
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, _Postings] = {}
+        # tag -> documents
+        self.tags: Dict[str, array] = {}
+        # document number -> event id / number of tokens
+        self.doc_ids: List[str] = []
+        self.doc_lengths = array("I")
+        # event id -> document number (of the latest version)
+        self.docs: Dict[str, int] = {}
+        self.deleted: Set[int] = set()
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def __contains__(self, event_id: str) -> bool:
+        return str(event_id) in self.docs
+
+    # --- indexing ---
+
+    def add(self, events: Iterable[dm.Event]):
+        """It indexes events (e.g. a page of `results_iter`)"""
+        for event in events:
+            self.add_event(event)
+
+    def add_event(self, event: dm.Event):
+        event_id = str(event.id)
+        self.remove(event_id)
+
+        doc = len(self.doc_ids)
+        positions: Dict[str, List[int]] = {}
+        position = 0
+        length = 0
+        for text in event_texts(event):
+            tokens = tokenize(text)
+            for token in tokens:
+                positions.setdefault(token, []).append(position)
+                position += 1
+            length += len(tokens)
+            position += FIELD_GAP
+
+        for term, term_positions in positions.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = _Postings()
+            postings.docs.append(doc)
+            postings.starts.append(len(postings.positions))
+            postings.positions.extend(term_positions)
+
+        for tag in event_tags(event):
+            self.tags.setdefault(tag, array("I")).append(doc)
+
+        self.doc_ids.append(event_id)
+        self.doc_lengths.append(length)
+        self.docs[event_id] = doc
+        self.total_length += length
+
+    def remove(self, event_id: str):
+        """It removes event from search results (postings are kept)"""
+        doc = self.docs.pop(str(event_id), None)
+        if doc is not None:
+            self.deleted.add(doc)
+            self.total_length -= self.doc_lengths[doc]
+
+    def index_pages(self, pages: Iterable[List[dm.Event]]) -> Iterator[List[dm.Event]]:
+        """It indexes pages of `results_iter` and yields them further"""
+        for events in pages:
+            self.add(events)
+            yield events
+
+    # --- search ---
+
+    def search(
+        self,
+        query: str = "",
+        tags: Sequence[str] = None,
+        limit: int = 10,
+    ) -> List[Tuple[str, float]]:
+        """
+        It returns events ranked by BM25 score of query terms
+
+        Args:
+          query (str): keywords (any of them should match) and "quoted phrases"
+            (all of them must match), e.g. 'jazz "live music"'
+          tags (Sequence[str]): tag ids or texts that events must have (all)
+          limit (int): maximum number of results. Defaults to 10
+
+        Returns:
+          List of (event id, score) sorted by score
+        """
+        phrases = [tokenize(p) for p in RE_PHRASE.findall(query)]
+        phrases = [p for p in phrases if p]
+        terms = tokenize(RE_PHRASE.sub(" ", query))
+        terms += [t for p in phrases for t in p]
+
+        allowed = self.filter_docs(phrases, tags or ())
+        if allowed is not None and not allowed:
+            return []
+
+        # NOTE: documents with phrases have their terms, so common terms of
+        #   phrases could be skipped in scoring
+        scores = self.score(set(terms), allowed, skip_common=bool(phrases))
+        if allowed is not None and (phrases or not terms):
+            # filtered documents without scored terms are ranked last
+            for doc in allowed:
+                scores.setdefault(doc, 0.0)
+
+        if not phrases:
+            top = heapq.nlargest(limit, scores.items(), key=lambda i: (i[1], -i[0]))
+            return [(self.doc_ids[doc], score) for doc, score in top]
+
+        # phrases are checked lazily, from the best scored documents
+        ranked = [(-score, doc) for doc, score in scores.items()]
+        heapq.heapify(ranked)
+        results = []
+        while ranked and len(results) < limit:
+            score, doc = heapq.heappop(ranked)
+            if all(self.has_phrase(doc, p) for p in phrases):
+                results.append((self.doc_ids[doc], -score))
+        return results
+
+    def filter_docs(
+        self, phrases: List[List[str]], tags: Sequence[str]
+    ) -> Optional[Set[int]]:
+        """It returns documents with all tags and all terms of phrases (order
+        of terms is checked by `has_phrase`). None - no filter"""
+        allowed: Optional[Set[int]] = None
+        for tag in tags:
+            docs = self.tags.get(tag.lower()) or self.tags.get(normalize_tag(tag))
+            docs = set(docs or ())
+            allowed = docs if allowed is None else allowed & docs
+
+        for phrase in phrases:
+            candidates = self.phrase_candidates(phrase)
+            allowed = candidates if allowed is None else allowed & candidates
+
+        if allowed is not None:
+            allowed -= self.deleted
+        return allowed
+
+    def phrase_candidates(self, phrase: List[str]) -> Set[int]:
+        docs = None
+        for term in sorted(set(phrase), key=self.df):
+            postings = self.postings.get(term)
+            if postings is None:
+                return set()
+            docs = (
+                set(postings.docs) if docs is None else docs.intersection(postings.docs)
+            )
+        return docs or set()
+
+    def has_phrase(self, doc: int, phrase: List[str]) -> bool:
+        # start positions of the phrase (position of term minus its offset)
+        starts = None
+        for i, term in enumerate(phrase):
+            shifted = {p - i for p in self.postings[term].doc_positions(doc)}
+            starts = shifted if starts is None else starts & shifted
+            if not starts:
+                return False
+        return True
+
+    def df(self, term: str) -> int:
+        postings = self.postings.get(term)
+        return len(postings.docs) if postings is not None else 0
+
+    def score(
+        self,
+        terms: Set[str],
+        allowed: Optional[Set[int]] = None,
+        skip_common: bool = False,
+    ) -> Dict[int, float]:
+        """
+        It returns BM25 scores of documents that have any of `terms`
+
+        Args:
+          terms (Set[str]): normalized terms
+          allowed (Set[int]): documents to score. Defaults to None (all)
+          skip_common (bool): skip terms with IDF below `MIN_IDF` even if
+            query has no other terms. Defaults to False
+        """
+        n_docs = len(self.docs)
+        if not n_docs:
+            return {}
+        avg_length = self.total_length / n_docs or 1
+        lengths = self.doc_lengths
+        deleted = self.deleted
+        # length normalization of BM25: K1 * (1 - B + B * length / avg_length)
+        norm_base = K1 * (1 - B)
+        norm_scale = K1 * B / avg_length
+
+        idfs = {}
+        for term in terms:
+            df = self.df(term)
+            if df:
+                idfs[term] = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+        if skip_common or any(i >= MIN_IDF for i in idfs.values()):
+            # terms found in almost every document do not change ranking, but
+            # their postings are the longest
+            idfs = {t: i for t, i in idfs.items() if i >= MIN_IDF}
+
+        scores: Dict[int, float] = {}
+        for term, idf in idfs.items():
+            postings = self.postings[term]
+            df = len(postings.docs)
+
+            # NOTE: lookup of a document costs ~log2(df) steps
+            if allowed is not None and len(allowed) * df.bit_length() < df:
+                # few documents left after filters: look them up in postings
+                items = postings_of(postings, sorted(allowed))
+            else:
+                items = enumerate(postings.docs)
+            skip = deleted if allowed is None else None
+
+            starts = postings.starts
+            ends = starts[1:]
+            ends.append(len(postings.positions))
+            weight = idf * (K1 + 1)
+            for i, doc in items:
+                if skip is not None:
+                    if doc in skip:
+                        continue
+                elif doc not in allowed:
+                    continue
+                tf = ends[i] - starts[i]
+                norm = norm_base + norm_scale * lengths[doc]
+                scores[doc] = scores.get(doc, 0.0) + weight * tf / (tf + norm)
+        return scores
+
+    # --- serialization ---
+
+    def save(self, fpath: str):
+        """It writes index to the file"""
+        terms = list(self.postings)
+        tags = list(self.tags)
+        meta = {
+            "byteorder": sys.byteorder,
+            "doc_ids": self.doc_ids,
+            "deleted": sorted(self.deleted),
+            "terms": [
+                [
+                    t,
+                    len(self.postings[t].docs),
+                    len(self.postings[t].positions),
+                ]
+                for t in terms
+            ],
+            "tags": [[t, len(self.tags[t])] for t in tags],
+        }
+        meta_bytes = json.dumps(meta, separators=(",", ":")).encode("utf-8")
+        with open(fpath, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(meta_bytes)))
+            f.write(meta_bytes)
+            f.write(self.doc_lengths.tobytes())
+            for t in terms:
+                postings = self.postings[t]
+                f.write(postings.docs.tobytes())
+                f.write(postings.starts.tobytes())
+                f.write(postings.positions.tobytes())
+            for t in tags:
+                f.write(self.tags[t].tobytes())
+
+    @classmethod
+    def load(cls, fpath: str) -> "TextIndex":
+        """It reads index written by `save`"""
+        with open(fpath, "rb") as f:
+            magic, version, meta_length = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"Not a text index: {fpath}")
+            if version != VERSION:
+                raise ValueError(f"Unsupported text index version: {version}")
+            meta = json.loads(f.read(meta_length))
+            swap = meta["byteorder"] != sys.byteorder
+
+            def read_array(n: int) -> array:
+                values = array("I")
+                values.frombytes(f.read(n * values.itemsize))
+                if swap:
+                    values.byteswap()
+                return values
+
+            index = cls()
+            index.doc_ids = meta["doc_ids"]
+            index.deleted = set(meta["deleted"])
+            index.doc_lengths = read_array(len(index.doc_ids))
+            for term, n_docs, n_positions in meta["terms"]:
+                postings = index.postings[term] = _Postings()
+                postings.docs = read_array(n_docs)
+                postings.starts = read_array(n_docs)
+                postings.positions = read_array(n_positions)
+            for tag, n_docs in meta["tags"]:
+                index.tags[tag] = read_array(n_docs)
+
+        for doc, event_id in enumerate(index.doc_ids):
+            if doc not in index.deleted:
+                index.docs[event_id] = doc
+                index.total_length += index.doc_lengths[doc]
+        return index
+
+
+def postings_of(postings: _Postings, docs: Iterable[int]) -> Iterator[Tuple[int, int]]:
+    """It yields (index in postings, document) of `docs` found in postings"""
+    for doc in docs:
+        i = bisect_left(postings.docs, doc)
+        if i < len(postings.docs) and postings.docs[i] == doc:
+            yield i, doc
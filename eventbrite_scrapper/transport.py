@@ -0,0 +1,166 @@
+"""HTTP transports used by `Eventbrite` to fetch pages and call the search API
+
+- `RequestsTransport` - `requests.Session` over HTTP/1.1 (default). Every
+  concurrent request needs its own connection
+- `HTTP2Transport` - `httpx.Client` over HTTP/2 (optional dependency, install
+  with `pip install httpx[http2]`). Concurrent requests are
+  multiplexed over a few connections
+"""
+
+from typing import Any, Dict, Optional, Sequence, Tuple, TYPE_CHECKING
+
+from . import utils
+
+if TYPE_CHECKING:
+    import httpx
+
+requests = utils.lazy_import("requests")
+
+# connection-specific headers are not allowed in HTTP/2
+HOP_BY_HOP_HEADERS = frozenset(
+    ("connection", "keep-alive", "proxy-connection", "transfer-encoding", "upgrade")
+)
+
+
+class Transport:
+    """Interface of transports. Markers of `get` are pairs used to stop
+    downloading early (see `utils.read_until`)"""
+
+    def get(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        markers: Optional[Sequence[Tuple[bytes, bytes]]] = None,
+    ) -> bytes:
+        raise NotImplementedError
+
+    def post_json(self, url: str, data: Any, headers: Dict[str, str]) -> bytes:
+        raise NotImplementedError
+
+    def get_cookies(self) -> Dict[str, str]:
+        raise NotImplementedError
+
+    def set_cookies(self, cookies: Dict[str, str]):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class RequestsTransport(Transport):
+    """
+    Transport based on `requests.Session` (HTTP/1.1)
+
+    Args:
+      session (requests.Session): Defaults to None (new session)
+    """
+
+    def __init__(self, session: "requests.Session" = None):
+        self.session = session if session is not None else requests.Session()
+
+    def get(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        markers: Optional[Sequence[Tuple[bytes, bytes]]] = None,
+    ) -> bytes:
+        if markers:
+            r = self.session.get(url, headers=headers, stream=True)
+            return utils.read_until(r, markers)
+        return self.session.get(url, headers=headers).content
+
+    def post_json(self, url: str, data: Any, headers: Dict[str, str]) -> bytes:
+        return self.session.post(url, json=data, headers=headers).content
+
+    def get_cookies(self) -> Dict[str, str]:
+        return self.session.cookies.get_dict()
+
+    def set_cookies(self, cookies: Dict[str, str]):
+        self.session.cookies.update(cookies)
+
+    def close(self):
+        self.session.close()
+
+
+class HTTP2Transport(Transport):
+    """
+    Transport based on `httpx.Client` with HTTP/2. It is thread-safe, so one
+    transport (and a few connections) could be shared by all fetching threads
+
+    Args:
+      client (httpx.Client): Defaults to None (new client with HTTP/2)
+      max_connections (int): limit of connections of the new client.
+        Defaults to 4
+      timeout (float): timeout of the new client in seconds. Defaults to 30
+    """
+
+    def __init__(
+        self,
+        client: "httpx.Client" = None,
+        max_connections: int = 4,
+        timeout: float = 30,
+    ):
+        try:
+            import httpx
+        except ImportError as e:
+            raise ImportError(
+                "HTTP2Transport requires httpx with HTTP/2 support: "
+                "pip install httpx[http2]"
+            ) from e
+
+        if client is None:
+            client = httpx.Client(
+                http2=True,
+                limits=httpx.Limits(max_connections=max_connections),
+                timeout=timeout,
+            )
+        self.client = client
+
+    def get(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        markers: Optional[Sequence[Tuple[bytes, bytes]]] = None,
+    ) -> bytes:
+        headers = http2_headers(headers)
+        if markers:
+            with self.client.stream("GET", url, headers=headers) as r:
+                # NOTE: closing the response resets only its stream, the
+                #   connection stays open for other requests
+                return utils.read_until(StreamedResponse(r), markers)
+        return self.client.get(url, headers=headers).content
+
+    def post_json(self, url: str, data: Any, headers: Dict[str, str]) -> bytes:
+        r = self.client.post(url, json=data, headers=http2_headers(headers))
+        return r.content
+
+    def get_cookies(self) -> Dict[str, str]:
+        return dict(self.client.cookies)
+
+    def set_cookies(self, cookies: Dict[str, str]):
+        self.client.cookies.update(cookies)
+
+    def close(self):
+        self.client.close()
+
+
+class StreamedResponse:
+    """Adapter of streamed `httpx.Response` for `utils.read_until`"""
+
+    def __init__(self, response: "httpx.Response"):
+        self.response = response
+
+    def iter_content(self, chunk_size: int = 1):
+        return self.response.iter_bytes(chunk_size=chunk_size)
+
+    def close(self):
+        self.response.close()
+
+
+def http2_headers(headers: Dict[str, str]) -> Dict[str, str]:
+    """It removes connection-specific headers (and `Host`, sent as `:authority`)"""
+    return {
+        k: v
+        for k, v in headers.items()
+        if k.lower() not in HOP_BY_HOP_HEADERS and k.lower() != "host"
+    }
@@ -1,9 +1,61 @@
-from typing import Union, Tuple
+from typing import Any, Callable, Dict, Hashable, Union, Tuple, Sequence
+from types import ModuleType
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import importlib
+import importlib.util
 import logging
+import sys
+import threading
 import time
 import random
 
 
+def lazy_import(name: str) -> ModuleType:
+    """
+    It returns module that is actually imported on the first attribute access
+    (keeps import of the package fast when heavy dependencies are not used)
+
+    Args:
+      name (str): full module name (e.g. "lxml.html")
+
+    Returns:
+      Module (already imported module if it is in `sys.modules`)
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    if importlib.util.find_spec(name) is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    return LazyModule(name)
+
+
+class LazyModule(ModuleType):
+    """
+    Proxy of the module that imports it on the first attribute access.
+
+    NOTE: `importlib.util.LazyLoader` is not thread-safe before Python 3.12
+      (threads could see half-loaded module), so the module is imported with
+      `importlib.import_module` under a lock
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_lock"] = threading.Lock()
+        self.__dict__["_lazy_module"] = None
+
+    def __getattr__(self, attr: str) -> Any:
+        module = self._lazy_module
+        if module is None:
+            with self._lazy_lock:
+                module = self._lazy_module
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    # next attribute lookups do not reach `__getattr__`
+                    self.__dict__.update(module.__dict__)
+                    self.__dict__["_lazy_module"] = module
+        return getattr(module, attr)
+
+
 class WaitManager:
     """Creates additional delays for scrapper to avoid ban"""
 
@@ -23,6 +75,8 @@ class WaitManager:
         """
         self.log = logging.getLogger("waiter")
         self.time = None
+        # shared by threads (e.g. sharded search): requests are spaced globally
+        self.lock = threading.Lock()
 
         self.default_delay_sec = default_delay_sec
 
@@ -44,26 +98,166 @@ class WaitManager:
         Returns:
           The difference between the current time and the time the timer was last reset.
         """
-        if not self.time:
+        with self.lock:
+            if not self.time:
+                self.reset()
+                return 0
+
+            diff = time.monotonic() - self.time
+
+            sec = sec if sec else self.default_delay_sec
+            if not sec:
+                raise ValueError(f"{sec} ({type(sec)})")
+
+            if isinstance(sec, int):
+                sec_to_wait = sec
+            elif isinstance(sec, tuple):
+                sec_to_wait = round(random.uniform(sec[0], sec[1]), 2)
+            else:
+                raise TypeError(f"{sec} ({type(sec)})")
+
+            if diff < sec_to_wait:
+                self.log.debug(f"waiting for {sec_to_wait} seconds...")
+                time.sleep(sec_to_wait)
+
             self.reset()
-            return 0
+            return diff
+
+
+class SingleFlight:
+    """
+    Concurrent calls with the same key share a single execution of the function
+    (e.g. several threads load the same event page: one request is sent, and
+    all callers get the same result or exception)
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.flights: Dict[Hashable, "_Flight"] = {}
+        # number of calls that got result of another call
+        self.n_shared = 0
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """
+        It runs `func` (or waits for the running call with the same `key`)
+
+        Args:
+          key (Hashable): key of the call (e.g. method and normalized URL)
+          func (Callable[[], Any]): function to run
+
+        Returns:
+          Result of `func`
+        """
+        with self.lock:
+            flight = self.flights.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = self.flights[key] = _Flight()
+            else:
+                self.n_shared += 1
+
+        if not is_leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = func()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight.done.set()
+        return flight.result
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+# query parameters that do not change the page
+TRACKING_PARAMS = ("aff",)
+
+
+def normalize_url(url: str) -> str:
+    """It normalizes URL to compare requests: lowercase scheme and host, sorted
+    query without tracking parameters, no fragment and trailing slash"""
+    parts = urlsplit(url)
+    query = sorted(
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k not in TRACKING_PARAMS and not k.startswith("utm_")
+    )
+    return urlunsplit(
+        (
+            parts.scheme.lower(),
+            parts.netloc.lower(),
+            parts.path.rstrip("/") or "/",
+            urlencode(query),
+            "",
+        )
+    )
+
+
+def read_until(
+    response,
+    markers: Sequence[Tuple[bytes, bytes]],
+    chunk_size: int = 16 * 1024,
+) -> bytes:
+    """
+    Reads streamed response in chunks until every marker is found, then closes
+    the connection without downloading the rest of the body
+
+    Args:
+      response (requests.Response): response requested with `stream=True`
+      markers (Sequence[Tuple[bytes, bytes]]): pairs of (start, end) byte strings.
+        Reading stops when, for every pair, `end` was found after `start`
+      chunk_size (int): size of chunks to read. Defaults to 16 KiB
+
+    Returns:
+      Bytes up to the last found `end` marker (whole body if some marker was not
+      found)
 
-        diff = time.monotonic() - self.time
+    Note:
+      Connection is closed after early abort, so it will not be reused by session
+    """
+    buffer = bytearray()
+    # per marker: (position of `start`, or None), position to continue search
+    starts = [None] * len(markers)
+    positions = [0] * len(markers)
+    pending = set(range(len(markers)))
 
-        sec = sec if sec else self.default_delay_sec
-        if not sec:
-            raise ValueError(f"{sec} ({type(sec)})")
+    try:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            buffer += chunk
+            for i in list(pending):
+                start, end = markers[i]
+                if starts[i] is None:
+                    found = buffer.find(start, positions[i])
+                    if found < 0:
+                        positions[i] = max(0, len(buffer) - len(start) + 1)
+                        continue
+                    starts[i] = found
+                    positions[i] = found + len(start)
 
-        if isinstance(sec, int):
-            sec_to_wait = sec
-        elif isinstance(sec, tuple):
-            sec_to_wait = round(random.uniform(sec[0], sec[1]), 2)
-        else:
-            raise TypeError(f"{sec} ({type(sec)})")
+                found = buffer.find(end, positions[i])
+                if found < 0:
+                    positions[i] = max(positions[i], len(buffer) - len(end) + 1)
+                    continue
+                positions[i] = found + len(end)
+                pending.discard(i)
 
-        if diff < sec_to_wait:
-            self.log.debug(f"waiting for {sec_to_wait} seconds...")
-            time.sleep(sec_to_wait)
+            if not pending:
+                # cut the rest of the chunk (it could end in the middle of a char)
+                del buffer[max(positions) :]
+                break
+    finally:
+        response.close()
 
-        self.reset()
-        return diff
+    return bytes(buffer)
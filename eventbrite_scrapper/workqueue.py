@@ -0,0 +1,449 @@
+"""Work queue shared by multiple crawler processes (and nodes)
+
+Search jobs (query + page range) and profile jobs (event id or url) are put into
+the queue once (jobs are deduplicated by key), leased by workers, retried on
+failure and their results are sent to a sink.
+
+`SQLiteWorkQueue` keeps jobs in a local SQLite file, other backends (e.g.
+networked) should implement `WorkQueue` interface.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Literal, Optional
+from dataclasses import dataclass, field
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from . import data_models as dm
+from .main import SEARCH_PAGE_SIZE
+
+log = logging.getLogger(__name__)
+
+JobKind = Literal["search", "profile"]
+
+
+@dataclass
+class Job:
+    id: int
+    kind: JobKind
+    key: str
+    payload: Dict[str, Any] = field(repr=False)
+    attempts: int = 0
+    # worker holding the lease (lease is identified by worker and attempts)
+    worker: Optional[str] = None
+
+
+class LeaseLost(Exception):
+    """Lease of the job expired and the job was taken by another worker"""
+
+
+class WorkQueue:
+    """Base class of work queue backends"""
+
+    def put(self, kind: JobKind, payload: Dict[str, Any], key: str = None) -> bool:
+        """
+        It adds job to the queue unless job with the same key was added before
+
+        Args:
+          kind (JobKind): "search" or "profile"
+          payload (Dict[str, Any]): JSON serializable job parameters
+          key (str): deduplication key. Defaults to `kind` + payload
+
+        Returns:
+          True if job was added, False if it is duplicate
+        """
+        raise NotImplementedError
+
+    def lease(self, worker_id: str, lease_sec: float) -> Optional[Job]:
+        """It takes the next job for `lease_sec` seconds (or returns None)"""
+        raise NotImplementedError
+
+    def extend(self, job: Job, lease_sec: float) -> bool:
+        """
+        It extends the lease of the running job. Returns False if the lease
+        was lost (expired and the job was leased again)
+        """
+        raise NotImplementedError
+
+    def complete(self, job: Job) -> bool:
+        """It marks job as done. Returns False if the lease was lost"""
+        raise NotImplementedError
+
+    def fail(self, job: Job, error: str) -> bool:
+        """
+        It returns job to the queue or marks it as failed after max attempts.
+        Returns False if the lease was lost
+        """
+        raise NotImplementedError
+
+    def reserve_request(self, interval_sec: float) -> float:
+        """
+        It reserves time slot for one request in global (shared by all workers)
+        rate budget
+
+        Args:
+          interval_sec (float): minimal interval between requests of all workers
+
+        Returns:
+          Number of seconds to wait before making the request
+        """
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, int]:
+        """It returns number of jobs by status"""
+        raise NotImplementedError
+
+
+def job_key(kind: JobKind, payload: Dict[str, Any]) -> str:
+    return f"{kind}:{json.dumps(payload, sort_keys=True, default=str)}"
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """
+    Work queue stored in SQLite file. It could be shared by processes on the same
+    host (or via shared file system that supports locking)
+
+    Args:
+      fpath (str): path to SQLite database file
+      max_attempts (int): job is marked as failed after that many attempts.
+        Defaults to 3
+    """
+
+    def __init__(self, fpath: str, max_attempts: int = 3):
+        self.fpath = fpath
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(
+            fpath, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL UNIQUE,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_until REAL,
+                worker TEXT,
+                error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+            CREATE TABLE IF NOT EXISTS rate (
+                name TEXT PRIMARY KEY,
+                next_at REAL NOT NULL
+            );
+            """)
+
+    def _transaction(self, func: Callable[[sqlite3.Cursor], Any]) -> Any:
+        with self.lock:
+            cur = self.conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                result = func(cur)
+            except BaseException:
+                cur.execute("ROLLBACK")
+                raise
+            cur.execute("COMMIT")
+            return result
+
+    def put(self, kind: JobKind, payload: Dict[str, Any], key: str = None) -> bool:
+        key = key or job_key(kind, payload)
+
+        def put(cur: sqlite3.Cursor) -> bool:
+            cur.execute(
+                "INSERT OR IGNORE INTO jobs (kind, key, payload) VALUES (?, ?, ?)",
+                (kind, key, json.dumps(payload, default=str)),
+            )
+            return cur.rowcount == 1
+
+        return self._transaction(put)
+
+    def lease(self, worker_id: str, lease_sec: float) -> Optional[Job]:
+        def lease(cur: sqlite3.Cursor) -> Optional[Job]:
+            now = time.time()
+            # expired leases of jobs without attempts left
+            cur.execute(
+                "UPDATE jobs SET status = 'failed', error = 'lease expired' "
+                "WHERE status = 'leased' AND lease_until < ? AND attempts >= ?",
+                (now, self.max_attempts),
+            )
+            row = cur.execute(
+                "SELECT id, kind, key, payload, attempts FROM jobs "
+                "WHERE status = 'pending' "
+                "   OR (status = 'leased' AND lease_until < ?) "
+                "ORDER BY id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+
+            cur.execute(
+                "UPDATE jobs SET status = 'leased', lease_until = ?, worker = ?, "
+                "attempts = attempts + 1 WHERE id = ?",
+                (now + lease_sec, worker_id, row[0]),
+            )
+            return Job(
+                id=row[0],
+                kind=row[1],
+                key=row[2],
+                payload=json.loads(row[3]),
+                attempts=row[4] + 1,
+                worker=worker_id,
+            )
+
+        return self._transaction(lease)
+
+    def _update_leased(self, job: Job, assignments: str, values: tuple) -> bool:
+        """It updates the job if it is still leased by the worker of `job`"""
+
+        def update(cur: sqlite3.Cursor) -> bool:
+            cur.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ? AND status = 'leased' "
+                "AND worker = ? AND attempts = ?",
+                values + (job.id, job.worker, job.attempts),
+            )
+            return cur.rowcount == 1
+
+        return self._transaction(update)
+
+    def extend(self, job: Job, lease_sec: float) -> bool:
+        return self._update_leased(job, "lease_until = ?", (time.time() + lease_sec,))
+
+    def complete(self, job: Job) -> bool:
+        return self._update_leased(
+            job, "status = 'done', lease_until = NULL, error = NULL", ()
+        )
+
+    def fail(self, job: Job, error: str) -> bool:
+        status = "failed" if job.attempts >= self.max_attempts else "pending"
+        return self._update_leased(
+            job, "status = ?, lease_until = NULL, error = ?", (status, error)
+        )
+
+    def reserve_request(self, interval_sec: float) -> float:
+        def reserve(cur: sqlite3.Cursor) -> float:
+            now = time.time()
+            row = cur.execute("SELECT next_at FROM rate WHERE name = 'global'")
+            row = row.fetchone()
+            slot = max(now, row[0]) if row else now
+            cur.execute(
+                "INSERT OR REPLACE INTO rate (name, next_at) VALUES ('global', ?)",
+                (slot + interval_sec,),
+            )
+            return slot - now
+
+        return self._transaction(reserve)
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall()
+        return dict(rows)
+
+    def close(self):
+        self.conn.close()
+
+
+def put_search_jobs(
+    queue: WorkQueue,
+    query: Dict[str, Any],
+    max_pages: int,
+    pages_per_job: int = 10,
+) -> int:
+    """
+    It splits search into jobs by page ranges and puts them into the queue
+
+    Args:
+      queue (WorkQueue): work queue
+      query (Dict[str, Any]): JSON serializable parameters of `results_iter`
+        (category and event_format could be given as `D`). Page ranges line up
+        only with the default `page_size`, so other sizes are rejected
+      max_pages (int): number of pages to crawl
+      pages_per_job (int): number of pages in one job. Defaults to 10
+
+    Returns:
+      Number of added (not duplicate) jobs
+    """
+    page_size = query.get("page_size", SEARCH_PAGE_SIZE)
+    if page_size != SEARCH_PAGE_SIZE:
+        raise ValueError(
+            f"page range jobs require page_size={SEARCH_PAGE_SIZE}. "
+            f"Given: {page_size}"
+        )
+    query = {
+        k: {"api_id": v.api_id, "url_id": v.url_id} if isinstance(v, dm.D) else v
+        for k, v in query.items()
+    }
+    n_added = 0
+    for start_page in range(1, max_pages + 1, pages_per_job):
+        payload = {
+            "query": query,
+            "start_page": start_page,
+            "max_pages": min(start_page + pages_per_job - 1, max_pages),
+        }
+        n_added += queue.put("search", payload)
+    return n_added
+
+
+def put_profile_jobs(queue: WorkQueue, events: Iterable[str]) -> int:
+    """It puts event ids (or urls) into the queue. Returns number of added jobs"""
+    return sum(queue.put("profile", {"event": e}, key=f"profile:{e}") for e in events)
+
+
+class RateBudgetWaiter:
+    """
+    Drop-in replacement for `Eventbrite.waiter` that spaces requests of all
+    workers sharing the queue
+
+    Args:
+      queue (WorkQueue): work queue holding the global rate budget
+      requests_per_sec (float): allowed number of requests per second (all workers)
+    """
+
+    def __init__(self, queue: WorkQueue, requests_per_sec: float):
+        self.queue = queue
+        self.interval_sec = 1 / requests_per_sec
+
+    def reset(self):
+        pass
+
+    def wait_if_needed(self, sec: Any = None) -> float:
+        wait_sec = self.queue.reserve_request(self.interval_sec)
+        if wait_sec > 0:
+            time.sleep(wait_sec)
+        return wait_sec
+
+
+class Worker:
+    """
+    It pulls jobs from the queue, runs them with the client and sends results to
+    the sink
+
+    Args:
+      client (Eventbrite): client used to run jobs
+      queue (WorkQueue): work queue
+      sink (Callable[[Job, List[Event]], None]): receives results of every search
+        page and every profile. Must be safe to call again for retried jobs
+      worker_id (str): worker name. Defaults to `<hostname>:<pid>:<thread id>`
+      lease_sec (float): job lease (extended after every page). Defaults to 300
+      requests_per_sec (float): global rate budget shared by all workers. If
+        given, `client.waiter` is replaced with `RateBudgetWaiter`
+    """
+
+    def __init__(
+        self,
+        client,
+        queue: WorkQueue,
+        sink: Callable[[Job, List[dm.Event]], None],
+        worker_id: str = None,
+        lease_sec: float = 300,
+        requests_per_sec: float = None,
+    ):
+        self.client = client
+        self.queue = queue
+        self.sink = sink
+        self.worker_id = worker_id or (
+            f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+        )
+        self.lease_sec = lease_sec
+        self.stop_event = threading.Event()
+
+        if requests_per_sec:
+            self.client.waiter = RateBudgetWaiter(queue, requests_per_sec)
+
+    def run(self, max_jobs: int = None, poll_sec: float = None) -> int:
+        """
+        It runs jobs until the queue is empty (or stop is requested)
+
+        Args:
+          max_jobs (int): stop after that many jobs. Defaults to None (no limit)
+          poll_sec (float): if given, wait for new jobs instead of stopping when
+            the queue is empty
+
+        Returns:
+          Number of processed jobs
+        """
+        n_jobs = 0
+        while not self.stop_event.is_set():
+            if max_jobs is not None and n_jobs >= max_jobs:
+                break
+
+            job = self.queue.lease(self.worker_id, self.lease_sec)
+            if job is None:
+                if poll_sec is None:
+                    break
+                self.stop_event.wait(poll_sec)
+                continue
+
+            n_jobs += 1
+            try:
+                self.run_job(job)
+            except LeaseLost:
+                log.warning(f"job {job.id} was taken by another worker")
+            except Exception as e:
+                log.exception(f"job {job.id} failed (attempt {job.attempts})")
+                if not self.queue.fail(job, repr(e)):
+                    log.warning(f"job {job.id} was taken by another worker")
+            else:
+                if not self.queue.complete(job):
+                    log.warning(f"job {job.id} was taken by another worker")
+        return n_jobs
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run_job(self, job: Job):
+        if job.kind == "search":
+            self.run_search(job)
+        elif job.kind == "profile":
+            event = self.client.event_profile.load(job.payload["event"])
+            self.sink(job, [event])
+        else:
+            raise ValueError(f"Unknown job kind: {job.kind}")
+
+    def run_search(self, job: Job):
+        query = dict(job.payload["query"])
+        for k in ("category", "event_format"):
+            if query.get(k):
+                query[k] = dm.D(**query[k])
+
+        for events in self.client.search_events.results_iter(
+            **query,
+            start_page=job.payload.get("start_page", 1),
+            max_pages=job.payload["max_pages"],
+        ):
+            self.sink(job, events)
+            if not self.queue.extend(job, self.lease_sec):
+                # the job is retried by another worker, stop duplicate work
+                raise LeaseLost(f"lease of job {job.id} expired")
+
+
+class JsonLinesSink:
+    """
+    Sink writing events as JSON lines (`Event.as_dict(flatten=True)`)
+
+    Args:
+      fpath (str): path to output file (appended)
+    """
+
+    def __init__(self, fpath: str):
+        self.lock = threading.Lock()
+        self.f = open(fpath, "a", encoding="utf-8")
+
+    def __call__(self, job: Job, events: List[dm.Event]):
+        lines = [
+            json.dumps(e.as_dict(flatten=True), default=str) + "\n" for e in events
+        ]
+        with self.lock:
+            self.f.writelines(lines)
+            self.f.flush()
+
+    def close(self):
+        self.f.close()
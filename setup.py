@@ -17,4 +17,9 @@ setup(
     packages=find_packages(),
     python_requires=">=3.7",
     install_requires=["requests", "lxml", "pytz"],
+    extras_require={
+        "http2": ["httpx[http2]"],
+        # HTTP/2 transport is tested with `httpx.MockTransport`
+        "test": ["pytest", "httpx[http2]"],
+    },
 )